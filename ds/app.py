@@ -1,4 +1,4 @@
-from flask import Flask, jsonify, request, render_template
+from flask import Flask, jsonify, request, render_template, Response, stream_with_context, send_file
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
@@ -14,10 +14,20 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from services.data_analysis import DataAnalyzer
 from services.ml_models import MLPredictor
 from services.ai_integration import AIProcessor
+from services.batch_scoring import BatchScorer
+from services.feature_store import FeatureStore
+from services.aggregation import GroupByAggregator
 from utils.data_utils import DataProcessor
-from config.settings import Config
+from utils.payload_shaping import ArtifactStore
+from utils.json_provider import FastJSONProvider
+from utils import json_utils, columnar_io
+from config.settings import Config, get_config
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)  # NumPy/pandas-aware, orjson-backed jsonify
+app_config = get_config()  # DS_CONFIG=development|production|testing
+app.config.from_object(app_config)
+app_config.init_app(app)
 CORS(app, origins=["http://localhost:3000", "http://localhost:4000"])  # Allow frontend connections
 
 # Initialize services
@@ -25,6 +35,38 @@ data_analyzer = DataAnalyzer()
 ml_predictor = MLPredictor()
 ai_processor = AIProcessor()
 data_processor = DataProcessor()
+batch_scorer = BatchScorer(ml_predictor)
+feature_store = FeatureStore()
+aggregator = GroupByAggregator()
+artifact_store = ArtifactStore()
+
+def serving_workers():
+    """Number of server worker processes (set by gunicorn.conf.py; 1 for the dev server)"""
+    return int(os.environ.get('DS_SERVING_WORKERS', '1'))
+
+def read_request_data():
+    """JSON body, or an Arrow / Parquet / MessagePack body decoded into a DataFrame"""
+    body_format = columnar_io.request_format(request.mimetype)
+    if body_format == 'json':
+        return request.json
+    return columnar_io.decode_frame(request.get_data(cache=False), body_format)
+
+def has_data(data):
+    return len(data) > 0 if isinstance(data, pd.DataFrame) else bool(data)
+
+def document_response(document):
+    """JSON response, or MessagePack when the client's Accept header prefers it"""
+    if columnar_io.response_format(request.accept_mimetypes, tabular=False) == 'msgpack':
+        return Response(columnar_io.encode_document(document), mimetype=columnar_io.MEDIA_TYPES['msgpack'])
+    return jsonify(document)
+
+def frame_response(frame, response_format, metadata=None, headers=None):
+    """DataFrame as an Arrow, Parquet or MessagePack response body"""
+    return Response(
+        columnar_io.encode_frame(frame, response_format, metadata=metadata),
+        mimetype=columnar_io.MEDIA_TYPES[response_format],
+        headers=headers
+    )
 
 @app.route('/')
 def home():
@@ -36,9 +78,16 @@ def home():
         "endpoints": [
             "/api/analyze",
             "/api/predict",
+            "/api/predict/batch",
+            "/api/train/increment",
+            "/api/models/compact",
+            "/api/features",
             "/api/process",
             "/api/health",
-            "/api/ai-insights"
+            "/api/ai-insights",
+            "/api/ai-insights/stream",
+            "/api/time-series",
+            "/api/aggregate"
         ]
     })
 
@@ -57,17 +106,17 @@ def health_check():
 
 @app.route('/api/analyze', methods=['POST'])
 def analyze_data():
-    """Analyze uploaded data"""
+    """Analyze uploaded data (JSON, Arrow, Parquet or MessagePack body)"""
     try:
-        data = request.json
-        if not data:
+        data = read_request_data()
+        if not has_data(data):
             return jsonify({"error": "No data provided"}), 400
         
         # Process the data
         processed_data = data_processor.clean_data(data)
         analysis_result = data_analyzer.analyze(processed_data)
         
-        return jsonify({
+        return document_response({
             "success": True,
             "analysis": analysis_result,
             "timestamp": datetime.now().isoformat()
@@ -78,52 +127,425 @@ def analyze_data():
 
 @app.route('/api/predict', methods=['POST'])
 def make_prediction():
-    """Make ML predictions"""
+    """Make ML predictions
+    
+    Feature rows may be sent as JSON, Arrow, Parquet or MessagePack. Clients
+    that accept Arrow, Parquet or MessagePack get the predictions as a table
+    (``prediction`` plus ``probability_<label>`` columns) with the model in
+    the metadata and ``X-Model-*`` headers.
+    """
+    try:
+        data = read_request_data()
+        if not has_data(data):
+            return jsonify({"error": "No data provided"}), 400
+        
+        # Entity ids instead of feature rows: assemble rows from the feature store
+        model_name = request.args.get('model_name')
+        missing_entities = None
+        if isinstance(data, dict) and 'entities' in data:
+            model_name = data.get('model_name')
+            data, missing_entities = feature_store.assemble_rows(data['entities'], overrides=data.get('features'))
+        
+        response_format = columnar_io.response_format(request.accept_mimetypes)
+        if response_format != 'json':
+            return predict_frame_response(data, model_name, missing_entities, response_format)
+        
+        prediction = ml_predictor.predict(data, model_name)
+        if missing_entities is not None:
+            prediction['missing_entities'] = missing_entities
+        
+        return jsonify({
+            "success": True,
+            "prediction": prediction,
+            "confidence": prediction.get("confidence", 0.0),
+            "timestamp": datetime.now().isoformat()
+        })
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def predict_frame_response(data, model_name, missing_entities, response_format):
+    """Vectorized predictions for all rows with one pinned model, as a table"""
+    model_name, state = ml_predictor.get_model_state(model_name)
+    if state is None:
+        return jsonify({"error": f"Model '{model_name}' not found" if model_name else "No trained models available"}), 404
+    
+    if not isinstance(data, pd.DataFrame):
+        data = pd.DataFrame([data] if isinstance(data, dict) else data)
+    frame = batch_scorer.score_chunk(state, data, class_labels=ml_predictor.class_labels(state))
+    
+    metadata = {
+        "model_used": model_name,
+        "model_version": state.info.get('version'),
+        "problem_type": state.info['problem_type'],
+        "confidence": state.info.get('confidence', 0.0),
+        "missing_features": [feature for feature in state.info['features'] if feature not in data.columns]
+    }
+    if missing_entities is not None:
+        metadata["missing_entities"] = missing_entities
+    
+    return frame_response(frame, response_format, metadata=metadata, headers={
+        "X-Model-Used": model_name,
+        "X-Model-Version": state.info.get('version', '')
+    })
+
+@app.route('/api/predict/batch', methods=['POST'])
+def batch_predict():
+    """Score an uploaded or stored CSV/NDJSON/Parquet file and stream the results"""
+    try:
+        params = request.form.to_dict() if request.files or request.form else (request.get_json(silent=True) or {})
+        params.update(request.args.to_dict())
+        
+        if 'file' in request.files:
+            file = request.files['file']
+            source = batch_scorer.detach_upload(file)
+            input_format = params.get('input_format') or batch_scorer.detect_format(file.filename)
+        elif params.get('path'):
+            source = batch_scorer.resolve_stored_path(params['path'])
+            if source is None:
+                return jsonify({"error": f"Stored file '{params['path']}' not found"}), 404
+            input_format = params.get('input_format') or batch_scorer.detect_format(source)
+        else:
+            return jsonify({"error": "Provide a 'file' upload or a stored file 'path'"}), 400
+        
+        if input_format not in batch_scorer.INPUT_FORMATS:
+            return jsonify({"error": f"Unsupported input format: {input_format}"}), 400
+        
+        output_format = params.get('output_format', 'csv')
+        if output_format not in batch_scorer.OUTPUT_FORMATS:
+            return jsonify({"error": f"Unsupported output format: {output_format}"}), 400
+        
+        # Pin the model version for the whole file
+        model_name, state = ml_predictor.get_model_state(params.get('model_name'))
+        if state is None:
+            return jsonify({"error": f"Model '{model_name}' not found" if model_name else "No trained models available"}), 404
+        
+        passthrough = [col for col in params.get('passthrough', '').split(',') if col]
+        chunk_size = int(params['chunk_size']) if params.get('chunk_size') else None
+        
+        # Bad input is reported before the streamed response starts
+        try:
+            stream = batch_scorer.score(
+                source, input_format, state,
+                output_format=output_format,
+                passthrough=passthrough,
+                chunk_size=chunk_size
+            )
+        except Exception as e:
+            if hasattr(source, 'close'):
+                source.close()
+            return jsonify({"error": f"Invalid input file: {str(e)}"}), 400
+        
+        def generate():
+            try:
+                yield from stream
+            finally:
+                if hasattr(source, 'close'):
+                    source.close()
+        
+        return Response(
+            stream_with_context(generate()),
+            mimetype=batch_scorer.OUTPUT_FORMATS[output_format],
+            headers={
+                "Content-Disposition": f"attachment; filename=predictions.{output_format}",
+                "X-Model-Used": model_name,
+                "X-Model-Version": state.info.get('version', '')
+            }
+        )
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/predict/cache')
+def prediction_cache_stats():
+    """Prediction cache hit-rate metrics"""
+    return jsonify({
+        "success": True,
+        "cache": ml_predictor.cache_stats(),
+        "timestamp": datetime.now().isoformat()
+    })
+
+@app.route('/api/train/increment', methods=['POST'])
+def train_increment():
+    """Update an incremental ML model with a mini-batch of labeled rows"""
     try:
         data = request.json
         if not data:
             return jsonify({"error": "No data provided"}), 400
         
-        prediction = ml_predictor.predict(data)
+        if 'data' not in data or 'target_column' not in data:
+            return jsonify({"error": "'data' and 'target_column' are required"}), 400
+        
+        result = ml_predictor.partial_train(
+            data['data'],
+            data['target_column'],
+            model_name=data.get('model_name'),
+            model_type=data.get('model_type', 'sgd'),
+            problem_type=data.get('problem_type', 'auto'),
+            classes=data.get('classes')
+        )
+        
+        if 'error' in result:
+            return jsonify(result), 400
         
         return jsonify({
             "success": True,
-            "prediction": prediction,
-            "confidence": ml_predictor.get_confidence(),
+            "training": result,
+            "timestamp": datetime.now().isoformat()
+        })
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/models/compact', methods=['POST'])
+def compact_model():
+    """Compact a trained tree ensemble into a small float32 runtime"""
+    try:
+        data = request.json
+        if not data or 'model_name' not in data:
+            return jsonify({"error": "'model_name' is required"}), 400
+        
+        result = ml_predictor.compact_model(
+            data['model_name'],
+            data=data.get('validation_data'),
+            float32=data.get('float32', True),
+            prune_trees=data.get('prune_trees'),
+            max_depth=data.get('max_depth'),
+            prune_depth=data.get('prune_depth'),
+            tolerance=data.get('tolerance')
+        )
+        
+        if 'error' in result:
+            return jsonify(result), 400
+        
+        return jsonify({
+            "success": True,
+            "compaction": result,
             "timestamp": datetime.now().isoformat()
         })
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/features')
+def feature_store_stats():
+    """Entity and feature counts per feature table"""
+    return jsonify({
+        "success": True,
+        "tables": feature_store.stats(),
+        "timestamp": datetime.now().isoformat()
+    })
+
+@app.route('/api/features/snapshot', methods=['POST'])
+def snapshot_features():
+    """Write all feature tables to disk"""
+    result = feature_store.snapshot()
+    if 'error' in result:
+        return jsonify(result), 500
+    
+    return jsonify({
+        "success": True,
+        "snapshot": result,
+        "timestamp": datetime.now().isoformat()
+    })
+
+@app.route('/api/features/<entity_type>', methods=['POST'])
+def upsert_features(entity_type):
+    """Store precomputed feature vectors for entities of one type"""
+    try:
+        # Tables live in process memory: a write would reach one worker only
+        if serving_workers() > 1:
+            return jsonify({"error": "Feature store writes need a single server worker (DS_WORKERS=1)"}), 409
+        
+        data = request.json
+        if not data or 'records' not in data:
+            return jsonify({"error": "'records' is required"}), 400
+        
+        result = feature_store.upsert(
+            entity_type,
+            data['records'],
+            id_field=data.get('id_field'),
+            ttl=data.get('ttl')
+        )
+        
+        if 'error' in result:
+            return jsonify(result), 400
+        
+        return jsonify({
+            "success": True,
+            "features": result,
+            "timestamp": datetime.now().isoformat()
+        })
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/features/<entity_type>/<entity_id>')
+def get_features(entity_type, entity_id):
+    """Stored feature vector of one entity"""
+    features = feature_store.get(entity_type, entity_id)
+    if features is None:
+        return jsonify({"error": f"No features for {entity_type} '{entity_id}'"}), 404
+    
+    return jsonify({
+        "success": True,
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "features": features,
+        "timestamp": datetime.now().isoformat()
+    })
+
 @app.route('/api/ai-insights', methods=['POST'])
 def get_ai_insights():
-    """Get AI-powered insights from data"""
+    """Get AI-powered insights from data (JSON, Arrow, Parquet or MessagePack body)"""
+    try:
+        data = read_request_data()
+        if not has_data(data):
+            return jsonify({"error": "No data provided"}), 400
+        
+        insights = ai_processor.generate_insights(data)
+        
+        return document_response({
+            "success": True,
+            "insights": insights,
+            "timestamp": datetime.now().isoformat()
+        })
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/ai-insights/stream', methods=['POST'])
+def stream_ai_insights():
+    """Stream insights as Server-Sent Events (default) or NDJSON as they are found"""
     try:
         data = request.json
         if not data:
             return jsonify({"error": "No data provided"}), 400
         
-        insights = ai_processor.generate_insights(data)
+        stream_format = request.args.get('format')
+        if stream_format is None:
+            stream_format = 'ndjson' if 'application/x-ndjson' in request.headers.get('Accept', '') else 'sse'
+        if stream_format not in ('sse', 'ndjson'):
+            return jsonify({"error": f"Unsupported stream format: {stream_format}"}), 400
+        
+        def generate():
+            for event, payload in ai_processor.iter_insights(data):
+                if stream_format == 'sse':
+                    yield f"event: {event}\ndata: {json_utils.dumps(payload).decode('utf-8')}\n\n"
+                else:
+                    yield json_utils.dumps({"event": event, "data": payload}).decode('utf-8') + "\n"
+        
+        return Response(
+            stream_with_context(generate()),
+            mimetype='text/event-stream' if stream_format == 'sse' else 'application/x-ndjson',
+            headers={
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no"  # let proxies pass each event through immediately
+            }
+        )
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/ai-insights/cache')
+def insight_cache_stats():
+    """Insight cache hit-rate metrics"""
+    return jsonify({
+        "success": True,
+        "cache": ai_processor.cache_stats(),
+        "timestamp": datetime.now().isoformat()
+    })
+
+@app.route('/api/time-series', methods=['POST'])
+def time_series_analysis():
+    """Trend, seasonality and change points of numeric columns over a datetime column"""
+    try:
+        data = request.json
+        if not data:
+            return jsonify({"error": "No data provided"}), 400
+        
+        options = data if isinstance(data, dict) else {}
+        analysis = ai_processor.analyze_time_series(
+            data,
+            time_column=options.get('time_column'),
+            freq=options.get('freq'),
+            agg=options.get('agg', 'mean'),
+            window=options.get('window')
+        )
+        if "error" in analysis:
+            return jsonify(analysis), 400
         
         return jsonify({
             "success": True,
-            "insights": insights,
+            "time_series": analysis,
             "timestamp": datetime.now().isoformat()
         })
     
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/aggregate', methods=['POST'])
+def aggregate_data():
+    """Group-by metrics over a stored dataset or inline records"""
+    try:
+        query = request.json
+        if not query:
+            return jsonify({"error": "No query provided"}), 400
+        
+        result = aggregator.aggregate(query)
+        if "error" in result:
+            return jsonify(result), 404 if "not found" in result["error"] else 400
+        
+        return jsonify({
+            "success": True,
+            "aggregation": result,
+            "timestamp": datetime.now().isoformat()
+        })
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/aggregate/cache')
+def aggregate_cache_stats():
+    """Aggregation cache hit-rate metrics"""
+    return jsonify({
+        "success": True,
+        "cache": aggregator.cache_stats(),
+        "timestamp": datetime.now().isoformat()
+    })
+
+@app.route('/api/artifacts/<name>')
+def get_artifact(name):
+    """Serve an image referenced from an outbound insight payload"""
+    path = artifact_store.path(name)
+    if path is None:
+        return jsonify({"error": f"Artifact '{name}' not found"}), 404
+    
+    # Content-addressed: the bytes behind a name never change
+    response = send_file(path, max_age=31536000)
+    response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
+
 @app.route('/api/process', methods=['POST'])
 def process_data():
-    """Process and clean data"""
+    """Process and clean data
+    
+    Accepts JSON, Arrow, Parquet or MessagePack bodies. Clients that accept
+    Arrow, Parquet or MessagePack get the processed table with the processing
+    summary in its metadata.
+    """
     try:
-        data = request.json
-        if not data:
+        data = read_request_data()
+        if not has_data(data):
             return jsonify({"error": "No data provided"}), 400
         
-        processed = data_processor.process(data)
+        response_format = columnar_io.response_format(request.accept_mimetypes)
+        processed = data_processor.process(data, as_frame=response_format != 'json')
+        if response_format != 'json' and 'error' not in processed:
+            return frame_response(
+                processed['processed_data'], response_format,
+                metadata={"processing_summary": processed['processing_summary']}
+            )
         
         return jsonify({
             "success": True,
@@ -158,9 +580,5 @@ def upload_data():
         return jsonify({"error": str(e)}), 500
 
 if __name__ == '__main__':
-    # Create necessary directories
-    os.makedirs('uploads', exist_ok=True)
-    os.makedirs('models', exist_ok=True)
-    os.makedirs('data', exist_ok=True)
-    
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Development server; production runs under gunicorn (see gunicorn.conf.py)
+    app.run(debug=app_config.DEBUG, host=app_config.HOST, port=app_config.PORT)
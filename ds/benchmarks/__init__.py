@@ -0,0 +1 @@
+# Integration Benchmarks Module
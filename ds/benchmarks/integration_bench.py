@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Throughput and tail-latency benchmark of the website integration layer
+
+Drives WebsiteAIIntegration against the stub backend/frontend
+(benchmarks/stub_services.py), started in-process unless --backend-url and
+--frontend-url point at running stubs, and reports calls/s, latency
+percentiles, errors and the connections the stubs accepted. In-process
+stubs share the GIL with the client threads; run them separately
+(python -m benchmarks.stub_services) for client-only numbers.
+    
+    python -m benchmarks.integration_bench --mode both --requests 2000 --concurrency 32
+    python -m benchmarks.integration_bench --scenario user_context --users 50 --latency-ms 20
+
+Scenarios:
+    graphql       connect_to_ai_handler / aconnect_to_ai_handler
+    frontend      send_insights_to_frontend / asend_insights_to_frontend
+    user_context  get_user_context / aget_user_context over --users distinct users
+    deliver       both pushes (sequential when sync, gathered when async)
+    queue         queue_insights, timed until the delivery queues are drained (sync only)
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_services import start_stubs, add_stub_arguments, options_from_args
+from config.settings import Config
+from utils.cache import StaleWhileRevalidateCache
+
+SCENARIOS = ['graphql', 'frontend', 'user_context', 'deliver', 'queue']
+
+def make_insights(count):
+    """Insight list shaped like AIProcessor output"""
+    return [
+        {
+            "type": "trend",
+            "category": "correlation",
+            "title": f"Strong correlation #{i}",
+            "description": f"revenue and sessions move together (r=0.{80 + i % 20})",
+            "severity": ["low", "medium", "high"][i % 3],
+            "confidence": 0.9,
+            "columns": ["revenue", "sessions"]
+        }
+        for i in range(count)
+    ]
+
+def is_error(result):
+    return result is False or result is None or (isinstance(result, dict) and "error" in result)
+
+def sync_call(integration, scenario, insights, users):
+    if scenario == 'graphql':
+        return lambda i: integration.connect_to_ai_handler(insights)
+    if scenario == 'frontend':
+        return lambda i: integration.send_insights_to_frontend(insights)
+    if scenario == 'user_context':
+        return lambda i: integration.get_user_context(f"user{i % users}")
+    if scenario == 'deliver':
+        def deliver(i):
+            backend_result = integration.connect_to_ai_handler(insights)
+            frontend_result = integration.send_insights_to_frontend(insights)
+            return backend_result if is_error(backend_result) else frontend_result
+        return deliver
+    if scenario == 'queue':
+        return lambda i: integration.queue_insights(insights)
+    raise ValueError(f"Unknown scenario: {scenario}")
+
+def async_call(integration, scenario, insights, users):
+    if scenario == 'graphql':
+        return lambda i: integration.aconnect_to_ai_handler(insights)
+    if scenario == 'frontend':
+        return lambda i: integration.asend_insights_to_frontend(insights)
+    if scenario == 'user_context':
+        return lambda i: integration.aget_user_context(f"user{i % users}")
+    if scenario == 'deliver':
+        async def deliver(i):
+            result = await integration.adeliver_insights(insights)
+            if is_error(result["backend_result"]):
+                return result["backend_result"]
+            return result["frontend_result"]
+        return deliver
+    raise ValueError(f"Scenario {scenario} has no async path")
+
+def run_sync(call, requests_count, concurrency):
+    latencies = np.zeros(requests_count)
+    errors = [0]
+    lock = threading.Lock()
+    
+    def timed(i):
+        start = time.perf_counter()
+        result = call(i)
+        latencies[i] = time.perf_counter() - start
+        if is_error(result):
+            with lock:
+                errors[0] += 1
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(timed, range(requests_count)))
+    return latencies, errors[0], time.perf_counter() - start
+
+async def _run_async(call, requests_count, concurrency):
+    latencies = np.zeros(requests_count)
+    errors = 0
+    next_index = iter(range(requests_count))
+    
+    async def worker():
+        nonlocal errors
+        for i in next_index:
+            start = time.perf_counter()
+            result = await call(i)
+            latencies[i] = time.perf_counter() - start
+            errors += is_error(result)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return latencies, errors, time.perf_counter() - start
+
+def run_async(integration, call, requests_count, concurrency, warmup):
+    async def main():
+        try:
+            if warmup:
+                await _run_async(call, warmup, min(concurrency, warmup))
+            return await _run_async(call, requests_count, concurrency)
+        finally:
+            await integration.async_client.close()
+    
+    return asyncio.run(main())
+
+def stub_stats(base_url):
+    return requests.get(f"{base_url}/__stats", timeout=5).json()
+
+def summarize(scenario, mode, latencies, errors, elapsed, stub_delta):
+    ms = latencies * 1000.0
+    return {
+        "scenario": scenario,
+        "mode": mode,
+        "calls": len(latencies),
+        "errors": int(errors),
+        "seconds": round(elapsed, 3),
+        "calls_per_sec": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            "mean": round(float(ms.mean()), 2),
+            "p50": round(float(np.percentile(ms, 50)), 2),
+            "p90": round(float(np.percentile(ms, 90)), 2),
+            "p99": round(float(np.percentile(ms, 99)), 2),
+            "p99.9": round(float(np.percentile(ms, 99.9)), 2),
+            "max": round(float(ms.max()), 2)
+        },
+        "stub": stub_delta
+    }
+
+def run_scenario(args, scenario, mode, backend_url, frontend_url):
+    from website_integration import WebsiteAIIntegration
+    
+    integration = WebsiteAIIntegration(backend_url=backend_url, frontend_url=frontend_url)
+    if args.no_context_cache:
+        # Nothing is stored; concurrent misses for a user are still coalesced
+        integration.user_context_cache = StaleWhileRevalidateCache(integration._fetch_user_context, max_entries=0)
+    insights = make_insights(args.insights)
+    
+    before = {url: stub_stats(url) for url in (backend_url, frontend_url)}
+    if mode == 'sync':
+        call = sync_call(integration, scenario, insights, args.users)
+        if args.warmup:
+            run_sync(call, args.warmup, min(args.concurrency, args.warmup))
+            before = {url: stub_stats(url) for url in (backend_url, frontend_url)}
+        latencies, errors, elapsed = run_sync(call, args.requests, args.concurrency)
+        if scenario == 'queue':
+            # Enqueueing is cheap; throughput is bounded by draining the queues
+            drain_start = time.perf_counter()
+            integration.flush_deliveries(timeout=60)
+            elapsed += time.perf_counter() - drain_start
+    else:
+        call = async_call(integration, scenario, insights, args.users)
+        # Warm-up and measured runs share one event loop (the aiohttp session is per loop),
+        # so stub counters include the warm-up requests here
+        latencies, errors, elapsed = run_async(integration, call, args.requests, args.concurrency, args.warmup)
+    
+    after = {url: stub_stats(url) for url in (backend_url, frontend_url)}
+    integration.close()
+    
+    stub_delta = {
+        after[url]['role']: {
+            key: after[url][key] - before[url][key]
+            for key in ('requests', 'connections', 'errors_injected', 'bytes_in', 'bytes_out')
+        }
+        for url in (backend_url, frontend_url)
+    }
+    return summarize(scenario, mode, latencies, errors, elapsed, stub_delta)
+
+def print_table(results):
+    header = f"{'scenario':<13}{'mode':<6}{'calls':>7}{'err':>6}{'calls/s':>10}{'p50':>9}{'p90':>9}{'p99':>9}{'p99.9':>9}{'max':>9}{'conns':>7}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        lat = r['latency_ms']
+        conns = sum(stats['connections'] for stats in r['stub'].values())
+        print(
+            f"{r['scenario']:<13}{r['mode']:<6}{r['calls']:>7}{r['errors']:>6}{r['calls_per_sec']:>10}"
+            f"{lat['p50']:>9}{lat['p90']:>9}{lat['p99']:>9}{lat['p99.9']:>9}{lat['max']:>9}{conns:>7}"
+        )
+    print("latencies in ms; conns = new connections accepted by the stubs")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the website integration layer against stubs')
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS,
+                        help='scenario to run (repeatable; default: all)')
+    parser.add_argument('--mode', choices=['sync', 'async', 'both'], default='both')
+    parser.add_argument('--requests', type=int, default=1000, help='measured calls per scenario and mode')
+    parser.add_argument('--warmup', type=int, default=50, help='unmeasured calls before each run')
+    parser.add_argument('--concurrency', type=int, default=16, help='threads (sync) or tasks (async)')
+    parser.add_argument('--insights', type=int, default=20, help='insights per pushed payload')
+    parser.add_argument('--users', type=int, default=100, help='distinct user ids for user_context')
+    parser.add_argument('--no-context-cache', action='store_true', help='disable the user context cache')
+    parser.add_argument('--backend-url', help='running backend stub (default: start one in-process)')
+    parser.add_argument('--frontend-url', help='running frontend stub (default: start one in-process)')
+    parser.add_argument('--json', dest='json_path', help='also write the results to this file')
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+    
+    # Keep spooled batches and artifacts of benchmark runs out of the working tree
+    workdir = tempfile.mkdtemp(prefix='ds-bench-')
+    Config.DELIVERY_SPOOL_DIR = os.path.join(workdir, 'outbox')
+    Config.ARTIFACT_DIR = os.path.join(workdir, 'artifacts')
+    
+    servers = ()
+    backend_url, frontend_url = args.backend_url, args.frontend_url
+    if not (backend_url and frontend_url):
+        servers = start_stubs(options=options_from_args(args))
+        backend_url = backend_url or f"http://127.0.0.1:{servers[0].server_port}"
+        frontend_url = frontend_url or f"http://127.0.0.1:{servers[1].server_port}"
+    
+    modes = ['sync', 'async'] if args.mode == 'both' else [args.mode]
+    results = []
+    for scenario in args.scenario or SCENARIOS:
+        for mode in modes:
+            if scenario == 'queue' and mode == 'async':
+                continue
+            results.append(run_scenario(args, scenario, mode, backend_url, frontend_url))
+    
+    print_table(results)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(results, f, indent=2)
+    
+    for server in servers:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Stand-in website backend and frontend for integration benchmarks
+
+Implements the endpoints WebsiteAIIntegration talks to:
+    
+    backend   POST /graphql, POST /api/insights, GET /api/user/context, GET /api/health
+    frontend  POST /api/ai-insights, GET /
+
+with configurable latency, error rate and response size. Both servers speak
+HTTP/1.1 keep-alive and accept gzip request bodies. GET /__stats on either
+port returns request, connection and byte counters.
+    
+    python -m benchmarks.stub_services --latency-ms 20 --jitter-ms 10 --error-rate 0.01
+"""
+
+import argparse
+import gzip
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StubOptions:
+    """Behaviour of a stub server"""
+    
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, error_status=503,
+                 payload_bytes=256, context_max_age=60, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms  # mean of an exponential tail added to latency_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.payload_bytes = payload_bytes  # filler in graphql and user context responses
+        self.context_max_age = context_max_age  # 0 sends Cache-Control: no-store
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+    
+    def delay(self):
+        with self.lock:
+            tail = self.random.expovariate(1.0 / self.jitter_ms) if self.jitter_ms > 0 else 0.0
+            return (self.latency_ms + tail) / 1000.0
+    
+    def fails(self):
+        with self.lock:
+            return self.error_rate > 0 and self.random.random() < self.error_rate
+
+class StubServer(ThreadingHTTPServer):
+    """Threaded HTTP server with per-server options and counters"""
+    
+    daemon_threads = True
+    request_queue_size = 1024
+    
+    def __init__(self, address, role, options):
+        self.role = role
+        self.options = options
+        self.counters = {'requests': 0, 'connections': 0, 'errors_injected': 0, 'bytes_in': 0, 'bytes_out': 0}
+        self.paths = {}
+        self.counter_lock = threading.Lock()
+        super().__init__(address, StubHandler)
+    
+    def count(self, **increments):
+        with self.counter_lock:
+            for key, value in increments.items():
+                self.counters[key] += value
+    
+    def stats(self):
+        with self.counter_lock:
+            return {'role': self.role, **self.counters, 'paths': dict(self.paths)}
+    
+    def reset(self):
+        with self.counter_lock:
+            for key in self.counters:
+                self.counters[key] = 0
+            self.paths.clear()
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so client connection reuse is visible
+    disable_nagle_algorithm = True  # headers and body are separate writes; avoid delayed-ACK stalls
+    
+    def setup(self):
+        super().setup()
+        self.server.count(connections=1)
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def do_GET(self):
+        self._handle('GET')
+    
+    def do_POST(self):
+        self._handle('POST')
+    
+    def _read_body(self):
+        raw = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self.server.count(bytes_in=len(raw))
+        if self.headers.get('Content-Encoding') == 'gzip':
+            raw = gzip.decompress(raw)
+        if not raw:
+            return None
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
+    
+    def _handle(self, method):
+        path = self.path.split('?', 1)[0]
+        body = self._read_body() if method == 'POST' else None
+        
+        if path == '/__stats':
+            return self._send(200, self.server.stats())
+        if path == '/__reset':
+            self.server.reset()
+            return self._send(200, {'reset': True})
+        
+        route = ROUTES.get((self.server.role, method, path))
+        if route is None:
+            return self._send(404, {'error': f'No stub for {method} {path}'})
+        
+        with self.server.counter_lock:
+            self.server.paths[path] = self.server.paths.get(path, 0) + 1
+        self.server.count(requests=1)
+        
+        options = self.server.options
+        time.sleep(options.delay())
+        if options.fails():
+            self.server.count(errors_injected=1)
+            return self._send(options.error_status, {'error': 'injected failure'})
+        
+        status, payload, headers = route(self, body, options)
+        self._send(status, payload, headers)
+    
+    def _send(self, status, payload, headers=None):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+        self.server.count(bytes_out=len(data))
+
+def _filler(options):
+    return 'x' * options.payload_bytes
+
+def _graphql(handler, body, options):
+    query = (body or {}).get('query', '')
+    # Batched deliveries alias each mutation as m0, m1, ...
+    aliases = re.findall(r'\b(m\d+)\s*:\s*processDataInsights', query) or ['processDataInsights']
+    result = {'success': True, 'message': 'processed', 'insights': [], 'filler': _filler(options)}
+    return 200, {'data': {alias: result for alias in aliases}}, None
+
+def _backend_insights(handler, body, options):
+    return 200, {'success': True, 'received': len((body or {}).get('insights', []) if isinstance(body, dict) else body or [])}, None
+
+def _user_context(handler, body, options):
+    user_id = re.search(r'user_id=([^&]*)', handler.path)
+    context = {
+        'user_id': user_id.group(1) if user_id else None,
+        'preferences': {'theme': 'dark', 'language': 'en'},
+        'recent_activity': [],
+        'filler': _filler(options)
+    }
+    cache_control = f'max-age={options.context_max_age}' if options.context_max_age > 0 else 'no-store'
+    return 200, context, {'Cache-Control': cache_control}
+
+def _frontend_insights(handler, body, options):
+    return 200, {'success': True, 'received': len((body or {}).get('insights', []))}, None
+
+def _health(handler, body, options):
+    return 200, {'status': 'healthy'}, None
+
+ROUTES = {
+    ('backend', 'POST', '/graphql'): _graphql,
+    ('backend', 'POST', '/api/insights'): _backend_insights,
+    ('backend', 'GET', '/api/user/context'): _user_context,
+    ('backend', 'GET', '/api/health'): _health,
+    ('frontend', 'POST', '/api/ai-insights'): _frontend_insights,
+    ('frontend', 'GET', '/'): _health
+}
+
+def start_stubs(host='127.0.0.1', backend_port=0, frontend_port=0, options=None):
+    """Start backend and frontend stubs in daemon threads; returns both servers
+    
+    Port 0 picks a free port; the base URLs are ``f"http://{host}:{server.server_port}"``.
+    """
+    options = options or StubOptions()
+    servers = []
+    for role, port in (('backend', backend_port), ('frontend', frontend_port)):
+        server = StubServer((host, port), role, options)
+        threading.Thread(target=server.serve_forever, name=f'stub-{role}', daemon=True).start()
+        servers.append(server)
+    return tuple(servers)
+
+def add_stub_arguments(parser):
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='fixed server latency per request')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='mean of an exponential latency tail')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests that fail')
+    parser.add_argument('--error-status', type=int, default=503, help='status code of injected failures')
+    parser.add_argument('--payload-bytes', type=int, default=256, help='filler size of graphql/context responses')
+    parser.add_argument('--context-max-age', type=int, default=60, help='user context max-age (0: no-store)')
+    parser.add_argument('--seed', type=int, default=None)
+
+def options_from_args(args):
+    return StubOptions(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        error_status=args.error_status, payload_bytes=args.payload_bytes,
+        context_max_age=args.context_max_age, seed=args.seed
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description='Stand-in website backend/frontend for benchmarks')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--backend-port', type=int, default=4000)
+    parser.add_argument('--frontend-port', type=int, default=3000)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+    
+    backend, frontend = start_stubs(args.host, args.backend_port, args.frontend_port, options_from_args(args))
+    print(f"Backend stub:  http://{args.host}:{backend.server_port}")
+    print(f"Frontend stub: http://{args.host}:{frontend.server_port}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        backend.shutdown()
+        frontend.shutdown()
+
+if __name__ == "__main__":
+    main()
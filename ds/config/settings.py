@@ -9,6 +9,18 @@ class Config:
     PORT = 5000
     DEBUG = True
     
+    # Production WSGI server (gunicorn.conf.py); one worker process per core,
+    # threads for requests waiting on I/O
+    WEB_WORKERS = int(os.environ.get('DS_WORKERS', min(os.cpu_count() or 1, 8)))
+    WEB_THREADS = int(os.environ.get('DS_THREADS', 4))
+    WEB_TIMEOUT = 120  # seconds; training requests are slow
+    WEB_GRACEFUL_TIMEOUT = 30
+    WEB_KEEPALIVE = 5
+    WEB_MAX_REQUESTS = 2000  # recycle workers to bound memory growth
+    WEB_MAX_REQUESTS_JITTER = 200  # so workers do not all restart at once
+    PRELOAD_MODELS = True  # load saved models in the master before forking
+    WARM_UP_IMPORTS = True  # import sklearn/scipy/matplotlib there too (utils.startup.warm_up)
+    
     # CORS settings
     CORS_ORIGINS = [
         "http://localhost:3000",  # React frontend
@@ -25,13 +37,80 @@ class Config:
     # Data processing settings
     MAX_ROWS_FOR_PROCESSING = 100000  # Maximum rows to process at once
     CACHE_TIMEOUT = timedelta(hours=1)  # Cache insights for 1 hour
+    INSIGHT_CACHE_SIZE = 100
+    INSIGHT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+    INSIGHT_CACHE_SLOT_SIZE = 256 * 1024  # largest insight result the mmap backend stores
+    ANALYSIS_CACHE_SIZE = 32
+    ANALYSIS_CACHE_SLOT_SIZE = 4 * 1024 * 1024  # analyses carry base64 charts
+    
+    # Cache backend shared by analysis, insight and prediction caches:
+    # 'memory' (per process), 'mmap' (shared memory) or 'sqlite' (on disk),
+    # the latter two shared by all workers on a host
+    CACHE_BACKEND = os.environ.get('DS_CACHE_BACKEND', 'memory')
+    CACHE_DIR = os.environ.get('DS_CACHE_DIR', os.path.join('data', 'cache'))
     
     # Machine Learning settings
     MODEL_SAVE_PATH = 'models'
+    # Seconds between checks whether another worker process saved a newer
+    # version of a served model (0: never reload)
+    MODEL_SYNC_INTERVAL = float(os.environ.get('DS_MODEL_SYNC_INTERVAL', 1.0))
+    # Cores a random forest fits and predicts on; unset: all cores for a single
+    # serving process, one per worker when several share the machine
+    MODEL_N_JOBS = int(os.environ['DS_MODEL_N_JOBS']) if os.environ.get('DS_MODEL_N_JOBS') else None
     MAX_FEATURES_FOR_AUTO_ML = 50  # Maximum features for automatic ML
     DEFAULT_TEST_SIZE = 0.2
     RANDOM_STATE = 42
     
+    # Histogram gradient boosting engine settings
+    HGB_MAX_ITER = 300
+    HGB_LEARNING_RATE = 0.1
+    HGB_MAX_LEAF_NODES = 31
+    HGB_EARLY_STOPPING = True
+    HGB_VALIDATION_FRACTION = 0.1
+    HGB_N_ITER_NO_CHANGE = 10
+    HGB_AUTO_MIN_ROWS = 10000  # 'auto' model type switches to gradient boosting above this size
+    
+    # Serve tree ensembles from flattened NumPy node arrays instead of sklearn's predict
+    ENABLE_TREE_RUNTIME = True
+    TREE_RUNTIME_MAX_ROWS = 256  # larger batches go through sklearn's compiled predict
+    
+    # Forest compaction (float32 node arrays, optional validation-guided pruning)
+    COMPACT_AFTER_TRAINING = False
+    COMPACTION_TOLERANCE = 0.005  # max validation score loss allowed by pruning
+    COMPACTION_PRUNE_TREES = False
+    COMPACTION_PRUNE_DEPTH = False
+    COMPACTION_HOLDOUT = 0.5  # share of validation rows kept out of pruning to report the score change
+    COMPACT_RUNTIME_CHUNK_ROWS = 8192  # rows per traversal when serving without sklearn
+    
+    # Prediction cache (per feature row, keyed by model name and version)
+    PREDICTION_CACHE_SIZE = 10000
+    PREDICTION_CACHE_TTL = timedelta(minutes=10)
+    PREDICTION_CACHE_SLOT_SIZE = 4096
+    
+    # Batch scoring: rows read, scored and written per chunk
+    BATCH_SCORING_CHUNK_SIZE = 50000
+    
+    # Group-by aggregation over stored datasets
+    AGGREGATION_CHUNK_SIZE = 200000
+    AGGREGATION_MAX_GROUPS = 10000  # groups returned per query
+    AGGREGATION_CACHE_SIZE = 256
+    AGGREGATION_CACHE_SLOT_SIZE = 1024 * 1024
+    
+    # Online feature store (per-entity feature vectors, snapshotted to .npz)
+    FEATURE_STORE_DIR = os.path.join('data', 'feature_store')
+    FEATURE_STORE_TTL = timedelta(days=1)
+    
+    # Time-series insights: resampled grid never exceeds this many periods
+    TIME_SERIES_MAX_POINTS = 5000
+    
+    # Categorical profiling sketches (fixed memory per column)
+    PROFILE_TOP_K = 10
+    PROFILE_SKETCH_CAPACITY = 64  # space-saving counters per column
+    PROFILE_CHUNK_ROWS = 65536
+    PROFILE_HLL_PRECISION = 12  # 4096 registers, ~1.6% cardinality error
+    PROFILE_CMS_WIDTH = 2048
+    PROFILE_CMS_DEPTH = 4
+    
     # API settings
     API_RATE_LIMIT = "100 per minute"
     
@@ -42,6 +121,51 @@ class Config:
     WEBSITE_BACKEND_URL = "http://localhost:4000"
     WEBSITE_FRONTEND_URL = "http://localhost:3000"
     
+    # Outbound HTTP client (pooled keep-alive connections per host)
+    HTTP_POOL_CONNECTIONS = 4
+    HTTP_POOL_MAXSIZE = 16
+    HTTP_MAX_RETRIES = 2
+    HTTP_BACKOFF_BASE = 0.2  # seconds, doubled per retry with full jitter
+    HTTP_BACKOFF_MAX = 2.0
+    HTTP_BREAKER_FAILURES = 5  # consecutive failures that open a host's circuit
+    HTTP_BREAKER_RESET = 30.0  # seconds before a trial call is let through
+    ASYNC_HTTP_LIMIT = 100  # connections across all hosts in the async client
+    ASYNC_HTTP_LIMIT_PER_HOST = 20
+    ASYNC_HTTP_KEEPALIVE = 30.0
+    HTTP_TIMEOUTS = {  # (connect, read) seconds per endpoint
+        'default': (2.0, 10.0),
+        'graphql': (2.0, 15.0),
+        'frontend_insights': (1.0, 5.0),
+        'user_context': (1.0, 3.0),
+        'health': (1.0, 2.0)
+    }
+    
+    # User context cache (per user; stale entries are served while refreshing)
+    USER_CONTEXT_CACHE_SIZE = 10000
+    USER_CONTEXT_TTL = timedelta(seconds=60)  # upper bound for the backend's max-age
+    USER_CONTEXT_STALE_TTL = timedelta(minutes=5)
+    
+    # Outbound insight delivery queue (batched pushes, disk spool for failures)
+    DELIVERY_BATCH_SIZE = 50
+    DELIVERY_FLUSH_INTERVAL = 1.0  # seconds a batch may wait to fill up
+    DELIVERY_QUEUE_SIZE = 1000
+    DELIVERY_PUT_TIMEOUT = 0.1  # seconds a producer waits on a full queue
+    DELIVERY_RETRY_INTERVAL = 30.0
+    DELIVERY_SPOOL_DIR = os.path.join('data', 'outbox')
+    DELIVERY_SPOOL_MAX_BATCHES = 1000
+    
+    # Outbound payload shaping: inline images above this size are stored under
+    # ARTIFACT_DIR and sent as references served from DS_PUBLIC_URL
+    DS_PUBLIC_URL = os.environ.get('DS_PUBLIC_URL', 'http://localhost:5000')
+    ARTIFACT_DIR = os.path.join('data', 'artifacts')
+    ARTIFACT_MAX_AGE = timedelta(days=7)
+    INLINE_IMAGE_MAX_CHARS = 2048
+    # Request body compression per receiver: none, gzip or zstd. Opt in only
+    # for receivers that decode Content-Encoding on request bodies
+    BACKEND_COMPRESSION = os.environ.get('DS_BACKEND_COMPRESSION', 'none')
+    FRONTEND_COMPRESSION = os.environ.get('DS_FRONTEND_COMPRESSION', 'none')
+    COMPRESSION_MIN_BYTES = 1024
+    
     # Security settings
     SECRET_KEY = os.environ.get('SECRET_KEY', 'your-secret-key-change-in-production')
     
@@ -94,3 +218,10 @@ config = {
     'testing': TestingConfig,
     'default': DevelopmentConfig
 }
+
+def get_config(name=None):
+    """Config class selected by ``name`` or the ``DS_CONFIG`` environment variable"""
+    name = name or os.environ.get('DS_CONFIG', 'default')
+    if name not in config:
+        raise ValueError(f"Unknown DS_CONFIG: {name} (expected one of {', '.join(config)})")
+    return config[name]
@@ -0,0 +1,65 @@
+"""
+Gunicorn settings for the production DS server
+    
+    DS_CONFIG=production gunicorn --config gunicorn.conf.py wsgi:app
+    python start_ds_server.py --production
+
+The app and saved models are loaded once in the master (preload_app) and
+shared copy-on-write by the forked workers. Workers are recycled after
+WEB_MAX_REQUESTS requests (plus jitter). Signals to the master:
+    
+    HUP   graceful restart: new workers start, old ones finish in-flight
+          requests within graceful_timeout (code is not reloaded with preload_app)
+    USR2  start a new master with new code next to the old one; then send
+          WINCH and TERM to the old master for a zero-downtime deploy
+    TERM  graceful shutdown
+
+Caches default to per-worker memory; set DS_CACHE_BACKEND=mmap or sqlite
+to share them across workers.
+
+State-changing endpoints with several workers:
+    
+    /api/train/increment, /api/models/compact
+          serialized across workers by a lock file in models/; each update
+          starts from the latest saved model, and other workers reload a
+          replaced model file within MODEL_SYNC_INTERVAL seconds
+    /api/features/<entity_type> (POST)
+          refused with 409: feature tables live in each worker's memory, so
+          online feature writes need DS_WORKERS=1
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config.settings import get_config
+
+settings = get_config()
+
+bind = os.environ.get('DS_BIND', f"{settings.HOST}:{settings.PORT}")
+workers = settings.WEB_WORKERS
+
+# Read by the app (preloaded after this file) to refuse per-worker-only writes
+os.environ['DS_SERVING_WORKERS'] = str(workers)
+threads = settings.WEB_THREADS
+worker_class = 'gthread'
+preload_app = True
+timeout = settings.WEB_TIMEOUT
+graceful_timeout = settings.WEB_GRACEFUL_TIMEOUT
+keepalive = settings.WEB_KEEPALIVE
+max_requests = settings.WEB_MAX_REQUESTS
+max_requests_jitter = settings.WEB_MAX_REQUESTS_JITTER
+
+# Heartbeat files on tmpfs: a disk-backed /tmp can stall workers under I/O load
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = '-'
+errorlog = '-'
+loglevel = settings.LOG_LEVEL.lower()
+
+# Split the cores between workers instead of every worker's BLAS/OpenMP pool
+# using all of them; must be set before NumPy is imported by the preload
+for variable in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+    os.environ.setdefault(variable, str(max(1, (os.cpu_count() or 1) // workers)))
@@ -0,0 +1,290 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+import warnings
+
+from config.settings import Config
+from utils.cache import content_hash
+from utils.cache_backends import create_cache
+from services.batch_scoring import BatchScorer
+from services.time_series import TimeSeriesAnalyzer, FREQUENCIES
+
+class GroupByAggregator:
+    """Group-by aggregation over stored datasets or inline records
+    
+    Group keys are factorized to dense integer codes and every aggregation is a
+    ``bincount`` (or sorted ``reduceat`` for min/max) over those codes. Files
+    are read ``chunk_size`` rows at a time, only the needed columns, and the
+    per-chunk partial aggregates (count, sum, M2, min, max) are merged with the
+    same reductions, so memory is bounded by the number of groups.
+    
+    Results are cached by dataset version (path, mtime, size) or content hash
+    plus the normalized query.
+    """
+    
+    AGGREGATIONS = {'count', 'sum', 'mean', 'min', 'max', 'std', 'var'}
+    
+    def __init__(self, chunk_size=None):
+        self.chunk_size = chunk_size or Config.AGGREGATION_CHUNK_SIZE
+        self.cache = create_cache(
+            'aggregates',
+            max_entries=Config.AGGREGATION_CACHE_SIZE,
+            ttl=Config.CACHE_TIMEOUT,
+            slot_size=Config.AGGREGATION_CACHE_SLOT_SIZE
+        )
+    
+    def aggregate(self, query):
+        """Run a group-by query
+        
+        ``query`` holds either a stored file ``path`` or inline ``data``, plus
+        ``group_by`` (column names or ``{"column": ..., "freq": "D"}`` to bucket
+        datetimes), ``metrics`` (``{column: [aggregations]}``) and optional
+        ``sort`` (output field, ``-`` prefix for descending) and ``limit``.
+        """
+        try:
+            keys = [self._key_spec(key) for key in _as_list(query.get('group_by'))]
+            metrics = self._metric_spec(query.get('metrics') or {})
+            if not keys:
+                return {"error": "'group_by' needs at least one column"}
+            
+            normalized = {
+                "group_by": keys,
+                "metrics": metrics,
+                "sort": query.get('sort'),
+                "limit": int(query.get('limit') or Config.AGGREGATION_MAX_GROUPS)
+            }
+            
+            if query.get('path'):
+                path = BatchScorer.resolve_stored_path(query['path'])
+                if path is None:
+                    return {"error": f"Stored file '{query['path']}' not found"}
+                stat = os.stat(path)
+                dataset = {"path": query['path'], "version": f"{stat.st_mtime_ns:x}-{stat.st_size:x}"}
+                frames = lambda columns: self._read_chunks(path, query.get('input_format'), columns)
+            elif query.get('data') is not None:
+                df = pd.DataFrame(query['data'])
+                dataset = {"path": None, "version": content_hash(df)}
+                frames = lambda columns: [df[[col for col in columns if col in df.columns]]]
+            else:
+                return {"error": "Provide a stored file 'path' or inline 'data'"}
+            
+            cache_key = json.dumps([dataset['path'], dataset['version'], normalized], sort_keys=True, default=str)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return {**cached, "cached": True}
+            
+            columns = list(dict.fromkeys([key['column'] for key in keys] + list(metrics)))
+            result = self._run(frames(columns), keys, metrics, normalized)
+            result["dataset"] = dataset
+            
+            self.cache.set(cache_key, result)
+            return {**result, "cached": False}
+        
+        except Exception as e:
+            return {"error": f"Aggregation failed: {str(e)}"}
+    
+    def cache_stats(self):
+        return self.cache.stats()
+    
+    @staticmethod
+    def _key_spec(key):
+        if isinstance(key, str):
+            return {"column": key, "freq": None}
+        freq = key.get('freq')
+        if freq is not None and freq not in FREQUENCIES:
+            raise ValueError(f"Unsupported frequency: {freq} (expected one of {', '.join(FREQUENCIES)})")
+        return {"column": key['column'], "freq": freq}
+    
+    def _metric_spec(self, metrics):
+        spec = {}
+        for column, aggregations in metrics.items():
+            aggregations = _as_list(aggregations)
+            unknown = set(aggregations) - self.AGGREGATIONS
+            if unknown:
+                raise ValueError(f"Unsupported aggregation(s): {', '.join(sorted(unknown))}")
+            spec[column] = sorted(set(aggregations), key=aggregations.index)
+        return spec
+    
+    def _read_chunks(self, path, input_format, columns):
+        input_format = input_format or BatchScorer.detect_format(path)
+        if input_format == 'csv':
+            yield from pd.read_csv(path, usecols=columns, chunksize=self.chunk_size)
+        elif input_format == 'parquet':
+            import pyarrow.parquet as pq
+            
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=self.chunk_size, columns=columns):
+                yield batch.to_pandas()
+        elif input_format in ('ndjson', 'jsonl'):
+            for chunk in pd.read_json(path, lines=True, chunksize=self.chunk_size):
+                yield chunk[[col for col in columns if col in chunk.columns]]
+        else:
+            raise ValueError(f"Unsupported input format: {input_format}")
+    
+    def _run(self, frames, keys, metrics, query):
+        needs_spread = any(agg in ('std', 'var') for aggs in metrics.values() for agg in aggs)
+        needs_extremes = {agg for aggs in metrics.values() for agg in aggs} & {'min', 'max'}
+        
+        combined = None
+        rows_scanned = 0
+        for frame in frames:
+            missing = [key['column'] for key in keys if key['column'] not in frame.columns]
+            missing += [column for column in metrics if column not in frame.columns]
+            if missing:
+                raise ValueError(f"Unknown column(s): {', '.join(dict.fromkeys(missing))}")
+            
+            rows_scanned += len(frame)
+            key_values = [self._key_values(frame[key['column']], key['freq']) for key in keys]
+            values = {column: pd.to_numeric(frame[column], errors='coerce').to_numpy(dtype=float) for column in metrics}
+            partial = self._chunk_partials(key_values, values, needs_spread, needs_extremes)
+            # Merged as each chunk arrives, so only one row per group is held
+            combined = partial if combined is None else self._combine([combined, partial], len(keys), needs_spread, needs_extremes)
+        
+        if combined is None:
+            raise ValueError("Dataset has no rows")
+        
+        key_columns, stats = combined
+        
+        output = pd.DataFrame({key['column']: labels for key, labels in zip(keys, key_columns)})
+        output['rows'] = stats['rows'].astype(np.int64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for column, aggregations in metrics.items():
+                count, total = stats[column, 'count'], stats[column, 'sum']
+                for agg in aggregations:
+                    if agg == 'count':
+                        value = count.astype(np.int64)
+                    elif agg == 'sum':
+                        value = total
+                    elif agg == 'mean':
+                        value = total / count
+                    elif agg in ('min', 'max'):
+                        value = stats[column, agg]
+                    else:
+                        value = np.where(count > 1, stats[column, 'm2'] / (count - 1), np.nan)
+                        value = np.sqrt(value) if agg == 'std' else value
+                    output[f"{column}_{agg}"] = value
+        
+        sort = query.get('sort')
+        if sort:
+            field = sort.lstrip('-')
+            if field not in output.columns:
+                raise ValueError(f"Unknown sort field: {field}")
+            output = output.sort_values(field, ascending=not sort.startswith('-'), kind='stable')
+        else:
+            output = output.sort_values([key['column'] for key in keys], kind='stable')
+        
+        output = output.astype(object).where(output.notna(), None)
+        return {
+            "group_by": query['group_by'],
+            "metrics": query['metrics'],
+            "group_count": len(output),
+            "rows_scanned": rows_scanned,
+            "truncated": len(output) > query['limit'],
+            "groups": output.head(query['limit']).to_dict(orient='records')
+        }
+    
+    @staticmethod
+    def _key_values(series, freq):
+        """Group labels of one key column (datetime keys bucketed to ``freq`` periods)"""
+        if freq is None:
+            return series.to_numpy()
+        
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')  # pandas warns when it has to guess the format
+            timestamps = pd.to_datetime(series, errors='coerce', format='mixed')
+        if getattr(timestamps.dt, 'tz', None) is not None:
+            timestamps = timestamps.dt.tz_convert('UTC').dt.tz_localize(None)
+        
+        present = timestamps.notna().to_numpy()
+        labels = np.full(len(series), None, dtype=object)
+        ts = timestamps.to_numpy()[present].astype('datetime64[ns]')
+        codes = TimeSeriesAnalyzer.period_codes(ts, freq)
+        labels[present] = TimeSeriesAnalyzer.period_starts(codes, freq).astype(str)
+        return labels
+    
+    @staticmethod
+    def _group_codes(key_values):
+        """Dense group id per row (-1 where any key is missing) and the key labels per group"""
+        codes, uniques = zip(*(pd.factorize(values) for values in key_values))
+        codes = np.vstack(codes)
+        valid = (codes >= 0).all(axis=0)
+        dims = [max(len(u), 1) for u in uniques]
+        
+        if np.prod(np.array(dims, dtype=float)) < 2 ** 62:
+            combined = np.ravel_multi_index(codes[:, valid], dims)
+            group_of_valid, combined_uniques = pd.factorize(combined)
+            key_codes = np.unravel_index(combined_uniques, dims)
+        else:
+            # Too many key combinations for one int64: factorize the code tuples
+            tuples = pd.MultiIndex.from_arrays(codes[:, valid])
+            group_of_valid, combined_uniques = pd.factorize(tuples)
+            key_codes = [combined_uniques.get_level_values(i).to_numpy() for i in range(len(dims))]
+        
+        group = np.full(codes.shape[1], -1, dtype=np.intp)
+        group[valid] = group_of_valid
+        labels = [np.asarray(u, dtype=object)[c] for u, c in zip(uniques, key_codes)]
+        return group, len(combined_uniques), labels
+    
+    def _chunk_partials(self, key_values, values, needs_spread, needs_extremes):
+        group, n_groups, labels = self._group_codes(key_values)
+        valid = group >= 0
+        group = group[valid]
+        
+        stats = {'rows': np.bincount(group, minlength=n_groups)}
+        order = np.argsort(group, kind='stable') if needs_extremes else None
+        starts = np.flatnonzero(np.r_[True, np.diff(group[order]) != 0]) if needs_extremes else None
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for column, column_values in values.items():
+                v = column_values[valid]
+                present = ~np.isnan(v)
+                count = np.bincount(group, weights=present, minlength=n_groups)
+                total = np.bincount(group, weights=np.where(present, v, 0.0), minlength=n_groups)
+                stats[column, 'count'] = count
+                stats[column, 'sum'] = total
+                
+                if needs_spread:
+                    deviation = np.where(present, v - (total / count)[group], 0.0)
+                    stats[column, 'm2'] = np.bincount(group, weights=deviation * deviation, minlength=n_groups)
+                if needs_extremes and len(group):
+                    stats[column, 'min'] = np.fmin.reduceat(v[order], starts)
+                    stats[column, 'max'] = np.fmax.reduceat(v[order], starts)
+                elif needs_extremes:
+                    stats[column, 'min'] = stats[column, 'max'] = np.empty(0)
+        
+        return labels, stats
+    
+    def _combine(self, partials, n_keys, needs_spread, needs_extremes):
+        """Merge per-chunk partial aggregates with the same factorized reductions"""
+        key_values = [np.concatenate([labels[i] for labels, _ in partials]) for i in range(n_keys)]
+        group, n_groups, labels = self._group_codes(key_values)
+        
+        merged = {}
+        for name in partials[0][1]:
+            column = np.concatenate([stats[name] for _, stats in partials])
+            kind = name if name == 'rows' else name[1]
+            if kind in ('min', 'max'):
+                order = np.argsort(group, kind='stable')
+                starts = np.flatnonzero(np.r_[True, np.diff(group[order]) != 0])
+                merged[name] = (np.fmin if kind == 'min' else np.fmax).reduceat(column[order], starts)
+            elif kind != 'm2':
+                merged[name] = np.bincount(group, weights=column, minlength=n_groups)
+        
+        if needs_spread:
+            # Chan et al. parallel variance: M2 = sum(M2_i) + sum(n_i * (mean_i - mean)^2)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                for name in [name for name in partials[0][1] if name != 'rows' and name[1] == 'm2']:
+                    column = name[0]
+                    count = np.concatenate([stats[column, 'count'] for _, stats in partials])
+                    chunk_mean = np.concatenate([stats[column, 'sum'] for _, stats in partials]) / count
+                    mean = merged[column, 'sum'] / merged[column, 'count']
+                    spread = np.where(count > 0, count * (chunk_mean - mean[group]) ** 2, 0.0)
+                    m2 = np.concatenate([stats[name] for _, stats in partials])
+                    merged[name] = np.bincount(group, weights=m2 + spread, minlength=n_groups)
+        
+        return labels, merged
+
+def _as_list(value):
+    if value is None:
+        return []
+    return [value] if isinstance(value, (str, dict)) else list(value)
@@ -6,62 +6,146 @@ from datetime import datetime
 import os
 from typing import Dict, List, Any
 
+from config.settings import Config
+from utils.cache import SingleFlight, content_hash
+from utils.cache_backends import create_cache
+from services.insight_rules import InsightRuleEngine, rank_by_severity
+from services.time_series import TimeSeriesAnalyzer
+
 class AIProcessor:
     """AI Integration Service for connecting with website AI features"""
     
     def __init__(self):
         self.backend_url = "http://localhost:4000"  # Your existing backend
         self.frontend_url = "http://localhost:3000"  # Your existing frontend
-        self.insights_cache = {}
-        
+        self.insights_cache = create_cache(
+            'insights',
+            max_entries=Config.INSIGHT_CACHE_SIZE,
+            ttl=Config.CACHE_TIMEOUT,
+            max_bytes=Config.INSIGHT_CACHE_MAX_BYTES,
+            sizeof=self._payload_size,
+            slot_size=Config.INSIGHT_CACHE_SLOT_SIZE
+        )
+        self._inflight = SingleFlight()
+        self.rule_engine = InsightRuleEngine()
+        self.time_series = TimeSeriesAnalyzer()
+    
     def generate_insights(self, data):
-        """Generate AI-powered insights from data"""
+        """Generate AI-powered insights from data
+        
+        Results are cached by a content hash of the data; identical concurrent
+        requests share one computation.
+        """
         try:
-            # Convert data to DataFrame for analysis
-            if isinstance(data, dict):
-                if 'data' in data:
-                    df = pd.DataFrame(data['data'])
-                else:
-                    df = pd.DataFrame([data])
-            elif isinstance(data, list):
-                df = pd.DataFrame(data)
-            else:
-                df = pd.DataFrame(data)
+            df = self._to_dataframe(data)
             
-            insights = []
+            data_hash = self.hash_data(df)
+            cached = self.get_cached_insights(data_hash)
+            if cached is not None:
+                return {**cached, "cached": True}
             
-            # Basic data insights
-            insights.extend(self._generate_basic_insights(df))
+            return self._inflight.do(data_hash, lambda: self._compute_insights(df, data_hash))
             
-            # Statistical insights
-            insights.extend(self._generate_statistical_insights(df))
+        except Exception as e:
+            return {"error": f"Insight generation failed: {str(e)}"}
+    
+    def iter_insights(self, data):
+        """Yield ``(event, payload)`` pairs as soon as each insight pass produces them
+        
+        Events are ``summary`` (data summary, first), ``insight`` (one per
+        insight, cheapest passes first), then ``done`` with the total count, or
+        ``error``. The complete result is cached like ``generate_insights``.
+        """
+        try:
+            df = self._to_dataframe(data)
+            data_summary = self._data_summary(df)
+            yield 'summary', data_summary
             
-            # Business insights
-            insights.extend(self._generate_business_insights(df))
+            data_hash = self.hash_data(df)
+            cached = self.get_cached_insights(data_hash)
+            if cached is not None:
+                for insight in cached['insights']:
+                    yield 'insight', insight
+                yield 'done', {"count": len(cached['insights']), "cached": True}
+                return
             
-            # Trend insights
-            insights.extend(self._generate_trend_insights(df))
+            insights = []
+            for pass_insights in self._insight_passes(df):
+                for insight in pass_insights:
+                    insights.append(insight)
+                    yield 'insight', insight
             
-            return {
-                "insights": insights,
-                "data_summary": {
-                    "rows": len(df),
-                    "columns": len(df.columns),
-                    "numeric_columns": len(df.select_dtypes(include=[np.number]).columns),
-                    "categorical_columns": len(df.select_dtypes(include=['object']).columns)
-                },
+            self.cache_insights(data_hash, {
+                "insights": rank_by_severity(insights),
+                "data_summary": data_summary,
                 "timestamp": datetime.now().isoformat()
-            }
+            })
+            yield 'done', {"count": len(insights), "cached": False}
+        
+        except Exception as e:
+            yield 'error', {"error": f"Insight generation failed: {str(e)}"}
+    
+    def _compute_insights(self, df, data_hash):
+        """Run every insight pass and cache the result"""
+        try:
+            insights = []
+            for pass_insights in self._insight_passes(df):
+                insights.extend(pass_insights)
             
+            result = {
+                "insights": rank_by_severity(insights),
+                "data_summary": self._data_summary(df),
+                "timestamp": datetime.now().isoformat()
+            }
+            self.cache_insights(data_hash, result)
+            return result
+        
         except Exception as e:
             return {"error": f"Insight generation failed: {str(e)}"}
     
-    def _generate_basic_insights(self, df):
-        """Generate basic data insights"""
+    def _insight_passes(self, df):
+        """Insight passes in increasing cost order, one list of insights per pass"""
+        # Missing data: one vectorized null count over the frame
+        yield self._generate_missing_data_insights(df)
+        
+        # Per-column statistics shared by every rule-based pass
+        stats = self.rule_engine.column_stats(df)
+        
+        # Statistical insights
+        yield self._generate_statistical_insights(df, stats)
+        
+        # Business insights
+        yield self._generate_business_insights(df, stats)
+        
+        # Duplicate rows: hashes every full row
+        yield self._generate_duplicate_insights(df)
+        
+        # Trend insights (correlation matrix last)
+        yield self._generate_trend_insights(df, stats)
+    
+    @staticmethod
+    def _to_dataframe(data):
+        """Convert request data to a DataFrame for analysis"""
+        if isinstance(data, dict):
+            if 'data' in data:
+                return pd.DataFrame(data['data'])
+            return pd.DataFrame([data])
+        return pd.DataFrame(data)
+    
+    @staticmethod
+    def _data_summary(df):
+        return {
+            "rows": len(df),
+            "columns": len(df.columns),
+            "numeric_columns": len(df.select_dtypes(include=[np.number]).columns),
+            "categorical_columns": len(df.select_dtypes(include=['object']).columns)
+        }
+    
+    def _generate_missing_data_insights(self, df):
+        """Data quality insights on missing values"""
         insights = []
         
         try:
-            # Data quality insights
             total_cells = len(df) * len(df.columns)
             missing_cells = df.isnull().sum().sum()
             
@@ -84,7 +168,16 @@ class AIProcessor:
                         "recommendation": "Review missing data patterns"
                     })
             
-            # Duplicate data insights
+            return insights
+        
+        except Exception as e:
+            return [{"type": "error", "message": f"Basic insights generation failed: {str(e)}"}]
+    
+    def _generate_duplicate_insights(self, df):
+        """Data quality insights on duplicate rows"""
+        insights = []
+        
+        try:
             duplicates = df.duplicated().sum()
             if duplicates > 0:
                 duplicate_percentage = (duplicates / len(df)) * 100
@@ -99,93 +192,21 @@ class AIProcessor:
             return insights
             
         except Exception as e:
-            return [{"type": "error", "message": f"Basic insights generation failed: {str(e)}"}]
+            return [{"type": "error", "message": f"Duplicate insights generation failed: {str(e)}"}]
     
-    def _generate_statistical_insights(self, df):
-        """Generate statistical insights"""
-        insights = []
-        
+    def _generate_statistical_insights(self, df, stats=None):
+        """Generate statistical insights (outliers, skewness) for every numeric column"""
         try:
-            numeric_cols = df.select_dtypes(include=[np.number]).columns
-            
-            for col in numeric_cols[:5]:  # Limit to first 5 numeric columns
-                col_data = df[col].dropna()
-                
-                if len(col_data) == 0:
-                    continue
-                
-                # Outlier detection
-                Q1 = col_data.quantile(0.25)
-                Q3 = col_data.quantile(0.75)
-                IQR = Q3 - Q1
-                lower_bound = Q1 - 1.5 * IQR
-                upper_bound = Q3 + 1.5 * IQR
-                outliers = col_data[(col_data < lower_bound) | (col_data > upper_bound)]
-                
-                if len(outliers) > 0:
-                    outlier_percentage = (len(outliers) / len(col_data)) * 100
-                    if outlier_percentage > 10:
-                        insights.append({
-                            "type": "warning",
-                            "category": "statistical",
-                            "message": f"📊 Column '{col}' has many outliers ({outlier_percentage:.1f}%)",
-                            "severity": "medium",
-                            "recommendation": "Investigate unusual values in this column"
-                        })
-                
-                # Distribution insights
-                skewness = col_data.skew()
-                if abs(skewness) > 2:
-                    skew_type = "right-skewed" if skewness > 0 else "left-skewed"
-                    insights.append({
-                        "type": "info",
-                        "category": "statistical",
-                        "message": f"📈 Column '{col}' is highly {skew_type} (skewness: {skewness:.2f})",
-                        "severity": "low",
-                        "recommendation": "Consider data transformation for modeling"
-                    })
-            
-            return insights
+            return self.rule_engine.evaluate(df, categories=['statistical'], stats=stats)
             
         except Exception as e:
             return [{"type": "error", "message": f"Statistical insights generation failed: {str(e)}"}]
     
-    def _generate_business_insights(self, df):
+    def _generate_business_insights(self, df, stats=None):
         """Generate business-relevant insights"""
-        insights = []
-        
         try:
-            numeric_cols = df.select_dtypes(include=[np.number]).columns
-            
-            # Look for potential KPIs or important metrics
-            for col in numeric_cols:
-                col_lower = col.lower()
-                
-                # Revenue/Sales patterns
-                if any(keyword in col_lower for keyword in ['revenue', 'sales', 'amount', 'price', 'cost']):
-                    mean_val = df[col].mean()
-                    median_val = df[col].median()
-                    
-                    if mean_val > median_val * 1.5:  # Mean significantly higher than median
-                        insights.append({
-                            "type": "insight",
-                            "category": "business",
-                            "message": f"💰 '{col}' shows high variability - few high values are skewing the average",
-                            "severity": "medium",
-                            "recommendation": "Investigate high-value transactions or outliers"
-                        })
-                
-                # User/Customer metrics
-                if any(keyword in col_lower for keyword in ['user', 'customer', 'client', 'account']):
-                    unique_vals = df[col].nunique()
-                    if unique_vals == len(df):
-                        insights.append({
-                            "type": "info",
-                            "category": "business",
-                            "message": f"👥 '{col}' appears to be unique identifiers",
-                            "severity": "low",
-                            "recommendation": "Good for customer-level analysis"
-                        })
+            # Monetary and identifier columns
+            insights = self.rule_engine.evaluate(df, categories=['business'], stats=stats)
             
             # Time-based insights
             date_cols = df.select_dtypes(include=['datetime64']).columns
@@ -204,58 +225,36 @@ class AIProcessor:
         except Exception as e:
             return [{"type": "error", "message": f"Business insights generation failed: {str(e)}"}]
     
-    def _generate_trend_insights(self, df):
+    def _generate_trend_insights(self, df, stats=None):
         """Generate trend and pattern insights"""
-        insights = []
-        
         try:
-            numeric_cols = df.select_dtypes(include=[np.number]).columns
-            
-            # Look for trends in sequential data
-            if len(df) > 10:  # Need sufficient data for trend analysis
-                for col in numeric_cols[:3]:  # Limit to first 3 columns
-                    col_data = df[col].dropna()
-                    
-                    if len(col_data) > 5:
-                        # Simple trend detection using correlation with index
-                        trend_corr = col_data.corr(pd.Series(range(len(col_data))))
-                        
-                        if abs(trend_corr) > 0.7:
-                            trend_direction = "increasing" if trend_corr > 0 else "decreasing"
-                            insights.append({
-                                "type": "insight",
-                                "category": "trend",
-                                "message": f"📈 Strong {trend_direction} trend detected in '{col}' (correlation: {trend_corr:.3f})",
-                                "severity": "medium",
-                                "recommendation": f"Monitor this {trend_direction} pattern for business implications"
-                            })
-            
-            # Correlation insights
-            if len(numeric_cols) >= 2:
-                corr_matrix = df[numeric_cols].corr()
-                
-                # Find strong correlations
-                for i in range(len(corr_matrix.columns)):
-                    for j in range(i + 1, len(corr_matrix.columns)):
-                        corr_val = corr_matrix.iloc[i, j]
-                        
-                        if abs(corr_val) > 0.8 and not np.isnan(corr_val):
-                            col1, col2 = corr_matrix.columns[i], corr_matrix.columns[j]
-                            relationship = "positive" if corr_val > 0 else "negative"
-                            
-                            insights.append({
-                                "type": "insight",
-                                "category": "relationship",
-                                "message": f"🔗 Strong {relationship} correlation ({corr_val:.3f}) between '{col1}' and '{col2}'",
-                                "severity": "high",
-                                "recommendation": "Investigate this relationship for business insights or model features"
-                            })
-            
+            # Trends over real timestamps when the data has a datetime column,
+            # otherwise over row order; then strongly correlated column pairs
+            analysis = self.time_series.analyze(df)
+            if analysis:
+                insights = self.time_series.insights(analysis)
+            else:
+                insights = self.rule_engine.evaluate(df, categories=['trend'], stats=stats)
+            insights.extend(self.rule_engine.correlation_insights(df))
             return insights
             
         except Exception as e:
             return [{"type": "error", "message": f"Trend insights generation failed: {str(e)}"}]
     
+    def analyze_time_series(self, data, time_column=None, freq=None, agg='mean', window=None):
+        """Resampled trend, rolling, seasonality and change-point metrics per numeric column"""
+        try:
+            df = self._to_dataframe(data)
+            analysis = self.time_series.analyze(df, time_column=time_column, freq=freq, agg=agg, window=window)
+            if analysis is None:
+                return {"error": "Data needs a datetime column and at least one numeric column"}
+            
+            analysis['insights'] = self.time_series.insights(analysis)
+            return analysis
+        
+        except Exception as e:
+            return {"error": f"Time-series analysis failed: {str(e)}"}
+    
     def integrate_with_website_ai(self, data, ai_type="general"):
         """Integrate with existing website AI functionality"""
         try:
@@ -316,16 +315,27 @@ class AIProcessor:
         except Exception as e:
             return [{"category": "error", "action": f"Recommendation generation failed: {str(e)}"}]
     
+    @staticmethod
+    def hash_data(df):
+        """Content hash of a DataFrame (values, column names and dtypes)"""
+        return content_hash(df)
+    
+    @staticmethod
+    def _payload_size(insights):
+        """Approximate size of a cached result as serialized JSON"""
+        return len(json.dumps(insights, default=str))
+    
     def get_cached_insights(self, data_hash):
         """Get cached insights for faster response"""
-        return self.insights_cache.get(data_hash, None)
+        return self.insights_cache.get(data_hash)
     
     def cache_insights(self, data_hash, insights):
-        """Cache insights for future use"""
-        self.insights_cache[data_hash] = insights
-        
-        # Limit cache size
-        if len(self.insights_cache) > 100:
-            # Remove oldest entries
-            oldest_key = next(iter(self.insights_cache))
-            del self.insights_cache[oldest_key]
+        """Cache insights for future use (LRU with TTL and byte budget)"""
+        self.insights_cache.set(data_hash, insights)
+    
+    def cache_stats(self):
+        """Insight cache hit/miss, size and request de-duplication metrics"""
+        return {
+            **self.insights_cache.stats(),
+            'single_flight': self._inflight.stats()
+        }
@@ -0,0 +1,237 @@
+import pandas as pd
+import numpy as np
+import io
+import itertools
+import os
+
+from config.settings import Config
+from utils import json_utils
+
+class _ChunkSink:
+    """Write-only file object that hands back whatever was written since the last drain"""
+    
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+    
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self):
+        return self._position
+    
+    def flush(self):
+        pass
+    
+    def close(self):
+        self.closed = True
+    
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+class BatchScorer:
+    """Chunked batch scoring of CSV / NDJSON / Parquet files with an MLPredictor
+    
+    Input is read ``chunk_size`` rows at a time, each chunk is scored with one
+    vectorized call and serialized immediately, so memory stays bounded by the
+    chunk size regardless of file length.
+    
+    Formats and passthrough columns are validated against the first chunk
+    before any output is produced; an error later on ends the output with an
+    explicit error record (a ``# error:`` line in CSV, an ``{"error": ...}``
+    line in NDJSON, ``error`` footer metadata in Parquet).
+    """
+    
+    INPUT_FORMATS = {'csv', 'ndjson', 'jsonl', 'parquet'}
+    
+    OUTPUT_FORMATS = {
+        'csv': 'text/csv',
+        'ndjson': 'application/x-ndjson',
+        'parquet': 'application/vnd.apache.parquet'
+    }
+    
+    def __init__(self, ml_predictor, chunk_size=None):
+        self.ml_predictor = ml_predictor
+        self.chunk_size = chunk_size or Config.BATCH_SCORING_CHUNK_SIZE
+    
+    @staticmethod
+    def detect_format(filename):
+        """Input format from a file name extension"""
+        extension = os.path.splitext(filename or '')[1].lstrip('.').lower()
+        return 'ndjson' if extension in ('jsonl', 'json') else extension
+    
+    @staticmethod
+    def detach_upload(file):
+        """Own handle on an uploaded file that outlives the request's file cleanup"""
+        stream = file.stream
+        try:
+            fd = os.dup(stream.fileno())
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            # Small uploads are buffered in memory
+            stream.seek(0)
+            return io.BytesIO(stream.read())
+        
+        handle = os.fdopen(fd, 'rb')
+        handle.seek(0)
+        return handle
+    
+    @staticmethod
+    def resolve_stored_path(path):
+        """Absolute path of a stored file, restricted to the data and upload folders"""
+        for base in ('data', Config.UPLOAD_FOLDER):
+            base_dir = os.path.realpath(base)
+            candidate = os.path.realpath(os.path.join(base_dir, path))
+            if candidate.startswith(base_dir + os.sep) and os.path.isfile(candidate):
+                return candidate
+        return None
+    
+    def iter_chunks(self, source, input_format, chunk_size=None):
+        """Yield DataFrame chunks from a path or binary file object"""
+        chunk_size = chunk_size or self.chunk_size
+        
+        if input_format == 'csv':
+            yield from pd.read_csv(source, chunksize=chunk_size)
+        elif input_format in ('ndjson', 'jsonl'):
+            yield from pd.read_json(source, lines=True, chunksize=chunk_size)
+        elif input_format == 'parquet':
+            import pyarrow.parquet as pq
+            
+            for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_size):
+                yield batch.to_pandas()
+        else:
+            raise ValueError(f"Unsupported input format: {input_format}")
+    
+    @staticmethod
+    def validate_chunk(chunk, passthrough=None):
+        """Raise ValueError for passthrough columns the input does not have"""
+        missing = [col for col in passthrough or [] if col not in chunk.columns]
+        if missing:
+            raise ValueError(f"Unknown passthrough column(s): {', '.join(missing)}")
+    
+    def score_chunk(self, state, chunk, passthrough=None, class_labels=None):
+        """Score one chunk and return the output frame
+        
+        Class codes are decoded to the original labels, so ``prediction``
+        agrees with the ``probability_<label>`` column names.
+        """
+        self.validate_chunk(chunk, passthrough)
+        predictions, probabilities = self.ml_predictor.predict_frame(state, chunk)
+        
+        output = chunk[passthrough].reset_index(drop=True) if passthrough else pd.DataFrame(index=range(len(chunk)))
+        output['prediction'] = np.asarray(class_labels, dtype=object)[np.asarray(predictions, dtype=int)] if class_labels else predictions
+        
+        if probabilities is not None:
+            labels = class_labels or [str(i) for i in range(probabilities.shape[1])]
+            for i, label in enumerate(labels):
+                output[f'probability_{label}'] = probabilities[:, i]
+        
+        return output
+    
+    def score(self, source, input_format, state, output_format='csv', passthrough=None, chunk_size=None):
+        """Validate the request and return a generator of encoded output bytes, one piece per chunk
+        
+        Raises ValueError for unsupported formats and unknown passthrough
+        columns before anything is streamed, so callers can still answer 400.
+        """
+        if input_format not in self.INPUT_FORMATS:
+            raise ValueError(f"Unsupported input format: {input_format}")
+        if output_format not in self.OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format: {output_format}")
+        
+        chunks = self.iter_chunks(source, input_format, chunk_size)
+        first_chunk = next(chunks, None)
+        if first_chunk is None:
+            raise ValueError("Input file has no rows")
+        self.validate_chunk(first_chunk, passthrough)
+        
+        class_labels = self.ml_predictor.class_labels(state)
+        frames = (
+            self.score_chunk(state, chunk, passthrough=passthrough, class_labels=class_labels)
+            for chunk in itertools.chain([first_chunk], chunks)
+        )
+        
+        if output_format == 'parquet':
+            return self._encode_parquet(frames)
+        return self._encode_text(frames, output_format)
+    
+    @staticmethod
+    def _encode_text(frames, output_format):
+        """Stream frames as CSV or NDJSON, ending with an error record if scoring fails"""
+        first = True
+        try:
+            for frame in frames:
+                if output_format == 'csv':
+                    yield frame.to_csv(index=False, header=first).encode('utf-8')
+                else:
+                    text = frame.to_json(orient='records', lines=True)
+                    yield (text if text.endswith('\n') else text + '\n').encode('utf-8')
+                first = False
+        except Exception as e:
+            message = f"Batch scoring failed: {str(e)}"
+            if output_format == 'csv':
+                yield f"# error: {' '.join(message.split())}\n".encode('utf-8')
+            else:
+                yield json_utils.dumps({"error": message}) + b'\n'
+    
+    @staticmethod
+    def _encode_parquet(frames):
+        """Stream frames as row groups of a single Parquet file
+        
+        The schema is pinned from the first chunk (columns that are all null
+        there become strings) and every later chunk is converted to it, so
+        dtype inference differing between chunks cannot break the file. If
+        scoring fails, the file is closed with the message in the ``error``
+        footer metadata.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        sink = _ChunkSink()
+        writer = None
+        
+        try:
+            for frame in frames:
+                if writer is None:
+                    writer = pq.ParquetWriter(sink, _pinned_schema(frame))
+                writer.write_table(_to_table(frame, writer.schema))
+                
+                data = sink.drain()
+                if data:
+                    yield data
+        except Exception as e:
+            message = f"Batch scoring failed: {str(e)}"
+            if writer is None:
+                writer = pq.ParquetWriter(sink, pa.schema([('error', pa.string())]))
+                writer.write_table(pa.table({'error': [message]}))
+            writer.add_key_value_metadata({'error': message})
+        
+        if writer is not None:
+            writer.close()
+            yield sink.drain()
+
+def _pinned_schema(frame):
+    """Arrow schema of an output frame, with all-null columns typed as strings"""
+    import pyarrow as pa
+    
+    schema = pa.Schema.from_pandas(frame, preserve_index=False).remove_metadata()
+    for i, field in enumerate(schema):
+        if frame[field.name].isna().all():
+            schema = schema.set(i, pa.field(field.name, pa.string()))
+    return schema
+
+def _to_table(frame, schema):
+    """Arrow table of an output frame converted to the pinned schema"""
+    import pyarrow as pa
+    
+    frame = frame.copy()
+    for field in schema:
+        if pa.types.is_string(field.type):
+            values = frame[field.name].astype(object)
+            frame[field.name] = values.where(values.isna(), values.astype(str)).where(values.notna(), None)
+    return pa.Table.from_pandas(frame, schema=schema, preserve_index=False)
@@ -0,0 +1,116 @@
+import pandas as pd
+import numpy as np
+
+from config.settings import Config
+from utils.sketches import SpaceSavingSketch, CountMinSketch, HyperLogLog
+
+class CategoricalProfiler:
+    """Fixed-memory profiles of categorical and text columns
+    
+    Each column is read once in chunks of ``chunk_rows``. A chunk is
+    factorized (one hash pass), its distinct values are hashed, and the
+    space-saving, count-min and HyperLogLog sketches plus a log2 string
+    length histogram are updated from the distinct values and their counts.
+    Memory per column is bounded by the sketch sizes, not by cardinality.
+    """
+    
+    def __init__(self, top_k=None, capacity=None, chunk_rows=None, hll_precision=None,
+                 cms_width=None, cms_depth=None):
+        self.top_k = top_k or Config.PROFILE_TOP_K
+        self.capacity = max(capacity or Config.PROFILE_SKETCH_CAPACITY, self.top_k)
+        self.chunk_rows = chunk_rows or Config.PROFILE_CHUNK_ROWS
+        self.hll_precision = hll_precision or Config.PROFILE_HLL_PRECISION
+        self.cms_width = cms_width or Config.PROFILE_CMS_WIDTH
+        self.cms_depth = cms_depth or Config.PROFILE_CMS_DEPTH
+    
+    def profile(self, df):
+        """Profile of every object, string and category column"""
+        columns = df.select_dtypes(include=['object', 'string', 'category']).columns
+        if len(columns) == 0:
+            return {"message": "No categorical columns found"}
+        
+        return {
+            "columns": {str(col): self.profile_column(df[col]) for col in columns},
+            "sketch": {
+                "top_k_capacity": self.capacity,
+                "count_min": [self.cms_depth, self.cms_width],
+                "hll_precision": self.hll_precision
+            }
+        }
+    
+    def profile_column(self, series):
+        top = SpaceSavingSketch(self.capacity)
+        frequencies = CountMinSketch(self.cms_width, self.cms_depth)
+        cardinality = HyperLogLog(self.hll_precision)
+        length_histogram = np.zeros(64, dtype=np.int64)
+        length_sum = 0
+        min_length, max_length = None, None
+        missing = 0
+        
+        for start in range(0, len(series), self.chunk_rows):
+            codes, uniques = pd.factorize(series.iloc[start:start + self.chunk_rows], use_na_sentinel=True)
+            missing += int((codes < 0).sum())
+            if len(uniques) == 0:
+                continue
+            
+            counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+            uniques = np.asarray(uniques, dtype=object)
+            hashes = _hash(uniques)
+            
+            top.update(uniques, counts)
+            frequencies.update(hashes, counts)
+            cardinality.update(hashes)
+            
+            lengths = pd.Series(uniques).astype(str).str.len().to_numpy()
+            buckets = np.frexp(lengths.astype(np.float64))[1]  # 0, 1, 2-3, 4-7, ...
+            length_histogram += np.bincount(buckets, weights=counts, minlength=64)[:64].astype(np.int64)
+            length_sum += int(lengths @ counts)
+            min_length = int(lengths.min()) if min_length is None else min(min_length, int(lengths.min()))
+            max_length = int(lengths.max()) if max_length is None else max(max_length, int(lengths.max()))
+        
+        count = len(series) - missing
+        approx_unique = int(round(cardinality.estimate())) if count else 0
+        return {
+            "count": count,
+            "missing": missing,
+            "approx_unique": min(approx_unique, count),
+            "unique_ratio": min(approx_unique, count) / count if count else None,
+            "top_values": self._top_values(top, frequencies, count),
+            "length": {
+                "min": min_length,
+                "max": max_length,
+                "mean": length_sum / count if count else None,
+                "histogram": {
+                    _bucket_label(bucket): int(n) for bucket, n in enumerate(length_histogram) if n
+                }
+            }
+        }
+    
+    def _top_values(self, top, frequencies, count):
+        candidates = top.top(self.top_k)
+        if not candidates:
+            return []
+        
+        # Both sketches over-estimate, so the smaller estimate is the tighter bound
+        hashes = _hash(np.array([value for value, _, _ in candidates], dtype=object))
+        count_min = frequencies.estimate(hashes)
+        
+        result = []
+        for (value, upper, error), cm_upper in zip(candidates, count_min):
+            estimate = min(upper, int(cm_upper))
+            result.append({
+                "value": value if isinstance(value, (str, int, float, bool)) else str(value),
+                "count": estimate,
+                "max_error": max(0, estimate - (upper - error)),
+                "percent": estimate / count * 100
+            })
+        return result
+
+def _hash(values):
+    # Values are already distinct, so skip hash_array's own factorize pass
+    return pd.util.hash_array(values, categorize=False)
+
+def _bucket_label(bucket):
+    if bucket <= 1:
+        return str(bucket)
+    return f"{1 << (bucket - 1)}-{(1 << bucket) - 1}"
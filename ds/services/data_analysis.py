@@ -1,22 +1,43 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy import stats
-from sklearn.preprocessing import StandardScaler, LabelEncoder
 import io
 import base64
 import json
 
+from config.settings import Config
+from utils.cache import content_hash
+from utils.cache_backends import create_cache
+from utils.startup import load_attribute, pyplot
+from services.categorical_profile import CategoricalProfiler
+
 class DataAnalyzer:
     """Data Analysis Service for comprehensive data insights"""
     
     def __init__(self):
-        self.scaler = StandardScaler()
-        self.encoder = LabelEncoder()
+        self._scaler = None
+        self._encoder = None
+        self.categorical_profiler = CategoricalProfiler()
+        self.analysis_cache = create_cache(
+            'analysis',
+            max_entries=Config.ANALYSIS_CACHE_SIZE,
+            ttl=Config.CACHE_TIMEOUT,
+            slot_size=Config.ANALYSIS_CACHE_SLOT_SIZE
+        )
+    
+    @property
+    def scaler(self):
+        if self._scaler is None:
+            self._scaler = load_attribute('sklearn.preprocessing:StandardScaler')()
+        return self._scaler
+    
+    @property
+    def encoder(self):
+        if self._encoder is None:
+            self._encoder = load_attribute('sklearn.preprocessing:LabelEncoder')()
+        return self._encoder
     
     def analyze(self, data):
-        """Perform comprehensive data analysis"""
+        """Perform comprehensive data analysis (cached by data content)"""
         try:
             if isinstance(data, dict):
                 if 'data' in data:
@@ -28,16 +49,23 @@ class DataAnalyzer:
             else:
                 df = pd.DataFrame(data)
             
+            data_hash = content_hash(df)
+            cached = self.analysis_cache.get(data_hash)
+            if cached is not None:
+                return cached
+            
             analysis_result = {
                 "basic_info": self._get_basic_info(df),
                 "descriptive_stats": self._get_descriptive_stats(df),
                 "missing_values": self._analyze_missing_values(df),
                 "data_types": self._analyze_data_types(df),
+                "categorical_profile": self.categorical_profiler.profile(df),
                 "correlations": self._calculate_correlations(df),
                 "outliers": self._detect_outliers(df),
                 "visualizations": self._generate_visualizations(df)
             }
             
+            self.analysis_cache.set(data_hash, analysis_result)
             return analysis_result
             
         except Exception as e:
@@ -140,6 +168,9 @@ class DataAnalyzer:
         
         try:
             if len(numeric_cols) > 0:
+                plt = pyplot()
+                import seaborn as sns
+                
                 # Histogram
                 plt.figure(figsize=(12, 6))
                 df[numeric_cols].hist(bins=20, figsize=(12, 6))
@@ -179,6 +210,8 @@ class DataAnalyzer:
     
     def generate_insights(self, df):
         """Generate AI-like insights from data analysis"""
+        from scipy import stats
+        
         insights = []
         
         try:
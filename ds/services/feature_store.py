@@ -0,0 +1,343 @@
+import pandas as pd
+import numpy as np
+import os
+import threading
+import time
+import uuid
+
+from config.settings import Config
+
+class FeatureTable:
+    """Precomputed feature vectors for one entity type (e.g. ``user_id``)
+    
+    Features live in one float64 matrix (row per entity, column per feature,
+    NaN for unknown). Categorical values are stored as codes into a per-column
+    vocabulary. Rows carry an absolute expiry time; expired rows read as
+    missing and are reused by later inserts.
+    """
+    
+    def __init__(self, entity_type, ttl=None, capacity=1024):
+        self.entity_type = entity_type
+        self.ttl = ttl.total_seconds() if hasattr(ttl, 'total_seconds') else ttl
+        self.feature_names = []
+        self.feature_index = {}
+        self.vocabularies = {}  # feature -> {value: code}
+        self.categories = {}  # feature -> [value by code]
+        self.values = np.full((capacity, 0), np.nan)
+        self.expires_at = np.full(capacity, np.inf)
+        self.row_ids = [None] * capacity
+        self.rows = {}  # entity id -> row
+        self.free_rows = list(range(capacity - 1, -1, -1))
+        self._lock = threading.RLock()
+    
+    def __len__(self):
+        return len(self.rows)
+    
+    def upsert(self, records, id_field=None, ttl=None):
+        """Insert or update entities; features missing or null in a record keep their values
+        
+        Returns the number of entities written.
+        """
+        df = records if isinstance(records, pd.DataFrame) else pd.DataFrame(records)
+        id_field = id_field or self.entity_type
+        if id_field not in df.columns:
+            raise ValueError(f"Records must contain the entity id field '{id_field}'")
+        
+        df = df.drop_duplicates(subset=[id_field], keep='last')
+        entity_ids = df[id_field].astype(str).tolist()
+        features = df.drop(columns=[id_field])
+        
+        ttl = self.ttl if ttl is None else (ttl.total_seconds() if hasattr(ttl, 'total_seconds') else ttl)
+        expires_at = time.time() + ttl if ttl else np.inf
+        
+        with self._lock:
+            new_features = {name for name in features.columns if name not in self.feature_index}
+            columns = [self._column_for(name) for name in features.columns]
+            rows = np.array([self._row_for(entity_id) for entity_id in entity_ids], dtype=np.int64)
+            
+            for name, column in zip(features.columns, columns):
+                encoded = self._encode(name, features[name], name in new_features)
+                present = ~np.isnan(encoded)
+                self.values[rows[present], column] = encoded[present]
+            self.expires_at[rows] = expires_at
+        
+        return len(entity_ids)
+    
+    def get(self, entity_id, features=None):
+        """Feature dict of one entity, or None when unknown or expired"""
+        with self._lock:
+            row = self._live_row(str(entity_id))
+            if row is None:
+                return None
+            vector = self.values[row]
+            names = self.feature_names if features is None else [name for name in features if name in self.feature_index]
+            return {name: self._decode(name, vector[self.feature_index[name]]) for name in names}
+    
+    def delete(self, entity_id):
+        with self._lock:
+            row = self.rows.pop(str(entity_id), None)
+            if row is None:
+                return False
+            self._release(row)
+            return True
+    
+    def purge_expired(self):
+        """Release every expired row; returns how many were dropped"""
+        with self._lock:
+            expired = np.flatnonzero(self.expires_at[:len(self.row_ids)] <= time.time())
+            removed = 0
+            for row in expired:
+                entity_id = self.row_ids[row]
+                if entity_id is not None:
+                    del self.rows[entity_id]
+                    self._release(row)
+                    removed += 1
+            return removed
+    
+    def _live_row(self, entity_id):
+        row = self.rows.get(entity_id)
+        if row is not None and self.expires_at[row] <= time.time():
+            del self.rows[entity_id]
+            self._release(row)
+            return None
+        return row
+    
+    def _row_for(self, entity_id):
+        row = self.rows.get(entity_id)
+        if row is not None:
+            return row
+        
+        if not self.free_rows:
+            self._grow()
+        row = self.free_rows.pop()
+        self.rows[entity_id] = row
+        self.row_ids[row] = entity_id
+        return row
+    
+    def _release(self, row):
+        self.values[row] = np.nan
+        self.expires_at[row] = np.inf
+        self.row_ids[row] = None
+        self.free_rows.append(row)
+    
+    def _grow(self):
+        """Double the row capacity"""
+        capacity = len(self.row_ids)
+        new_capacity = max(capacity * 2, 1024)
+        
+        values = np.full((new_capacity, self.values.shape[1]), np.nan)
+        values[:capacity] = self.values
+        expires_at = np.full(new_capacity, np.inf)
+        expires_at[:capacity] = self.expires_at
+        
+        self.values = values
+        self.expires_at = expires_at
+        self.row_ids.extend([None] * (new_capacity - capacity))
+        self.free_rows.extend(range(new_capacity - 1, capacity - 1, -1))
+    
+    def _column_for(self, name):
+        column = self.feature_index.get(name)
+        if column is None:
+            column = len(self.feature_names)
+            self.feature_names.append(name)
+            self.feature_index[name] = column
+            self.values = np.hstack([self.values, np.full((self.values.shape[0], 1), np.nan)])
+        return column
+    
+    def _encode(self, name, series, is_new=False):
+        """Float column for the matrix; non-numeric features become vocabulary codes
+        
+        A feature's kind is fixed by its first write: later non-numeric values of
+        a numeric feature are treated as missing.
+        """
+        if name not in self.vocabularies:
+            if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+                return series.astype(float).to_numpy()
+            if not is_new:
+                return pd.to_numeric(series, errors='coerce').astype(float).to_numpy()
+        
+        vocabulary = self.vocabularies.setdefault(name, {})
+        categories = self.categories.setdefault(name, [])
+        present = series.notna()
+        
+        for value in series[present].astype(str).unique():
+            if value not in vocabulary:
+                vocabulary[value] = len(categories)
+                categories.append(value)
+        
+        codes = np.full(len(series), np.nan)
+        codes[present.to_numpy()] = series[present].astype(str).map(vocabulary).to_numpy(dtype=float)
+        return codes
+    
+    def _decode(self, name, value):
+        if np.isnan(value):
+            return None
+        categories = self.categories.get(name)
+        if categories is not None:
+            return categories[int(value)]
+        return float(value)
+    
+    def to_arrays(self):
+        """Live rows and metadata as plain arrays, e.g. for ``np.savez``"""
+        with self._lock:
+            rows = np.fromiter(self.rows.values(), dtype=np.int64, count=len(self.rows))
+            arrays = {
+                'entity_type': np.asarray(self.entity_type),
+                'ids': np.asarray(list(self.rows.keys()), dtype=str),
+                'values': self.values[rows],
+                'expires_at': self.expires_at[rows],
+                'feature_names': np.asarray(self.feature_names, dtype=str),
+                'ttl': np.asarray(np.nan if self.ttl is None else self.ttl)
+            }
+            for name, categories in self.categories.items():
+                arrays[f'categories:{name}'] = np.asarray(categories, dtype=str)
+            return arrays
+    
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Rebuild a table from ``to_arrays`` output, dropping rows that expired meanwhile"""
+        ttl = float(arrays['ttl'])
+        ids = [str(entity_id) for entity_id in arrays['ids']]
+        table = cls(str(arrays['entity_type']), ttl=None if np.isnan(ttl) else ttl, capacity=max(len(ids), 1024))
+        
+        table.feature_names = [str(name) for name in arrays['feature_names']]
+        table.feature_index = {name: i for i, name in enumerate(table.feature_names)}
+        for name in table.feature_names:
+            key = f'categories:{name}'
+            if key in arrays:
+                table.categories[name] = [str(value) for value in arrays[key]]
+                table.vocabularies[name] = {value: code for code, value in enumerate(table.categories[name])}
+        
+        live = np.asarray(arrays['expires_at']) > time.time()
+        values = np.asarray(arrays['values'])[live]
+        table.values = np.full((len(table.row_ids), len(table.feature_names)), np.nan)
+        table.values[:len(values)] = values
+        table.expires_at[:len(values)] = np.asarray(arrays['expires_at'])[live]
+        
+        for row, entity_id in enumerate(np.asarray(ids, dtype=object)[live]):
+            table.rows[entity_id] = row
+            table.row_ids[row] = entity_id
+        table.free_rows = list(range(len(table.row_ids) - 1, len(values) - 1, -1))
+        
+        return table
+
+class FeatureStore:
+    """Online feature store keyed by entity id, one ``FeatureTable`` per entity type
+    
+    Predict requests can send entity ids (``{"user_id": "42"}``) instead of
+    full feature rows; ``assemble`` joins the stored vectors of every entity
+    into one row. Tables are snapshotted to ``.npz`` files and reloaded on start.
+    """
+    
+    def __init__(self, snapshot_dir=None, ttl=None):
+        self.snapshot_dir = snapshot_dir or Config.FEATURE_STORE_DIR
+        self.ttl = Config.FEATURE_STORE_TTL if ttl is None else ttl
+        self.tables = {}
+        self._lock = threading.Lock()
+        self.load_snapshots()
+    
+    def table(self, entity_type, create=True):
+        table = self.tables.get(entity_type)
+        if table is None and create:
+            with self._lock:
+                table = self.tables.setdefault(entity_type, FeatureTable(entity_type, ttl=self.ttl))
+        return table
+    
+    def upsert(self, entity_type, records, id_field=None, ttl=None):
+        """Store feature vectors for entities of ``entity_type``"""
+        try:
+            table = self.table(entity_type)
+            written = table.upsert(records, id_field=id_field, ttl=ttl)
+            return {
+                'success': True,
+                'entity_type': entity_type,
+                'written': written,
+                'entities': len(table),
+                'features': list(table.feature_names)
+            }
+        except Exception as e:
+            return {"error": f"Feature upsert failed: {str(e)}"}
+    
+    def get(self, entity_type, entity_id, features=None):
+        table = self.table(entity_type, create=False)
+        return table.get(entity_id, features) if table is not None else None
+    
+    def assemble(self, entities, overrides=None, features=None):
+        """Join the stored features of several entities into one row
+        
+        ``entities`` maps entity type to id, e.g. ``{"user_id": "42", "product_id": "7"}``.
+        Later entities win on feature name clashes; ``overrides`` win over both.
+        Returns ``(row, missing_entities)``.
+        """
+        row = {}
+        missing = []
+        
+        for entity_type, entity_id in entities.items():
+            vector = self.get(entity_type, entity_id, features)
+            if vector is None:
+                missing.append(f"{entity_type}:{entity_id}")
+                continue
+            row.update({name: value for name, value in vector.items() if value is not None})
+        
+        if overrides:
+            row.update(overrides)
+        return row, missing
+    
+    def assemble_rows(self, entities, overrides=None, features=None):
+        """``assemble`` over a single entity mapping or a list of them"""
+        if isinstance(entities, dict):
+            entities = [entities]
+        if isinstance(overrides, dict) or overrides is None:
+            overrides = [overrides] * len(entities)
+        
+        rows, missing = [], []
+        for entity_map, override in zip(entities, overrides):
+            row, row_missing = self.assemble(entity_map, override, features)
+            rows.append(row)
+            missing.extend(row_missing)
+        return rows, missing
+    
+    def snapshot(self):
+        """Write every table to ``<snapshot_dir>/<entity_type>.npz``"""
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            written = {}
+            
+            for entity_type, table in list(self.tables.items()):
+                table.purge_expired()
+                path = os.path.join(self.snapshot_dir, f"{entity_type}.npz")
+                
+                # Write then rename so a crash never leaves a truncated snapshot
+                tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    np.savez(f, **table.to_arrays())
+                os.replace(tmp_path, path)
+                written[entity_type] = len(table)
+            
+            return {'success': True, 'path': self.snapshot_dir, 'tables': written}
+        except Exception as e:
+            return {"error": f"Feature snapshot failed: {str(e)}"}
+    
+    def load_snapshots(self):
+        """Load every table snapshot found in ``snapshot_dir``"""
+        if not os.path.isdir(self.snapshot_dir):
+            return 0
+        
+        loaded = 0
+        for filename in sorted(os.listdir(self.snapshot_dir)):
+            if not filename.endswith('.npz'):
+                continue
+            try:
+                with np.load(os.path.join(self.snapshot_dir, filename), allow_pickle=False) as arrays:
+                    table = FeatureTable.from_arrays(dict(arrays))
+                self.tables[table.entity_type] = table
+                loaded += 1
+            except Exception as e:
+                print(f"Failed to load feature snapshot {filename}: {e}")
+        return loaded
+    
+    def stats(self):
+        return {
+            entity_type: {'entities': len(table), 'features': len(table.feature_names)}
+            for entity_type, table in self.tables.items()
+        }
@@ -0,0 +1,255 @@
+import pandas as pd
+import numpy as np
+from collections import namedtuple
+import warnings
+
+SEVERITY_RANK = {'high': 0, 'medium': 1, 'low': 2}
+
+MONETARY_KEYWORDS = ['revenue', 'sales', 'amount', 'price', 'cost']
+IDENTIFIER_KEYWORDS = ['user', 'customer', 'client', 'account']
+
+# A rule is a vectorized predicate over the per-column stats table; ``message``
+# and ``recommendation`` are format strings filled from the matching stats row
+# (plus ``column``), ``score`` names the stat used to rank matches of equal severity.
+InsightRule = namedtuple('InsightRule', [
+    'name', 'category', 'type', 'severity', 'predicate', 'message', 'recommendation', 'score'
+])
+
+DEFAULT_RULES = [
+    InsightRule(
+        name='many_outliers',
+        category='statistical',
+        type='warning',
+        severity='medium',
+        predicate=lambda s: s['outlier_pct'] > 10,
+        message="📊 Column '{column}' has many outliers ({outlier_pct:.1f}%)",
+        recommendation="Investigate unusual values in this column",
+        score='outlier_pct'
+    ),
+    InsightRule(
+        name='highly_skewed',
+        category='statistical',
+        type='info',
+        severity='low',
+        predicate=lambda s: s['skewness'].abs() > 2,
+        message="📈 Column '{column}' is highly {skew_direction} (skewness: {skewness:.2f})",
+        recommendation="Consider data transformation for modeling",
+        score='abs_skewness'
+    ),
+    InsightRule(
+        name='skewed_monetary_values',
+        category='business',
+        type='insight',
+        severity='medium',
+        predicate=lambda s: s['is_monetary'] & (s['mean'] > s['median'] * 1.5),
+        message="💰 '{column}' shows high variability - few high values are skewing the average",
+        recommendation="Investigate high-value transactions or outliers",
+        score='mean_to_median'
+    ),
+    InsightRule(
+        name='unique_identifier',
+        category='business',
+        type='info',
+        severity='low',
+        predicate=lambda s: s['is_identifier'] & (s['unique'] == s['rows']),
+        message="👥 '{column}' appears to be unique identifiers",
+        recommendation="Good for customer-level analysis",
+        score='unique'
+    ),
+    InsightRule(
+        name='strong_trend',
+        category='trend',
+        type='insight',
+        severity='medium',
+        predicate=lambda s: (s['rows'] > 10) & (s['count'] > 5) & (s['trend_corr'].abs() > 0.7),
+        message="📈 Strong {trend_direction} trend detected in '{column}' (correlation: {trend_corr:.3f})",
+        recommendation="Monitor this {trend_direction} pattern for business implications",
+        score='abs_trend_corr'
+    )
+]
+
+class InsightRuleEngine:
+    """Evaluates declarative insight rules over every numeric column at once
+    
+    ``column_stats`` computes one row of statistics per numeric column with
+    matrix operations (quantiles, IQR outliers, skewness, trend correlation).
+    Every rule is then a vectorized predicate over that table, so the cost
+    is one scan of the data regardless of the number of columns or rules.
+    """
+    
+    def __init__(self, rules=None, correlation_threshold=0.8):
+        self.rules = list(DEFAULT_RULES if rules is None else rules)
+        self.correlation_threshold = correlation_threshold
+    
+    @staticmethod
+    def column_stats(df):
+        """Per-column statistics table for all numeric columns"""
+        numeric_cols = df.select_dtypes(include=[np.number]).columns
+        X = df[numeric_cols].to_numpy(dtype=float)
+        present = ~np.isnan(X)
+        count = present.sum(axis=0)
+        
+        stats = pd.DataFrame(index=pd.Index(numeric_cols, name='column'))
+        stats['rows'] = len(df)
+        stats['count'] = count
+        if len(numeric_cols) == 0 or len(df) == 0:
+            return stats
+        
+        with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+            # All-NaN columns are expected here and just yield NaN stats
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            
+            # Quartiles and IQR outliers (NaN comparisons are False)
+            q1, median, q3 = _column_quantiles(X, count, [0.25, 0.5, 0.75])
+            iqr = q3 - q1
+            outliers = ((X < q1 - 1.5 * iqr) | (X > q3 + 1.5 * iqr)).sum(axis=0)
+            stats['median'] = median
+            stats['outlier_pct'] = outliers / count * 100
+            
+            # Moments; skewness with the same bias correction as pandas
+            n = count.astype(float)
+            mean = np.nansum(X, axis=0) / n
+            centered = np.where(present, X - mean, 0.0)
+            squared = centered * centered
+            sum_squares = squared.sum(axis=0)
+            m2 = sum_squares / n
+            m3 = (squared * centered).sum(axis=0) / n
+            skewness = np.sqrt(n * (n - 1)) / (n - 2) * m3 / m2 ** 1.5
+            skewness = np.where(m2 <= 1e-14 * np.maximum(mean ** 2, 1.0), 0.0, skewness)
+            stats['mean'] = mean
+            stats['skewness'] = np.where(n >= 3, skewness, np.nan)
+            
+            # Correlation of each column's non-missing values with their position
+            # (positions 0..n-1 have mean (n-1)/2 and sum of squared deviations n(n²-1)/12)
+            position = np.cumsum(present, axis=0, dtype=float) - 1
+            covariance = (centered * position).sum(axis=0)  # centered is 0 where missing
+            position_squares = n * (n * n - 1) / 12
+            stats['trend_corr'] = covariance / np.sqrt(sum_squares * position_squares)
+        
+        stats['abs_skewness'] = stats['skewness'].abs()
+        stats['abs_trend_corr'] = stats['trend_corr'].abs()
+        stats['mean_to_median'] = stats['mean'] / stats['median'].replace(0, np.nan)
+        stats['skew_direction'] = np.where(stats['skewness'] > 0, 'right-skewed', 'left-skewed')
+        stats['trend_direction'] = np.where(stats['trend_corr'] > 0, 'increasing', 'decreasing')
+        
+        lowered = pd.Series(numeric_cols.astype(str).str.lower(), index=stats.index)
+        stats['is_monetary'] = lowered.str.contains('|'.join(MONETARY_KEYWORDS))
+        stats['is_identifier'] = lowered.str.contains('|'.join(IDENTIFIER_KEYWORDS))
+        
+        # Distinct counts are only needed where a rule can use them
+        stats['unique'] = 0
+        identifier_cols = stats.index[stats['is_identifier']]
+        if len(identifier_cols):
+            stats.loc[identifier_cols, 'unique'] = df[identifier_cols].nunique().to_numpy()
+        
+        return stats
+    
+    def evaluate(self, df, categories=None, stats=None):
+        """Insights of all rules (optionally only some categories), ranked by severity"""
+        stats = self.column_stats(df) if stats is None else stats
+        if 'outlier_pct' not in stats.columns:
+            return []
+        
+        matches = []
+        for order, rule in enumerate(self.rules):
+            if categories is not None and rule.category not in categories:
+                continue
+            hits = stats[rule.predicate(stats).fillna(False).astype(bool)]
+            for column, row in hits.iterrows():
+                values = {**row.to_dict(), 'column': column}
+                matches.append((SEVERITY_RANK.get(rule.severity, len(SEVERITY_RANK)), -_finite(row[rule.score]), order, {
+                    "type": rule.type,
+                    "category": rule.category,
+                    "message": rule.message.format(**values),
+                    "severity": rule.severity,
+                    "recommendation": rule.recommendation.format(**values),
+                    "rule": rule.name,
+                    "column": column
+                }))
+        
+        matches.sort(key=lambda match: match[:3])
+        return [match[3] for match in matches]
+    
+    def correlation_insights(self, df):
+        """Strongly correlated numeric column pairs, strongest first"""
+        numeric_cols = df.select_dtypes(include=[np.number]).columns
+        if len(numeric_cols) < 2:
+            return []
+        
+        corr = _pairwise_corr(df[numeric_cols].to_numpy(dtype=float))
+        rows, cols = np.triu_indices(len(numeric_cols), k=1)
+        values = corr[rows, cols]
+        strong = np.flatnonzero(np.abs(np.nan_to_num(values)) > self.correlation_threshold)
+        strong = strong[np.argsort(-np.abs(values[strong]), kind='stable')]
+        
+        insights = []
+        for k in strong:
+            corr_val = values[k]
+            col1, col2 = numeric_cols[rows[k]], numeric_cols[cols[k]]
+            relationship = "positive" if corr_val > 0 else "negative"
+            insights.append({
+                "type": "insight",
+                "category": "relationship",
+                "message": f"🔗 Strong {relationship} correlation ({corr_val:.3f}) between '{col1}' and '{col2}'",
+                "severity": "high",
+                "recommendation": "Investigate this relationship for business insights or model features"
+            })
+        return insights
+
+def rank_by_severity(insights):
+    """Stable sort of insight dicts, most severe first"""
+    return sorted(insights, key=lambda insight: SEVERITY_RANK.get(insight.get('severity'), len(SEVERITY_RANK)))
+
+def _finite(value):
+    value = float(value)
+    return value if np.isfinite(value) else 0.0
+
+def _column_quantiles(X, count, quantiles):
+    """Linearly interpolated quantiles per column, ignoring NaN (as pandas does)
+    
+    One sort of the whole matrix instead of ``nanquantile``'s per-column pass;
+    NaNs sort last, so each column's values occupy its first ``count`` rows.
+    """
+    X_sorted = np.sort(X, axis=0)
+    columns = np.arange(X.shape[1])
+    last = np.maximum(count - 1, 0)
+    
+    result = []
+    for q in quantiles:
+        position = q * last
+        lower = np.floor(position).astype(int)
+        upper = np.minimum(lower + 1, last)
+        low_values = X_sorted[lower, columns]
+        high_values = X_sorted[upper, columns]
+        values = low_values + (high_values - low_values) * (position - lower)
+        result.append(np.where(count > 0, values, np.nan))
+    return result
+
+def _pairwise_corr(X):
+    """Pearson correlation matrix with pairwise-complete observations (like ``DataFrame.corr``)
+    
+    Pairwise sums come from matrix products over the NaN mask, so the cost is
+    a few BLAS calls instead of a loop over column pairs.
+    """
+    present = ~np.isnan(X)
+    if present.all():
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.corrcoef(X, rowvar=False)
+    
+    # Center first to limit cancellation in the sum-of-products formula
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)  # all-NaN columns
+        X0 = np.where(present, X - np.nanmean(X, axis=0), 0.0)
+    M = present.astype(float)
+    
+    n = M.T @ M
+    sum_x = X0.T @ M  # [i, j]: sum of column i over rows where j is present too
+    sum_xx = (X0 ** 2).T @ M
+    sum_xy = X0.T @ X0
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        covariance = n * sum_xy - sum_x * sum_x.T
+        variance = (n * sum_xx - sum_x ** 2) * (n * sum_xx - sum_x ** 2).T
+        corr = covariance / np.sqrt(variance)
+    corr[n < 2] = np.nan
+    return np.clip(corr, -1.0, 1.0)
@@ -1,40 +1,113 @@
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
-from sklearn.linear_model import LinearRegression, LogisticRegression
-from sklearn.svm import SVR, SVC
-from sklearn.metrics import accuracy_score, mean_squared_error, classification_report, r2_score
-from sklearn.preprocessing import StandardScaler, LabelEncoder
+from collections import namedtuple
+from contextlib import contextmanager
+import copy
 import joblib
 import json
 import os
+import pickle
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows: cross-process locking is not available
+    fcntl = None
+
+from config.settings import Config
+from services.tree_runtime import FlatTreeEnsemble
+from services.model_compaction import ModelCompactor
+from utils.cache_backends import create_cache
+from utils.startup import load_attribute
+
+# Full estimators kept next to their compacted model (not served themselves)
+FULL_MODEL_SUFFIX = '.full.pkl'
+
+# Everything needed to serve one model. States are never mutated after they
+# are published: updates build a new state and swap it into the registry.
+ModelState = namedtuple('ModelState', ['model', 'scaler', 'encoders', 'target_encoder', 'info', 'runtime'])
 
 class MLPredictor:
-    """Machine Learning Prediction Service"""
+    """Machine Learning Prediction Service
+    
+    Trained models live in a copy-on-write registry (model name -> ModelState).
+    Readers take a reference to the current registry and never lock; writers
+    build new states outside the registry and publish them under a write lock,
+    so the service can run under a multi-threaded server.
+    """
     
     def __init__(self):
-        self.models = {}
-        self.scalers = {}
-        self.encoders = {}
-        self.model_info = {}
-        self.confidence = 0.0
+        self._registry = {}
+        self._write_lock = threading.RLock()
+        self._lock_depth = 0
+        
+        # (mtime, size) of each model file and its tree runtime as last loaded
+        # or saved by this process, and when it was last compared with the file on disk
+        self._disk_signatures = {}
+        self._synced_at = {}
+        self.prediction_cache = create_cache(
+            'predictions',
+            max_entries=Config.PREDICTION_CACHE_SIZE,
+            ttl=Config.PREDICTION_CACHE_TTL,
+            slot_size=Config.PREDICTION_CACHE_SLOT_SIZE
+        )
         
-        # Available model types
+        # Available model types: (estimator class, constructor arguments); sklearn
+        # modules are imported when a model of that type is first built
         self.regression_models = {
-            'linear': LinearRegression(),
-            'random_forest': RandomForestRegressor(n_estimators=100),
-            'svr': SVR()
+            'linear': ('sklearn.linear_model:LinearRegression', {}),
+            'random_forest': ('sklearn.ensemble:RandomForestRegressor', self._forest_params()),
+            'svr': ('sklearn.svm:SVR', {}),
+            'hist_gradient_boosting': ('sklearn.ensemble:HistGradientBoostingRegressor', self._hgb_params())
         }
         
         self.classification_models = {
-            'logistic': LogisticRegression(),
-            'random_forest': RandomForestClassifier(n_estimators=100),
-            'svc': SVC(probability=True)
+            'logistic': ('sklearn.linear_model:LogisticRegression', {}),
+            'random_forest': ('sklearn.ensemble:RandomForestClassifier', self._forest_params()),
+            'svc': ('sklearn.svm:SVC', {'probability': True}),
+            'hist_gradient_boosting': ('sklearn.ensemble:HistGradientBoostingClassifier', self._hgb_params())
         }
+        
+        # Incremental (online) model types, updated with partial_fit on mini-batches
+        self.incremental_models = {
+            'regression': {
+                'sgd': ('sklearn.linear_model:SGDRegressor', {})
+            },
+            'classification': {
+                'sgd': ('sklearn.linear_model:SGDClassifier', {'loss': 'log_loss'}),
+                'naive_bayes': ('sklearn.naive_bayes:GaussianNB', {})
+            }
+        }
+    
+    @property
+    def models(self):
+        """Snapshot of published models by name"""
+        return {name: state.model for name, state in self._registry.items()}
+    
+    @property
+    def model_info(self):
+        """Snapshot of published model metadata by name"""
+        return {name: state.info for name, state in self._registry.items()}
     
-    def train_model(self, data, target_column, model_type='auto', problem_type='auto'):
-        """Train a machine learning model"""
+    @property
+    def runtimes(self):
+        """Snapshot of flattened tree runtimes by model name"""
+        return {name: state.runtime for name, state in self._registry.items() if state.runtime is not None}
+    
+    def train_model(self, data, target_column, model_type='auto', problem_type='auto', compact=None):
+        """Train a machine learning model
+        
+        With ``compact=True`` (default: ``Config.COMPACT_AFTER_TRAINING``) tree
+        ensembles are compacted against the held-out split and served from the
+        compact runtime only.
+        """
+        # sklearn is imported on first training, not when the server starts
+        from sklearn.metrics import accuracy_score, classification_report, mean_squared_error, r2_score
+        from sklearn.model_selection import train_test_split
+        from sklearn.preprocessing import LabelEncoder
+        
         try:
             if isinstance(data, dict):
                 df = pd.DataFrame(data)
@@ -55,15 +128,26 @@ class MLPredictor:
                 else:
                     problem_type = 'regression'
             
-            # Preprocessing
-            X_processed = self._preprocess_features(X, fit=True)
-            
+            target_encoder = None
             if problem_type == 'classification':
-                y_processed = self._encode_target(y, fit=True)
-                model = self._get_classification_model(model_type)
+                target_encoder = LabelEncoder()
+                y_processed = target_encoder.fit_transform(y.astype(str))
+                model = self._get_classification_model(model_type, n_rows=len(df))
             else:
                 y_processed = y
-                model = self._get_regression_model(model_type)
+                model = self._get_regression_model(model_type, n_rows=len(df))
+            
+            # Gradient boosting bins raw values itself: no scaling, categoricals
+            # and missing values are handled natively by the estimator
+            native = self._is_native_engine(model)
+            
+            # Preprocessing (fresh encoders and scaler owned by this model only)
+            X_processed, scaler, encoders = self._fit_preprocessing(X, native=native)
+            
+            categorical_features = None
+            if native:
+                categorical_features = self._native_categorical_mask(X, encoders)
+                model.set_params(categorical_features=categorical_features if any(categorical_features) else None)
             
             # Split data
             X_train, X_test, y_train, y_test = train_test_split(
@@ -82,7 +166,7 @@ class MLPredictor:
                     'accuracy': float(accuracy),
                     'classification_report': classification_report(y_test, y_pred, output_dict=True)
                 }
-                self.confidence = accuracy
+                confidence = float(accuracy)
             else:
                 mse = mean_squared_error(y_test, y_pred)
                 r2 = r2_score(y_test, y_pred)
@@ -91,32 +175,223 @@ class MLPredictor:
                     'r2_score': float(r2),
                     'rmse': float(np.sqrt(mse))
                 }
-                self.confidence = max(0, r2)  # R² can be negative, so ensure positive confidence
+                confidence = float(max(0, r2))  # R² can be negative, so ensure positive confidence
+            
+            # Flatten tree ensembles for the NumPy inference runtime
+            runtime = None
+            if Config.ENABLE_TREE_RUNTIME and FlatTreeEnsemble.supports(model):
+                runtime = FlatTreeEnsemble.from_estimator(model)
+            
+            compaction = None
+            if compact is None:
+                compact = Config.COMPACT_AFTER_TRAINING
+            if compact and runtime is not None:
+                runtime, compaction = self._compact_runtime(model, runtime, X_test, y_test)
+                model = None
             
             # Store model
             model_name = f"{problem_type}_{model_type}_{target_column}"
-            self.models[model_name] = model
-            self.model_info[model_name] = {
-                'problem_type': problem_type,
-                'target_column': target_column,
-                'features': list(X.columns),
-                'metrics': metrics
-            }
+            state = ModelState(
+                model=model,
+                scaler=scaler,
+                encoders=encoders,
+                target_encoder=target_encoder,
+                info={
+                    'problem_type': problem_type,
+                    'target_column': target_column,
+                    'features': list(X.columns),
+                    'metrics': metrics,
+                    'confidence': confidence,
+                    'native_preprocessing': native,
+                    'categorical_features': categorical_features,
+                    'compaction': compaction,
+                    'version': uuid.uuid4().hex
+                },
+                runtime=runtime
+            )
+            self._publish(model_name, state)
             
             # Save model to disk
-            self._save_model(model_name, model)
+            self._save_model(model_name, state)
             
             return {
                 'success': True,
                 'model_name': model_name,
                 'problem_type': problem_type,
                 'metrics': metrics,
-                'features': list(X.columns)
+                'confidence': confidence,
+                'features': list(X.columns),
+                'engine': type(model).__name__ if model is not None else 'FlatTreeEnsemble',
+                'compaction': compaction
             }
             
         except Exception as e:
             return {"error": f"Training failed: {str(e)}"}
     
+    def partial_train(self, data, target_column, model_name=None, model_type='sgd',
+                      problem_type='auto', classes=None):
+        """Update (or create) an incremental model with a mini-batch of labeled rows"""
+        from sklearn.metrics import accuracy_score, mean_squared_error, r2_score
+        from sklearn.preprocessing import StandardScaler
+        
+        try:
+            if isinstance(data, dict):
+                if 'data' in data:
+                    df = pd.DataFrame(data['data'])
+                elif all(np.ndim(value) == 0 for value in data.values()):
+                    df = pd.DataFrame([data])  # a single labeled row
+                else:
+                    df = pd.DataFrame(data)  # columns of equal length, as train_model accepts
+            else:
+                df = pd.DataFrame(data)
+            
+            if target_column not in df.columns:
+                return {"error": f"Target column '{target_column}' not found"}
+            
+            if len(df) == 0:
+                return {"error": "Empty batch"}
+            
+            # Updates to incremental models are read-modify-write, so writers
+            # (threads and worker processes) queue up here and each one starts
+            # from the latest saved version; predictions keep reading the
+            # previous state
+            with self._models_locked():
+                if model_name is None:
+                    # Pick up incremental models created by other workers
+                    self.load_saved_models()
+                    # Keep feeding the incremental model already built for this target
+                    for name, state in self._registry.items():
+                        info = state.info
+                        if (info.get('family') == 'incremental' and info['target_column'] == target_column
+                                and info['model_type'] == model_type
+                                and problem_type in ('auto', info['problem_type'])):
+                            model_name = name
+                            break
+                
+                current = self._get_state(model_name, sync=True) if model_name is not None else None
+                
+                if current is not None:
+                    info = current.info
+                    if info.get('family') != 'incremental':
+                        return {"error": f"Model '{model_name}' does not support incremental updates"}
+                    if info['target_column'] != target_column:
+                        return {"error": f"Model '{model_name}' was trained on target '{info['target_column']}'"}
+                    problem_type = info['problem_type']
+                    
+                    # Copy-on-write: the published model keeps serving until the swap
+                    model = copy.deepcopy(current.model)
+                    scaler = copy.deepcopy(current.scaler)
+                    vocabularies = current.encoders
+                    info = dict(info)
+                else:
+                    # First batch creates the model
+                    y = df[target_column]
+                    if problem_type == 'auto':
+                        # A first mini-batch says little about the number of distinct
+                        # values, so float targets are regression however few it holds
+                        if classes is not None or not pd.api.types.is_numeric_dtype(y) or pd.api.types.is_bool_dtype(y):
+                            problem_type = 'classification'
+                        elif pd.api.types.is_float_dtype(y):
+                            problem_type = 'regression'
+                        elif len(y.unique()) < 10:
+                            problem_type = 'classification'
+                        else:
+                            problem_type = 'regression'
+                    
+                    spec = self.incremental_models[problem_type].get(model_type)
+                    if spec is None:
+                        return {"error": f"Unknown incremental model type '{model_type}' for {problem_type}"}
+                    
+                    model_name = model_name or f"incremental_{problem_type}_{model_type}_{target_column}"
+                    model = self._build_estimator(spec)
+                    scaler = StandardScaler()
+                    vocabularies = {}
+                    info = {
+                        'family': 'incremental',
+                        'problem_type': problem_type,
+                        'model_type': model_type,
+                        'target_column': target_column,
+                        'features': [col for col in df.columns if col != target_column],
+                        'classes': None,
+                        'samples_seen': 0,
+                        'batches_seen': 0,
+                        'metrics': {},
+                        'confidence': 0.0
+                    }
+                    if problem_type == 'classification':
+                        labels = classes if classes is not None else y.astype(str).unique().tolist()
+                        info['classes'] = [str(label) for label in labels]
+                
+                X = df.reindex(columns=info['features'], fill_value=0)
+                y = df[target_column]
+                
+                if problem_type == 'classification':
+                    class_index = {label: code for code, label in enumerate(info['classes'])}
+                    y_labels = y.astype(str)
+                    unknown = set(y_labels) - set(class_index)
+                    if unknown:
+                        return {"error": f"Unknown class label(s) {sorted(unknown)}; pass the full 'classes' list when creating the model"}
+                    y_processed = y_labels.map(class_index).to_numpy()
+                else:
+                    y_processed = y.to_numpy(dtype=float)
+                
+                vocabularies = self._extend_vocabularies(X, vocabularies)
+                X_encoded = self._encode_incremental(X, vocabularies)
+                
+                # Welford-style running mean/variance, updated with this batch only
+                scaler.partial_fit(X_encoded)
+                X_processed = self._scale_incremental(X_encoded, scaler)
+                
+                # Test-then-train: score the batch before the model learns from it
+                batch_metrics = {}
+                if info['samples_seen'] > 0:
+                    y_pred = model.predict(X_processed)
+                    if problem_type == 'classification':
+                        batch_metrics['accuracy'] = float(accuracy_score(y_processed, y_pred))
+                    elif len(y_processed) > 1:
+                        batch_metrics['mse'] = float(mean_squared_error(y_processed, y_pred))
+                        batch_metrics['r2_score'] = float(r2_score(y_processed, y_pred))
+                
+                if problem_type == 'classification':
+                    model.partial_fit(X_processed, y_processed, classes=np.arange(len(info['classes'])))
+                else:
+                    model.partial_fit(X_processed, y_processed)
+                
+                info['samples_seen'] += len(df)
+                info['batches_seen'] += 1
+                info['version'] = uuid.uuid4().hex
+                if batch_metrics:
+                    info['metrics'] = batch_metrics
+                    score = batch_metrics.get('accuracy', batch_metrics.get('r2_score'))
+                    if score is not None:
+                        info['confidence'] = float(max(0, score))
+                
+                state = ModelState(
+                    model=model,
+                    scaler=scaler,
+                    encoders=vocabularies,
+                    target_encoder=None,
+                    info=info,
+                    runtime=None
+                )
+                self._publish(model_name, state)
+                self._save_model(model_name, state)
+            
+            return {
+                'success': True,
+                'model_name': model_name,
+                'problem_type': problem_type,
+                'batch_size': len(df),
+                'samples_seen': info['samples_seen'],
+                'batches_seen': info['batches_seen'],
+                'batch_metrics': batch_metrics,
+                'confidence': info['confidence'],
+                'features': info['features']
+            }
+        
+        except Exception as e:
+            return {"error": f"Incremental training failed: {str(e)}"}
+    
     def predict(self, data, model_name=None):
         """Make predictions using trained model"""
         try:
@@ -129,156 +404,617 @@ class MLPredictor:
             
             # If no model specified, use the most recent one
             if model_name is None:
-                if not self.models:
+                registry = self._registry
+                if not registry:
                     return {"error": "No trained models available"}
-                model_name = list(self.models.keys())[-1]
+                model_name = list(registry.keys())[-1]
             
-            if model_name not in self.models:
-                # Try to load from disk
-                if not self._load_model(model_name):
-                    return {"error": f"Model '{model_name}' not found"}
+            # Pin one immutable state for the whole request
+            state = self._get_state(model_name)
+            if state is None:
+                return {"error": f"Model '{model_name}' not found"}
             
-            model = self.models[model_name]
-            model_info = self.model_info[model_name]
+            model_info = state.info
             
             # Ensure all required features are present
             required_features = model_info['features']
-            for feature in required_features:
-                if feature not in df.columns:
-                    df[feature] = 0  # Fill missing features with 0
+            missing_features = [feature for feature in required_features if feature not in df.columns]
+            for feature in missing_features:
+                df[feature] = 0  # Fill missing features with 0
             
             # Select and order features correctly
             X = df[required_features]
             
-            # Preprocess features
-            X_processed = self._preprocess_features(X, fit=False)
+            # Serve repeated feature vectors from the cache, compute only the misses
+            cache_keys = [
+                (model_name, model_info.get('version'), fingerprint)
+                for fingerprint in self._fingerprint_rows(X)
+            ]
+            cached = [self.prediction_cache.get(key) for key in cache_keys]
+            missing_rows = [i for i, entry in enumerate(cached) if entry is None]
             
-            # Make prediction
-            predictions = model.predict(X_processed)
+            if missing_rows:
+                predictions, probabilities = self._predict_rows(state, X.iloc[missing_rows])
+                for position, i in enumerate(missing_rows):
+                    entry = (predictions[position], probabilities[position] if probabilities is not None else None)
+                    self.prediction_cache.set(cache_keys[i], entry)
+                    cached[i] = entry
             
-            # Get prediction probabilities if classification
-            probabilities = None
-            if model_info['problem_type'] == 'classification' and hasattr(model, 'predict_proba'):
-                try:
-                    probabilities = model.predict_proba(X_processed).tolist()
-                except:
-                    probabilities = None
+            has_probabilities = any(entry[1] is not None for entry in cached)
             
             return {
                 'success': True,
-                'predictions': predictions.tolist() if hasattr(predictions, 'tolist') else predictions,
-                'probabilities': probabilities,
+                'predictions': [entry[0] for entry in cached],
+                'probabilities': [entry[1] for entry in cached] if has_probabilities else None,
+                'confidence': model_info.get('confidence', 0.0),
                 'model_used': model_name,
-                'problem_type': model_info['problem_type']
+                'model_version': model_info.get('version'),
+                'problem_type': model_info['problem_type'],
+                'missing_features': missing_features
             }
             
         except Exception as e:
             return {"error": f"Prediction failed: {str(e)}"}
     
-    def get_confidence(self):
-        """Get confidence score of the last prediction"""
-        return float(self.confidence)
+    def get_model_state(self, model_name=None):
+        """Pin the current state of a model (default: most recent) for a multi-step job
+        
+        Returns ``(model_name, state)``, or ``(model_name, None)`` when not found.
+        """
+        if model_name is None:
+            registry = self._registry
+            if not registry:
+                return None, None
+            model_name = list(registry.keys())[-1]
+        return model_name, self._get_state(model_name)
+    
+    def predict_frame(self, state, df):
+        """Vectorized predictions for a DataFrame chunk with a pinned model state
+        
+        Bypasses the prediction cache. Returns ``(predictions, probabilities)``
+        as NumPy arrays; probabilities is None for regression models.
+        """
+        X = df.reindex(columns=state.info['features'], fill_value=0)
+        return self._predict_arrays(state, X)
+    
+    @staticmethod
+    def class_labels(state):
+        """Original target labels in class-code order, or None for regression models"""
+        if state.target_encoder is not None:
+            return [str(label) for label in state.target_encoder.classes_]
+        return state.info.get('classes')
+    
+    def _predict_rows(self, state, X):
+        """Run the model on raw feature rows; returns (predictions, probabilities) as lists"""
+        predictions, probabilities = self._predict_arrays(state, X)
+        return predictions.tolist(), probabilities.tolist() if probabilities is not None else None
+    
+    def _predict_arrays(self, state, X):
+        """Run the model on raw feature rows; returns (predictions, probabilities) as arrays"""
+        model = state.model
+        model_info = state.info
+        
+        # Preprocess features
+        X_processed = self._transform_features(X, state)
+        
+        # Compacted models have no sklearn estimator left: evaluate in bounded chunks
+        if model is None:
+            return self._evaluate_chunked(state.runtime, X_processed)
+        
+        # The NumPy runtime wins on small requests; sklearn's compiled, threaded
+        # predict is faster once batches get large
+        if state.runtime is not None and len(X_processed) <= Config.TREE_RUNTIME_MAX_ROWS:
+            # Flattened tree arrays: one traversal yields labels and probabilities
+            return state.runtime.evaluate(X_processed)
+        
+        # Make prediction
+        predictions = np.asarray(model.predict(X_processed))
+        
+        # Get prediction probabilities if classification
+        probabilities = None
+        if model_info['problem_type'] == 'classification' and hasattr(model, 'predict_proba'):
+            try:
+                probabilities = model.predict_proba(X_processed)
+            except:
+                probabilities = None
+        
+        return predictions, probabilities
+    
+    @staticmethod
+    def _evaluate_chunked(runtime, X_processed):
+        """Runtime evaluation in row chunks, bounding the (rows x trees) traversal arrays"""
+        X_processed = np.asarray(X_processed, dtype=np.float32)
+        chunk_rows = Config.COMPACT_RUNTIME_CHUNK_ROWS
+        if len(X_processed) <= chunk_rows:
+            return runtime.evaluate(X_processed)
+        
+        parts = [runtime.evaluate(X_processed[start:start + chunk_rows]) for start in range(0, len(X_processed), chunk_rows)]
+        predictions = np.concatenate([part[0] for part in parts])
+        probabilities = np.concatenate([part[1] for part in parts]) if runtime.is_classifier else None
+        return predictions, probabilities
+    
+    @staticmethod
+    def _fingerprint_rows(X):
+        """64-bit hash per feature row, insensitive to int/float and bool/number spelling"""
+        canonical = pd.DataFrame(index=X.index)
+        for col in X.columns:
+            values = X[col]
+            if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+                canonical[col] = values.astype('float64')
+            else:
+                canonical[col] = values.astype(str)
+        return pd.util.hash_pandas_object(canonical, index=False).to_numpy()
+    
+    def cache_stats(self):
+        """Prediction cache hit-rate metrics"""
+        return self.prediction_cache.stats()
+    
+    def _get_state(self, model_name, sync=False):
+        """Current published state for a model, loading it from disk if needed
+        
+        A model file saved by another worker process since this one loaded it
+        is reloaded, checked at most every ``Config.MODEL_SYNC_INTERVAL``
+        seconds (on every call with ``sync=True``).
+        """
+        state = self._registry.get(model_name)
+        if state is None or self._changed_on_disk(model_name, force=sync):
+            # Saves hold the same lock, so the pickle and its tree runtime are
+            # always read as one version
+            with self._models_locked():
+                if self._load_model(model_name):
+                    state = self._registry.get(model_name)
+        return state
+    
+    def _changed_on_disk(self, model_name, force=False):
+        """Whether the saved model file differs from the version this process holds"""
+        if not force:
+            interval = Config.MODEL_SYNC_INTERVAL
+            if interval <= 0:
+                return False
+            now = time.monotonic()
+            if now - self._synced_at.get(model_name, 0) < interval:
+                return False
+            self._synced_at[model_name] = now
+        
+        signature = self._disk_signature(model_name)
+        return signature is not None and signature != self._disk_signatures.get(model_name)
+    
+    @staticmethod
+    def _disk_signature(model_name):
+        """(mtime, size) of the model file and of its tree runtime file, if any"""
+        try:
+            stat = os.stat(f"models/{model_name}.pkl")
+        except OSError:
+            return None
+        try:
+            runtime_stat = os.stat(f"models/{model_name}.trees.npz")
+            runtime_signature = (runtime_stat.st_mtime_ns, runtime_stat.st_size)
+        except OSError:
+            runtime_signature = None
+        return stat.st_mtime_ns, stat.st_size, runtime_signature
+    
+    @contextmanager
+    def _models_locked(self):
+        """Exclusive access to the saved models across threads and worker processes"""
+        with self._write_lock:
+            # lockf locks belong to the process: only the outermost holder takes it
+            lock_file = None
+            if self._lock_depth == 0 and fcntl is not None:
+                os.makedirs("models", exist_ok=True)
+                lock_file = open("models/.lock", 'a+b')
+                fcntl.lockf(lock_file.fileno(), fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if lock_file is not None:
+                    lock_file.close()  # releases the lock
+    
+    def _publish(self, model_name, state):
+        """Atomically swap a new model state into the registry
+        
+        Prediction cache keys carry the model version, so rows cached for older
+        versions are never hit again and age out; nothing is scanned per publish.
+        """
+        with self._write_lock:
+            registry = dict(self._registry)
+            registry[model_name] = state
+            self._registry = registry
+    
+    def export_tree_runtime(self, model_name, save=True):
+        """Flatten a trained tree ensemble into NumPy node arrays used to serve predictions"""
+        try:
+            state = self._get_state(model_name)
+            if state is None:
+                return {"error": f"Model '{model_name}' not found"}
+            
+            if state.model is None:
+                return {"error": f"Model '{model_name}' is compacted and already served from its tree runtime"}
+            
+            if not FlatTreeEnsemble.supports(state.model):
+                return {"error": f"Model '{model_name}' ({type(state.model).__name__}) is not a supported tree ensemble"}
+            
+            runtime = FlatTreeEnsemble.from_estimator(state.model)
+            
+            runtime_path = None
+            with self._models_locked():
+                self._publish(model_name, state._replace(runtime=runtime))
+                if save:
+                    runtime_path = self._save_runtime(model_name, runtime)
+                    self._disk_signatures[model_name] = self._disk_signature(model_name)
+            
+            return {
+                'success': True,
+                'model_name': model_name,
+                'n_trees': runtime.n_trees,
+                'n_nodes': runtime.n_nodes,
+                'max_depth': runtime.max_depth,
+                'bytes': runtime.nbytes,
+                'path': runtime_path
+            }
+        
+        except Exception as e:
+            return {"error": f"Tree runtime export failed: {str(e)}"}
+    
+    def compact_model(self, model_name, data=None, float32=True, prune_trees=None,
+                      max_depth=None, prune_depth=None, tolerance=None):
+        """Replace a tree ensemble with its compacted flat runtime
+        
+        ``data`` (labeled rows including the target column) is used as validation
+        set for pruning and to report the accuracy change. The full estimator is
+        dropped from memory and kept on disk as ``models/<name>.full.pkl``.
+        """
+        try:
+            # Read-modify-write of the saved model: one worker at a time
+            with self._models_locked():
+                state = self._get_state(model_name, sync=True)
+                if state is None:
+                    return {"error": f"Model '{model_name}' not found"}
+                
+                runtime = state.runtime
+                if runtime is None:
+                    if not FlatTreeEnsemble.supports(state.model):
+                        return {"error": f"Model '{model_name}' ({type(state.model).__name__}) is not a supported tree ensemble"}
+                    runtime = FlatTreeEnsemble.from_estimator(state.model)
+                
+                X_val, y_val = None, None
+                if data is not None:
+                    df = pd.DataFrame(data)
+                    target_column = state.info['target_column']
+                    if target_column not in df.columns:
+                        return {"error": f"Target column '{target_column}' not found in validation data"}
+                    
+                    X = df.reindex(columns=state.info['features'], fill_value=0)
+                    X_val = self._transform_features(X, state)
+                    y_val = df[target_column]
+                    if state.target_encoder is not None:
+                        y_val = state.target_encoder.transform(y_val.astype(str))
+                
+                runtime, report = self._compact_runtime(
+                    state.model, runtime, X_val, y_val,
+                    float32=float32, prune_trees=prune_trees, max_depth=max_depth,
+                    prune_depth=prune_depth, tolerance=tolerance
+                )
+                
+                info = dict(state.info)
+                info['compaction'] = report
+                info['version'] = uuid.uuid4().hex
+                compacted = state._replace(model=None, runtime=runtime, info=info)
+                
+                # Keep the full estimator on disk for retraining or rollback
+                model_path = f"models/{model_name}.pkl"
+                if state.model is not None and os.path.exists(model_path):
+                    os.replace(model_path, f"models/{model_name}{FULL_MODEL_SUFFIX}")
+                
+                self._publish(model_name, compacted)
+                self._save_model(model_name, compacted)
+                
+                return {
+                    'success': True,
+                    'model_name': model_name,
+                    'model_version': info['version'],
+                    'compaction': report
+                }
+        
+        except Exception as e:
+            return {"error": f"Model compaction failed: {str(e)}"}
+    
+    @staticmethod
+    def _compact_runtime(model, runtime, X_val=None, y_val=None, float32=True, prune_trees=None,
+                         max_depth=None, prune_depth=None, tolerance=None):
+        """Compact a runtime; returns ``(compacted_runtime, report)``"""
+        has_validation = X_val is not None and y_val is not None
+        compactor = ModelCompactor(
+            tolerance=Config.COMPACTION_TOLERANCE if tolerance is None else tolerance,
+            holdout=Config.COMPACTION_HOLDOUT,
+            random_state=Config.RANDOM_STATE
+        )
+        
+        compacted, report = compactor.compact(
+            runtime, X_val, y_val,
+            float32=float32,
+            prune_trees=has_validation and (Config.COMPACTION_PRUNE_TREES if prune_trees is None else prune_trees),
+            max_depth=max_depth,
+            prune_depth=has_validation and (Config.COMPACTION_PRUNE_DEPTH if prune_depth is None else prune_depth)
+        )
+        
+        if model is not None:
+            report['original']['pickle_bytes'] = len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+        return compacted, report
+    
+    def get_confidence(self, model_name=None):
+        """Confidence (validation score) of a model, by default the most recent one
+        
+        Prefer the ``confidence`` field returned by ``predict``, which belongs to
+        the exact model version that produced the predictions.
+        """
+        registry = self._registry
+        if model_name is None:
+            if not registry:
+                return 0.0
+            model_name = list(registry.keys())[-1]
+        state = registry.get(model_name)
+        return float(state.info.get('confidence', 0.0)) if state is not None else 0.0
     
-    def _preprocess_features(self, X, fit=False):
-        """Preprocess features for training/prediction"""
+    def _fit_preprocessing(self, X, native=False):
+        """Fit encoders and scaler on training features
+        
+        Returns ``(X_processed, scaler, encoders)``. With ``native=True`` (gradient
+        boosting engine) categorical codes keep missing values as NaN and numerical
+        features are left unscaled.
+        """
+        from sklearn.preprocessing import LabelEncoder, StandardScaler
+        
         X_processed = X.copy()
+        encoders = {}
         
         # Handle categorical variables
         categorical_cols = X_processed.select_dtypes(include=['object']).columns
         
         for col in categorical_cols:
-            if fit:
-                if col not in self.encoders:
-                    self.encoders[col] = LabelEncoder()
-                X_processed[col] = self.encoders[col].fit_transform(X_processed[col].astype(str))
-            else:
-                if col in self.encoders:
-                    # Handle unseen categories
-                    unique_vals = set(X_processed[col].astype(str))
-                    known_vals = set(self.encoders[col].classes_)
-                    unknown_vals = unique_vals - known_vals
-                    
-                    # Replace unknown values with the most frequent known value
-                    if unknown_vals:
-                        most_frequent = self.encoders[col].classes_[0]
-                        X_processed[col] = X_processed[col].astype(str).replace(list(unknown_vals), most_frequent)
-                    
-                    X_processed[col] = self.encoders[col].transform(X_processed[col].astype(str))
-                else:
-                    # If encoder not found, fill with 0
-                    X_processed[col] = 0
+            missing = X_processed[col].isna() if native else None
+            encoders[col] = LabelEncoder()
+            X_processed[col] = encoders[col].fit_transform(X_processed[col].astype(str))
+            
+            if native and missing.any():
+                X_processed[col] = X_processed[col].astype(float).mask(missing)
+        
+        if native:
+            return X_processed, None, encoders
         
         # Scale numerical features
+        scaler = None
         numerical_cols = X_processed.select_dtypes(include=[np.number]).columns
         
         if len(numerical_cols) > 0:
-            scaler_name = 'default'
-            if fit:
-                if scaler_name not in self.scalers:
-                    self.scalers[scaler_name] = StandardScaler()
-                X_processed[numerical_cols] = self.scalers[scaler_name].fit_transform(X_processed[numerical_cols])
+            scaler = StandardScaler()
+            X_processed[numerical_cols] = scaler.fit_transform(X_processed[numerical_cols])
+        
+        return X_processed, scaler, encoders
+    
+    def _transform_features(self, X, state):
+        """Preprocess features for prediction with a model's fitted encoders and scaler"""
+        if state.info.get('family') == 'incremental':
+            return self._scale_incremental(self._encode_incremental(X, state.encoders), state.scaler)
+        
+        native = state.info.get('native_preprocessing', False)
+        X_processed = X.copy()
+        
+        # Handle categorical variables
+        categorical_cols = X_processed.select_dtypes(include=['object']).columns
+        
+        for col in categorical_cols:
+            missing = X_processed[col].isna() if native else None
+            encoder = state.encoders.get(col)
+            if encoder is not None:
+                # Handle unseen categories
+                unique_vals = set(X_processed[col].astype(str))
+                known_vals = set(encoder.classes_)
+                unknown_vals = unique_vals - known_vals
+                
+                # Replace unknown values with the most frequent known value
+                if unknown_vals:
+                    most_frequent = encoder.classes_[0]
+                    X_processed[col] = X_processed[col].astype(str).replace(list(unknown_vals), most_frequent)
+                
+                X_processed[col] = encoder.transform(X_processed[col].astype(str))
             else:
-                if scaler_name in self.scalers:
-                    X_processed[numerical_cols] = self.scalers[scaler_name].transform(X_processed[numerical_cols])
+                # If encoder not found, fill with 0
+                X_processed[col] = 0
+            
+            if native and missing.any():
+                X_processed[col] = X_processed[col].astype(float).mask(missing)
+        
+        if native:
+            return X_processed
+        
+        # Scale numerical features
+        numerical_cols = X_processed.select_dtypes(include=[np.number]).columns
+        
+        if len(numerical_cols) > 0 and state.scaler is not None:
+            X_processed[numerical_cols] = state.scaler.transform(X_processed[numerical_cols])
         
         return X_processed
     
-    def _encode_target(self, y, fit=False):
-        """Encode target variable for classification"""
-        target_encoder_name = 'target'
+    @staticmethod
+    def _extend_vocabularies(X, vocabularies):
+        """Copy of the categorical vocabularies with this batch's new values appended
+        
+        Existing codes never change; only columns that gained values are copied.
+        """
+        extended = dict(vocabularies)
+        categorical_cols = X.select_dtypes(include=['object']).columns
+        
+        for col in categorical_cols:
+            vocab = extended.get(col, {})
+            new_values = [value for value in X[col].astype(str).unique() if value not in vocab]
+            if new_values:
+                vocab = dict(vocab)
+                for value in new_values:
+                    vocab[value] = len(vocab)
+                extended[col] = vocab
+        
+        return extended
+    
+    @staticmethod
+    def _encode_incremental(X, vocabularies):
+        """Map categoricals through their vocabularies; unseen values become code 0"""
+        X_processed = X.copy()
+        categorical_cols = X_processed.select_dtypes(include=['object']).columns
         
-        if fit:
-            if target_encoder_name not in self.encoders:
-                self.encoders[target_encoder_name] = LabelEncoder()
-            return self.encoders[target_encoder_name].fit_transform(y.astype(str))
-        else:
-            if target_encoder_name in self.encoders:
-                return self.encoders[target_encoder_name].transform(y.astype(str))
-            return y
+        for col in categorical_cols:
+            X_processed[col] = X_processed[col].astype(str).map(vocabularies.get(col, {})).fillna(0)
+        
+        return X_processed.apply(pd.to_numeric, errors='coerce').astype(float).to_numpy()
+    
+    @staticmethod
+    def _scale_incremental(X_encoded, scaler):
+        """Standardize with the running scaler; missing values land on the running mean"""
+        if hasattr(scaler, 'mean_'):
+            X_encoded = scaler.transform(X_encoded)
+        return np.nan_to_num(X_encoded, nan=0.0)
     
-    def _get_classification_model(self, model_type):
+    def _get_classification_model(self, model_type, n_rows=0):
         """Get classification model"""
         if model_type == 'auto':
-            return RandomForestClassifier(n_estimators=100)
-        return self.classification_models.get(model_type, RandomForestClassifier(n_estimators=100))
+            model_type = 'hist_gradient_boosting' if n_rows >= Config.HGB_AUTO_MIN_ROWS else 'random_forest'
+        return self._build_estimator(self.classification_models.get(model_type, self.classification_models['random_forest']))
     
-    def _get_regression_model(self, model_type):
+    def _get_regression_model(self, model_type, n_rows=0):
         """Get regression model"""
         if model_type == 'auto':
-            return RandomForestRegressor(n_estimators=100)
-        return self.regression_models.get(model_type, RandomForestRegressor(n_estimators=100))
+            model_type = 'hist_gradient_boosting' if n_rows >= Config.HGB_AUTO_MIN_ROWS else 'random_forest'
+        return self._build_estimator(self.regression_models.get(model_type, self.regression_models['random_forest']))
     
-    def _save_model(self, model_name, model):
+    @staticmethod
+    def _build_estimator(spec):
+        """New unfitted estimator from a ``(class path, constructor arguments)`` model type"""
+        class_path, params = spec
+        return load_attribute(class_path)(**params)
+    
+    @staticmethod
+    def _forest_params():
+        """Random forest settings; gunicorn workers each fit on one core by default"""
+        n_jobs = Config.MODEL_N_JOBS
+        if n_jobs is None:
+            # Set by gunicorn.conf.py before the app is loaded
+            n_jobs = 1 if int(os.environ.get('DS_SERVING_WORKERS', '1')) > 1 else -1
+        return {'n_estimators': 100, 'n_jobs': n_jobs}
+    
+    @staticmethod
+    def _hgb_params():
+        """Histogram gradient boosting settings (multi-threaded via OpenMP)"""
+        return {
+            'max_iter': Config.HGB_MAX_ITER,
+            'learning_rate': Config.HGB_LEARNING_RATE,
+            'max_leaf_nodes': Config.HGB_MAX_LEAF_NODES,
+            'early_stopping': Config.HGB_EARLY_STOPPING,
+            'validation_fraction': Config.HGB_VALIDATION_FRACTION,
+            'n_iter_no_change': Config.HGB_N_ITER_NO_CHANGE,
+            'random_state': Config.RANDOM_STATE
+        }
+    
+    @staticmethod
+    def _is_native_engine(model):
+        """Whether the estimator handles raw categoricals and missing values itself"""
+        return isinstance(model, (
+            load_attribute('sklearn.ensemble:HistGradientBoostingClassifier'),
+            load_attribute('sklearn.ensemble:HistGradientBoostingRegressor')
+        ))
+    
+    @staticmethod
+    def _native_categorical_mask(X, encoders):
+        """Boolean mask of label-encoded columns the boosting engine can treat as categorical"""
+        max_bins = 255
+        mask = []
+        for col in X.columns:
+            is_categorical = col in encoders
+            if is_categorical:
+                # Higher cardinality columns fall back to ordinal codes
+                is_categorical = len(encoders[col].classes_) <= max_bins
+            mask.append(bool(is_categorical))
+        return mask
+    
+    def _save_model(self, model_name, state):
         """Save model to disk"""
         try:
             model_path = f"models/{model_name}.pkl"
             os.makedirs("models", exist_ok=True)
             
-            # Save model and preprocessors
+            # Save model and its own preprocessors
             model_data = {
-                'model': model,
-                'scalers': self.scalers,
-                'encoders': self.encoders,
-                'model_info': self.model_info.get(model_name, {})
+                'model': state.model,
+                'scaler': state.scaler,
+                'encoders': state.encoders,
+                'target_encoder': state.target_encoder,
+                'model_info': state.info
             }
             
-            joblib.dump(model_data, model_path)
+            # Readers load under the same lock, so they never pair the new
+            # pickle with the previous tree runtime (or the reverse)
+            with self._models_locked():
+                self._save_runtime(model_name, state.runtime)
+                
+                # Write then rename so concurrent readers never see a partial file
+                tmp_path = f"{model_path}.{uuid.uuid4().hex}.tmp"
+                joblib.dump(model_data, tmp_path)
+                os.replace(tmp_path, model_path)
+                self._disk_signatures[model_name] = self._disk_signature(model_name)
             return True
         except Exception as e:
             print(f"Failed to save model: {e}")
             return False
     
+    @staticmethod
+    def _save_runtime(model_name, runtime):
+        """Atomically write (or, for ``None``, remove) a model's tree runtime file"""
+        runtime_path = f"models/{model_name}.trees.npz"
+        if runtime is None:
+            # A retrained non-tree model must not pick up the old runtime on reload
+            if os.path.exists(runtime_path):
+                os.remove(runtime_path)
+            return None
+        
+        tmp_path = f"{runtime_path}.{uuid.uuid4().hex}.tmp"
+        runtime.save(tmp_path)
+        os.replace(tmp_path, runtime_path)
+        return runtime_path
+    
     def _load_model(self, model_name):
         """Load model from disk"""
         try:
             model_path = f"models/{model_name}.pkl"
             if os.path.exists(model_path):
+                signature = self._disk_signature(model_name)
                 model_data = joblib.load(model_path)
+                model_info = dict(model_data['model_info'])
+                model_info.setdefault('version', uuid.uuid4().hex)
+                
+                if 'scaler' in model_data:
+                    scaler = model_data['scaler']
+                    encoders = model_data['encoders']
+                    target_encoder = model_data.get('target_encoder')
+                else:
+                    # Older files bundled the process-wide scaler/encoder dicts
+                    scaler, encoders, target_encoder = self._split_legacy_preprocessors(model_name, model_info, model_data)
+                
+                # Compacted models are stored as tree runtime only
+                runtime = None
+                runtime_path = f"models/{model_name}.trees.npz"
+                needs_runtime = Config.ENABLE_TREE_RUNTIME or model_data['model'] is None
+                if needs_runtime and os.path.exists(runtime_path):
+                    runtime = FlatTreeEnsemble.load(runtime_path)
                 
-                self.models[model_name] = model_data['model']
-                self.scalers.update(model_data['scalers'])
-                self.encoders.update(model_data['encoders'])
-                self.model_info[model_name] = model_data['model_info']
+                self._publish(model_name, ModelState(
+                    model=model_data['model'],
+                    scaler=scaler,
+                    encoders=encoders,
+                    target_encoder=target_encoder,
+                    info=model_info,
+                    runtime=runtime
+                ))
+                self._disk_signatures[model_name] = signature
                 
                 return True
         except Exception as e:
@@ -286,9 +1022,42 @@ class MLPredictor:
         
         return False
     
+    @staticmethod
+    def _split_legacy_preprocessors(model_name, model_info, model_data):
+        """Pick one model's preprocessors out of the old shared scaler/encoder dicts"""
+        scalers = model_data.get('scalers', {})
+        encoders = model_data.get('encoders', {})
+        
+        if model_info.get('family') == 'incremental':
+            return scalers.get(model_name), encoders.get(model_name, {}), None
+        
+        feature_encoders = {
+            col: encoder for col, encoder in encoders.items()
+            if col in model_info.get('features', []) and isinstance(encoder, load_attribute('sklearn.preprocessing:LabelEncoder'))
+        }
+        return scalers.get('default'), feature_encoders, encoders.get('target')
+    
+    def load_saved_models(self):
+        """Load every model saved under models/ (e.g. in the server master before forking workers)"""
+        if not os.path.isdir("models"):
+            return []
+        
+        loaded = []
+        with self._models_locked():
+            for file_name in sorted(os.listdir("models")):
+                if not file_name.endswith(".pkl") or file_name.endswith(FULL_MODEL_SUFFIX):
+                    continue
+                model_name = file_name[:-len(".pkl")]
+                if model_name not in self._registry and self._load_model(model_name):
+                    loaded.append(model_name)
+        return loaded
+    
     def list_models(self):
         """List all available models"""
+        registry = self._registry
         return {
-            'loaded_models': list(self.models.keys()),
-            'model_info': self.model_info
+            'loaded_models': list(registry.keys()),
+            'tree_runtimes': [name for name, state in registry.items() if state.runtime is not None],
+            'compacted_models': [name for name, state in registry.items() if state.model is None],
+            'model_info': {name: state.info for name, state in registry.items()}
         }
@@ -0,0 +1,259 @@
+import numpy as np
+
+from services.tree_runtime import FlatTreeEnsemble
+
+class ModelCompactor:
+    """Shrinks flattened tree ensembles for storage and fast cold starts
+    
+    Works on ``FlatTreeEnsemble`` node arrays, which already leave behind the
+    training-only parts of sklearn trees (impurity, sample counts, estimator
+    parameters). On top of that it can
+    
+    * store thresholds and leaf values as float32 and child/feature indices in
+      the narrowest integer type,
+    * drop whole trees that add nothing on validation data,
+    * cut trees at a maximum depth, turning deeper subtrees into leaves that
+      carry the subtree's training distribution.
+    
+    Pruning steps are only kept while the validation score stays within
+    ``tolerance`` of the uncompacted model. When pruning, the validation rows
+    are split: pruning decisions use the selection part only and the reported
+    score change is measured on the ``holdout`` part, which pruning never saw.
+    """
+    
+    def __init__(self, tolerance=0.005, holdout=0.5, random_state=0):
+        self.tolerance = tolerance
+        self.holdout = holdout
+        self.random_state = random_state
+    
+    def compact(self, runtime, X_val=None, y_val=None, float32=True, prune_trees=False,
+                max_depth=None, prune_depth=False):
+        """Return ``(compacted_runtime, report)``"""
+        has_validation = X_val is not None and y_val is not None and len(y_val) > 0
+        if (prune_trees or prune_depth) and not (has_validation and len(y_val) >= 2):
+            raise ValueError("Validation data (at least two rows) is required for pruning")
+        
+        report = {
+            'original': self._describe(runtime),
+            'steps': []
+        }
+        
+        # Scoring pruning choices on the rows they were selected with is optimistic
+        X_select, y_select, X_report, y_report = X_val, y_val, X_val, y_val
+        if prune_trees or prune_depth:
+            X_select, y_select, X_report, y_report = self.split_validation(X_val, y_val)
+        
+        baseline = self.score(runtime, X_select, y_select) if has_validation else None
+        compacted = runtime
+        
+        if prune_trees:
+            compacted, n_kept = self.prune_trees(compacted, X_select, y_select, baseline - self.tolerance)
+            report['steps'].append({'step': 'prune_trees', 'trees_kept': n_kept})
+        
+        if prune_depth:
+            max_depth = self.search_depth(compacted, X_select, y_select, baseline - self.tolerance)
+        
+        if max_depth is not None and max_depth < compacted.max_depth:
+            compacted = self.truncate_depth(compacted, max_depth)
+            report['steps'].append({'step': 'truncate_depth', 'max_depth': int(max_depth)})
+        
+        if float32:
+            compacted = self.to_float32(compacted)
+            report['steps'].append({'step': 'float32'})
+        
+        compacted = self.narrow_indices(compacted)
+        
+        report['compacted'] = self._describe(compacted)
+        report['size_ratio'] = report['compacted']['bytes'] / max(report['original']['bytes'], 1)
+        
+        if has_validation:
+            original = self.score(runtime, X_report, y_report)
+            score = self.score(compacted, X_report, y_report)
+            report['validation'] = {
+                'metric': 'accuracy' if runtime.is_classifier else 'r2_score',
+                'rows': len(y_report),
+                'selection_rows': len(y_select) if (prune_trees or prune_depth) else 0,
+                'original': original,
+                'compacted': score,
+                'delta': score - original
+            }
+        
+        return compacted, report
+    
+    def split_validation(self, X, y):
+        """``(X_select, y_select, X_holdout, y_holdout)``: a seeded random split of the validation rows"""
+        n_rows = len(y)
+        n_holdout = min(max(int(round(n_rows * self.holdout)), 1), n_rows - 1)
+        order = np.random.default_rng(self.random_state).permutation(n_rows)
+        select, holdout = np.sort(order[n_holdout:]), np.sort(order[:n_holdout])
+        return _take(X, select), _take(y, select), _take(X, holdout), _take(y, holdout)
+    
+    @staticmethod
+    def score(runtime, X, y):
+        """Accuracy for classifiers, R² for regressors"""
+        from sklearn.metrics import accuracy_score, r2_score
+        
+        predictions = runtime.predict(X)
+        if runtime.is_classifier:
+            return float(accuracy_score(y, predictions))
+        return float(r2_score(y, predictions))
+    
+    def prune_trees(self, runtime, X_val, y_val, min_score):
+        """Keep the smallest set of individually best trees that still reaches ``min_score``"""
+        leaf_values = runtime.value[runtime.apply(X_val)].astype(np.float64)  # (n, trees[, classes])
+        y_val = np.asarray(y_val)
+        
+        # Rank trees by their own validation score
+        tree_scores = np.array([
+            self._score_values(runtime, leaf_values[:, t], y_val) for t in range(runtime.n_trees)
+        ])
+        order = np.argsort(-tree_scores, kind='stable')
+        
+        # Ensemble score of every prefix of the ranking in one cumulative pass
+        prefix_sums = np.cumsum(leaf_values[:, order], axis=1)
+        n_kept = runtime.n_trees
+        for k in range(1, runtime.n_trees + 1):
+            if self._score_values(runtime, prefix_sums[:, k - 1] / k, y_val) >= min_score:
+                n_kept = k
+                break
+        
+        return self.select_trees(runtime, np.sort(order[:n_kept])), n_kept
+    
+    def search_depth(self, runtime, X_val, y_val, min_score):
+        """Shallowest maximum depth whose validation score still reaches ``min_score``"""
+        best = runtime.max_depth
+        for depth in range(runtime.max_depth - 1, 0, -1):
+            if self.score(self.truncate_depth(runtime, depth), X_val, y_val) < min_score:
+                break
+            best = depth
+        return best
+    
+    @staticmethod
+    def _score_values(runtime, values, y):
+        from sklearn.metrics import accuracy_score, r2_score
+        
+        if runtime.is_classifier:
+            return accuracy_score(y, runtime.classes_.take(np.argmax(values, axis=1)))
+        return r2_score(y, values)
+    
+    @staticmethod
+    def select_trees(runtime, tree_ids):
+        """New runtime containing only the given trees, in the given order"""
+        bounds = np.append(runtime.roots, runtime.n_nodes)
+        keep = np.concatenate([np.arange(bounds[t], bounds[t + 1]) for t in tree_ids])
+        return ModelCompactor._subset_nodes(runtime, keep)
+    
+    @staticmethod
+    def node_depths(runtime):
+        """Depth of every reachable node (-1 for unreachable ones)"""
+        depth = np.full(runtime.n_nodes, -1, dtype=np.int32)
+        frontier = runtime.roots.astype(np.int64)
+        level = 0
+        
+        while len(frontier):
+            depth[frontier] = level
+            internal = frontier[runtime.left[frontier] != frontier]
+            frontier = np.concatenate([runtime.left[internal], runtime.right[internal]]).astype(np.int64)
+            level += 1
+        
+        return depth
+    
+    @staticmethod
+    def truncate_depth(runtime, max_depth):
+        """Turn every node at ``max_depth`` into a leaf and drop what lies below"""
+        depth = ModelCompactor.node_depths(runtime)
+        keep = np.flatnonzero((depth >= 0) & (depth <= max_depth))
+        
+        truncated = ModelCompactor._subset_nodes(runtime, keep, leaf_mask=depth[keep] == max_depth)
+        truncated.max_depth = min(runtime.max_depth, int(max_depth))
+        return truncated
+    
+    @staticmethod
+    def _subset_nodes(runtime, keep, leaf_mask=None):
+        """Runtime made of the ``keep`` nodes, with child pointers renumbered"""
+        new_index = np.full(runtime.n_nodes, -1, dtype=np.int64)
+        new_index[keep] = np.arange(len(keep))
+        own_index = np.arange(len(keep))
+        
+        left = new_index[runtime.left[keep]]
+        right = new_index[runtime.right[keep]]
+        feature = runtime.feature[keep].copy()
+        threshold = runtime.threshold[keep].copy()
+        
+        if leaf_mask is not None:
+            # Internal nodes' values hold their subtree's training distribution
+            left[leaf_mask] = own_index[leaf_mask]
+            right[leaf_mask] = own_index[leaf_mask]
+            feature[leaf_mask] = 0
+            threshold[leaf_mask] = np.inf
+        
+        roots = runtime.roots[np.isin(runtime.roots, keep)]
+        
+        return FlatTreeEnsemble(
+            feature=feature,
+            threshold=threshold,
+            left=left.astype(runtime.left.dtype),
+            right=right.astype(runtime.right.dtype),
+            missing_left=runtime.missing_left[keep].copy(),
+            value=np.ascontiguousarray(runtime.value[keep]),
+            roots=new_index[roots].astype(runtime.roots.dtype),
+            max_depth=runtime.max_depth,
+            n_features=runtime.n_features,
+            classes=runtime.classes_
+        )
+    
+    @staticmethod
+    def to_float32(runtime):
+        """float32 thresholds and leaf values
+        
+        Each threshold is rounded down to the largest float32 not above it. Inputs
+        are compared as float32, so every split still sends each row the same way.
+        """
+        threshold = runtime.threshold.astype(np.float32)
+        rounded_up = threshold.astype(np.float64) > runtime.threshold
+        threshold[rounded_up] = np.nextafter(threshold[rounded_up], np.float32(-np.inf))
+        
+        return FlatTreeEnsemble(
+            feature=runtime.feature,
+            threshold=threshold,
+            left=runtime.left,
+            right=runtime.right,
+            missing_left=runtime.missing_left,
+            value=runtime.value.astype(np.float32),
+            roots=runtime.roots,
+            max_depth=runtime.max_depth,
+            n_features=runtime.n_features,
+            classes=runtime.classes_
+        )
+    
+    @staticmethod
+    def narrow_indices(runtime):
+        """Smallest integer dtypes that can hold node and feature indices"""
+        node_dtype = np.int16 if runtime.n_nodes < np.iinfo(np.int16).max else np.int32
+        feature_dtype = np.int16 if runtime.n_features < np.iinfo(np.int16).max else np.int32
+        
+        return FlatTreeEnsemble(
+            feature=runtime.feature.astype(feature_dtype),
+            threshold=runtime.threshold,
+            left=runtime.left.astype(node_dtype),
+            right=runtime.right.astype(node_dtype),
+            missing_left=runtime.missing_left,
+            value=runtime.value,
+            roots=runtime.roots.astype(node_dtype),
+            max_depth=runtime.max_depth,
+            n_features=runtime.n_features,
+            classes=runtime.classes_
+        )
+    
+    @staticmethod
+    def _describe(runtime):
+        return {
+            'trees': runtime.n_trees,
+            'nodes': runtime.n_nodes,
+            'max_depth': runtime.max_depth,
+            'bytes': runtime.nbytes
+        }
+
+def _take(values, rows):
+    """Rows of a DataFrame, Series or array by position"""
+    return values.iloc[rows] if hasattr(values, 'iloc') else np.asarray(values)[rows]
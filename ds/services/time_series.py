@@ -0,0 +1,391 @@
+import pandas as pd
+import numpy as np
+import warnings
+
+from config.settings import Config
+
+NS_PER_DAY = 86400 * 10**9
+
+# Resampling frequencies: numpy datetime unit, approximate width in ns and
+# the seasonal period checked at that resolution
+FREQUENCIES = {
+    's': ('s', 10**9, 60),
+    'min': ('m', 60 * 10**9, 60),
+    'h': ('h', 3600 * 10**9, 24),
+    'D': ('D', NS_PER_DAY, 7),
+    'W': ('W', 7 * NS_PER_DAY, 52),
+    'M': ('M', int(30.436875 * NS_PER_DAY), 12)
+}
+
+SEASON_NAMES = {'s': 'minutely', 'min': 'hourly', 'h': 'daily', 'D': 'weekly', 'W': 'yearly', 'M': 'yearly'}
+
+# Critical value of sup|Brownian bridge| at the 5% level: a standardized CUSUM
+# peak must exceed it to be reported as a change point
+CUSUM_CRITICAL = 1.358
+
+# A reported level shift must also move the mean by this many within-segment
+# standard deviations
+MIN_SHIFT_EFFECT = 1.0
+
+class TimeSeriesAnalyzer:
+    """Trend, rolling, seasonality and change-point analysis over real timestamps
+    
+    The datetime column is detected once and all numeric columns are resampled
+    onto one regular grid in a single sort + ``reduceat`` pass. Every metric is
+    then computed for all columns together on the (periods x columns) matrix.
+    """
+    
+    def __init__(self, max_points=None, datetime_sample=100):
+        self.max_points = max_points or Config.TIME_SERIES_MAX_POINTS
+        self.datetime_sample = datetime_sample
+    
+    def detect_datetime_columns(self, df):
+        """Datetime columns, including text columns whose values parse as dates"""
+        detected = list(df.select_dtypes(include=['datetime64', 'datetimetz']).columns)
+        
+        for col in df.select_dtypes(include=['object', 'string']).columns:
+            sample = df[col].dropna().head(self.datetime_sample)
+            if len(sample) == 0:
+                continue
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')  # pandas warns when it has to guess the format
+                parsed = pd.to_datetime(sample, errors='coerce', format='mixed')
+            if parsed.notna().mean() >= 0.9:
+                detected.append(col)
+        
+        return detected
+    
+    def analyze(self, df, time_column=None, freq=None, agg='mean', window=None):
+        """Resample numeric columns onto ``time_column`` and compute every metric
+        
+        Returns None when the frame has no usable datetime or numeric column.
+        """
+        if time_column is None:
+            candidates = self.detect_datetime_columns(df)
+            if not candidates:
+                return None
+            time_column = candidates[0]
+        
+        numeric_cols = [col for col in df.select_dtypes(include=[np.number]).columns if col != time_column]
+        timestamps = self._to_datetime(df[time_column])
+        valid = timestamps.notna().to_numpy()
+        if not numeric_cols or valid.sum() < 3:
+            return None
+        
+        ts = timestamps.to_numpy()[valid].astype('datetime64[ns]').astype(np.int64)
+        X = df.loc[valid, numeric_cols].to_numpy(dtype=float)
+        
+        freq = freq or self.infer_frequency(ts)
+        if freq not in FREQUENCIES:
+            raise ValueError(f"Unsupported frequency: {freq} (expected one of {', '.join(FREQUENCIES)})")
+        periods, Y, counts = self.resample(ts, X, freq, agg)
+        
+        window = window or max(3, len(periods) // 10)
+        season = FREQUENCIES[freq][2]
+        
+        trend = self.trend(Y, FREQUENCIES[freq][1])
+        rolling = self.rolling(Y, window)
+        seasonality = self.seasonality_strength(Y, season)
+        change_points = self.change_points(Y, trend['correlation'])
+        
+        columns = {}
+        for j, col in enumerate(numeric_cols):
+            split = change_points['index'][j]
+            columns[col] = {
+                'trend': {key: _float(values[j]) for key, values in trend.items()},
+                'rolling': {key: _float(values[j]) for key, values in rolling.items()},
+                'seasonality': {'period': season, 'strength': _float(seasonality[j])},
+                'change_point': {
+                    'timestamp': str(periods[split]) if split >= 0 else None,
+                    'score': _float(change_points['score'][j]),
+                    'before_mean': _float(change_points['before_mean'][j]),
+                    'after_mean': _float(change_points['after_mean'][j]),
+                    'significant': bool(change_points['significant'][j])
+                }
+            }
+        
+        return {
+            'time_column': time_column,
+            'frequency': freq,
+            'aggregation': agg,
+            'start': str(periods[0]),
+            'end': str(periods[-1]),
+            'periods': len(periods),
+            'empty_periods': int((counts == 0).sum()),
+            'window': window,
+            'columns': columns
+        }
+    
+    def _to_datetime(self, values):
+        if pd.api.types.is_datetime64_any_dtype(values):
+            if getattr(values.dt, 'tz', None) is not None:
+                values = values.dt.tz_convert('UTC').dt.tz_localize(None)
+            return values
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            return pd.to_datetime(values, errors='coerce', format='mixed', utc=True).dt.tz_localize(None)
+    
+    def infer_frequency(self, ts):
+        """Finest frequency at least as wide as the typical gap that keeps the grid within ``max_points``"""
+        unique = np.unique(ts)
+        gap = np.median(np.diff(unique)) if len(unique) > 1 else NS_PER_DAY
+        span = unique[-1] - unique[0]
+        
+        for freq, (_, width, _) in FREQUENCIES.items():
+            if width >= gap and span / width < self.max_points:
+                return freq
+        return 'M'
+    
+    @staticmethod
+    def period_codes(ts, freq):
+        """Integer period number of each timestamp (weeks start on Monday)"""
+        unit = FREQUENCIES[freq][0]
+        if unit == 'W':
+            # 1970-01-01 was a Thursday
+            return (ts.astype('datetime64[ns]').astype('datetime64[D]').astype(np.int64) + 3) // 7
+        return ts.astype('datetime64[ns]').astype(f'datetime64[{unit}]').astype(np.int64)
+    
+    @staticmethod
+    def period_starts(codes, freq):
+        unit = FREQUENCIES[freq][0]
+        if unit == 'W':
+            return (codes * 7 - 3).astype('datetime64[D]')
+        return codes.astype(f'datetime64[{unit}]')
+    
+    def resample(self, ts, X, freq, agg='mean'):
+        """Aggregate rows into a dense regular grid of periods
+        
+        Returns ``(period_starts, Y, row_counts)``; ``Y`` is (periods x columns) with
+        NaN for periods without values (``agg='mean'``) or 0 (``agg='sum'``).
+        """
+        codes = self.period_codes(ts, freq)
+        first = codes.min()
+        grid = np.arange(first, codes.max() + 1)
+        index = codes - first
+        
+        order = np.argsort(index, kind='stable')
+        index = index[order]
+        X = X[order]
+        present = ~np.isnan(X)
+        
+        starts = np.flatnonzero(np.r_[True, index[1:] != index[:-1]])
+        occupied = index[starts]
+        
+        sums = np.add.reduceat(np.where(present, X, 0.0), starts, axis=0)
+        value_counts = np.add.reduceat(present.astype(np.int64), starts, axis=0)
+        
+        counts = np.zeros(len(grid), dtype=np.int64)
+        counts[occupied] = np.diff(np.r_[starts, len(index)])
+        
+        if agg == 'sum':
+            Y = np.zeros((len(grid), X.shape[1]))
+            Y[occupied] = sums
+        elif agg == 'mean':
+            Y = np.full((len(grid), X.shape[1]), np.nan)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                Y[occupied] = sums / value_counts
+        else:
+            raise ValueError(f"Unsupported aggregation: {agg}")
+        
+        return self.period_starts(grid, freq), Y, counts
+    
+    @staticmethod
+    def trend(Y, period_ns):
+        """Least-squares slope and correlation against time for every column"""
+        present = ~np.isnan(Y)
+        n = present.sum(axis=0).astype(float)
+        t = np.arange(len(Y), dtype=float)[:, np.newaxis]
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            t_mean = (t * present).sum(axis=0) / n
+            y_mean = np.nansum(Y, axis=0) / n
+            t_centered = np.where(present, t - t_mean, 0.0)
+            y_centered = np.where(present, Y - y_mean, 0.0)
+            
+            covariance = (t_centered * y_centered).sum(axis=0)
+            t_variance = (t_centered * t_centered).sum(axis=0)
+            y_variance = (y_centered * y_centered).sum(axis=0)
+            
+            slope = covariance / t_variance
+            correlation = covariance / np.sqrt(t_variance * y_variance)
+            span = np.where(present, t, np.nan)
+            relative_change = slope * (np.nanmax(span, axis=0) - np.nanmin(span, axis=0)) / np.abs(y_mean)
+        
+        return {
+            'slope_per_period': slope,
+            'slope_per_day': slope * NS_PER_DAY / period_ns,
+            'correlation': np.where(n >= 3, correlation, np.nan),
+            'relative_change': relative_change,
+            'mean': y_mean
+        }
+    
+    @staticmethod
+    def rolling_mean_std(Y, window):
+        """Trailing rolling mean and standard deviation (NaN-aware) via cumulative sums"""
+        present = ~np.isnan(Y)
+        values = np.where(present, Y, 0.0)
+        
+        def window_sum(a):
+            cumulative = np.cumsum(np.vstack([np.zeros((1, a.shape[1])), a]), axis=0)
+            return cumulative[window:] - cumulative[:-window]
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            n = window_sum(present.astype(float))
+            mean = window_sum(values) / n
+            variance = window_sum(values * values) / n - mean * mean
+            std = np.sqrt(np.maximum(variance, 0.0) * n / (n - 1))
+        
+        return mean, std
+    
+    def rolling(self, Y, window):
+        """Summary of the rolling window statistics: first vs last level and volatility"""
+        window = min(window, len(Y))
+        mean, std = self.rolling_mean_std(Y, window)
+        
+        with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            level = np.abs(np.nanmean(Y, axis=0))
+            return {
+                'window': np.full(Y.shape[1], window, dtype=float),
+                'first_mean': mean[0],
+                'last_mean': mean[-1],
+                'last_std': std[-1],
+                'volatility': np.nanmean(std, axis=0) / level
+            }
+    
+    @staticmethod
+    def seasonality_strength(Y, period):
+        """Strength of a ``period``-long seasonal pattern, in [0, 1], per column
+        
+        The series is detrended with a centered moving average of one period,
+        the seasonal component is the mean detrended value per phase, and the
+        strength is ``1 - Var(remainder) / Var(detrended)``.
+        """
+        if len(Y) < 2 * period:
+            return np.full(Y.shape[1], np.nan)
+        
+        present = ~np.isnan(Y)
+        values = np.where(present, Y, 0.0)
+        cumulative = np.cumsum(np.vstack([np.zeros((1, Y.shape[1])), values]), axis=0)
+        cumulative_n = np.cumsum(np.vstack([np.zeros((1, Y.shape[1])), present]), axis=0)
+        
+        # Centered moving average over one full period
+        half = period // 2
+        low = np.clip(np.arange(len(Y)) - half, 0, len(Y))
+        high = np.clip(np.arange(len(Y)) - half + period, 0, len(Y))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            trend = (cumulative[high] - cumulative[low]) / (cumulative_n[high] - cumulative_n[low])
+        detrended = Y - trend
+        
+        # Seasonal component: mean detrended value per phase (one-hot matrix product)
+        usable = ~np.isnan(detrended)
+        phases = np.arange(len(Y)) % period
+        onehot = np.zeros((len(Y), period))
+        onehot[np.arange(len(Y)), phases] = 1.0
+        with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            seasonal = (onehot.T @ np.where(usable, detrended, 0.0)) / (onehot.T @ usable)
+            remainder = detrended - seasonal[phases]
+            strength = 1 - np.nanvar(remainder, axis=0) / np.nanvar(detrended, axis=0)
+        
+        return np.clip(strength, 0.0, 1.0)
+    
+    @staticmethod
+    def change_points(Y, trend_correlation=None):
+        """Most likely mean shift per column from the CUSUM of standardized values
+        
+        ``score`` is the CUSUM peak scaled like a Brownian bridge. A shift is
+        ``significant`` when the score exceeds ``CUSUM_CRITICAL``, the means move
+        by at least ``MIN_SHIFT_EFFECT`` within-segment deviations and (given the
+        trend correlation) two flat segments fit better than one straight line,
+        so gradual trends are not reported as level shifts.
+        """
+        present = ~np.isnan(Y)
+        n = present.sum(axis=0)
+        
+        with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            mean = np.nanmean(Y, axis=0)
+            std = np.nanstd(Y, axis=0)
+            cusum = np.cumsum(np.where(present, Y - mean, 0.0), axis=0)
+            split = np.argmax(np.abs(cusum[:-1]), axis=0) if len(Y) > 1 else np.zeros(Y.shape[1], dtype=int)
+            peak = np.abs(cusum[split, np.arange(Y.shape[1])])
+            score = peak / (std * np.sqrt(n))
+            
+            # Means on either side of the split (split index is the last "before" period)
+            cumulative = np.cumsum(np.where(present, Y, 0.0), axis=0)
+            cumulative_n = np.cumsum(present, axis=0)
+            columns = np.arange(Y.shape[1])
+            before_sum = cumulative[split, columns]
+            before_n = cumulative_n[split, columns]
+            before_mean = before_sum / before_n
+            after_mean = (cumulative[-1] - before_sum) / (n - before_n)
+            
+            # Residual sum of squares of the two-segment model vs. the straight line
+            total_squares = std * std * n
+            between_squares = before_n * (n - before_n) / n * (after_mean - before_mean) ** 2
+            split_squares = total_squares - between_squares
+            within_std = np.sqrt(np.maximum(split_squares, 0.0) / n)
+            significant = (score > CUSUM_CRITICAL) & (np.abs(after_mean - before_mean) >= MIN_SHIFT_EFFECT * within_std)
+            if trend_correlation is not None:
+                line_squares = total_squares * (1 - np.nan_to_num(np.asarray(trend_correlation, dtype=float)) ** 2)
+                significant &= split_squares < line_squares
+        
+        index = np.where(np.isfinite(score), np.minimum(split + 1, len(Y) - 1), -1)
+        return {
+            'index': index,
+            'score': score,
+            'before_mean': before_mean,
+            'after_mean': after_mean,
+            'significant': significant
+        }
+    
+    def insights(self, analysis):
+        """Trend, seasonality and change-point insights from ``analyze`` output"""
+        if not analysis:
+            return []
+        
+        insights = []
+        time_column = analysis['time_column']
+        season_name = SEASON_NAMES.get(analysis['frequency'], 'periodic')
+        
+        for col, metrics in analysis['columns'].items():
+            trend = metrics['trend']
+            if trend['correlation'] is not None and abs(trend['correlation']) > 0.7:
+                direction = "increasing" if trend['slope_per_day'] > 0 else "decreasing"
+                insights.append({
+                    "type": "insight",
+                    "category": "trend",
+                    "message": f"📈 '{col}' is {direction} by {abs(trend['slope_per_day']):.4g} per day over '{time_column}' (correlation: {trend['correlation']:.3f})",
+                    "severity": "medium",
+                    "recommendation": f"Monitor this {direction} pattern for business implications",
+                    "column": col
+                })
+            
+            strength = metrics['seasonality']['strength']
+            if strength is not None and strength > 0.6:
+                insights.append({
+                    "type": "insight",
+                    "category": "seasonality",
+                    "message": f"🔁 '{col}' shows a strong {season_name} pattern (seasonality strength: {strength:.2f})",
+                    "severity": "medium",
+                    "recommendation": "Account for seasonality in forecasts and comparisons",
+                    "column": col
+                })
+            
+            change = metrics['change_point']
+            if change['significant']:
+                insights.append({
+                    "type": "warning",
+                    "category": "change_point",
+                    "message": f"⚡ Level shift in '{col}' around {change['timestamp']}: mean {change['before_mean']:.4g} → {change['after_mean']:.4g}",
+                    "severity": "high" if change['score'] > 2 * CUSUM_CRITICAL else "medium",
+                    "recommendation": "Check for an event, release or data change at this time",
+                    "column": col
+                })
+        
+        return insights
+
+def _float(value):
+    value = float(value)
+    return value if np.isfinite(value) else None
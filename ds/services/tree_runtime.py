@@ -0,0 +1,199 @@
+import numpy as np
+
+from utils.startup import load_attribute
+
+TREE_LEAF = -1
+
+class FlatTreeEnsemble:
+    """NumPy-only inference runtime for fitted sklearn tree ensembles
+    
+    Every tree of the ensemble is flattened into shared contiguous node arrays
+    (feature, threshold, left/right child, missing-value direction, leaf value).
+    Leaves point to themselves, so all rows and all trees descend one level
+    per vectorized step and evaluation needs at most ``max_depth`` steps.
+    Outputs match sklearn's ``predict``/``predict_proba`` for the same inputs.
+    """
+    
+    # Serving a flattened runtime needs NumPy only; sklearn is imported when
+    # an estimator is checked or flattened
+    SUPPORTED_ESTIMATORS = (
+        'sklearn.ensemble:RandomForestClassifier', 'sklearn.ensemble:RandomForestRegressor',
+        'sklearn.ensemble:ExtraTreesClassifier', 'sklearn.ensemble:ExtraTreesRegressor',
+        'sklearn.tree:DecisionTreeClassifier', 'sklearn.tree:DecisionTreeRegressor'
+    )
+    
+    ARRAY_FIELDS = ('feature', 'threshold', 'left', 'right', 'missing_left', 'value', 'roots')
+    
+    def __init__(self, feature, threshold, left, right, missing_left, value, roots,
+                 max_depth, n_features, classes=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+        self.classes_ = classes
+    
+    @classmethod
+    def supports(cls, model):
+        """Whether ``model`` is a fitted single-output tree ensemble this runtime can serve"""
+        if not isinstance(model, tuple(load_attribute(path) for path in cls.SUPPORTED_ESTIMATORS)):
+            return False
+        return getattr(model, 'n_outputs_', 1) == 1 and (
+            hasattr(model, 'estimators_') or hasattr(model, 'tree_')
+        )
+    
+    @classmethod
+    def from_estimator(cls, model):
+        """Flatten a fitted sklearn tree ensemble (or single tree) into node arrays"""
+        if not cls.supports(model):
+            raise ValueError(f"Unsupported estimator for tree runtime: {type(model).__name__}")
+        
+        trees = [est.tree_ for est in model.estimators_] if hasattr(model, 'estimators_') else [model.tree_]
+        is_classifier = hasattr(model, 'classes_')
+        
+        features, thresholds, lefts, rights, missing, values, roots = [], [], [], [], [], [], []
+        offset = 0
+        
+        for tree in trees:
+            node_ids = np.arange(tree.node_count, dtype=np.int32) + offset
+            is_leaf = tree.children_left == TREE_LEAF
+            
+            # Leaves become self-loops so extra descent steps are no-ops
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset).astype(np.int32))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset).astype(np.int32))
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            if hasattr(tree, 'missing_go_to_left'):
+                missing.append(np.asarray(tree.missing_go_to_left, dtype=bool))
+            else:
+                missing.append(np.zeros(tree.node_count, dtype=bool))
+            
+            if is_classifier:
+                # Same normalization DecisionTreeClassifier.predict_proba applies
+                proba = tree.value[:, 0, :].copy()
+                normalizer = proba.sum(axis=1)[:, np.newaxis]
+                normalizer[normalizer == 0.0] = 1.0
+                proba /= normalizer
+                values.append(proba)
+            else:
+                values.append(tree.value[:, 0, 0].copy())
+            
+            roots.append(offset)
+            offset += tree.node_count
+        
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            missing_left=np.concatenate(missing),
+            value=np.ascontiguousarray(np.concatenate(values)),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max(tree.max_depth for tree in trees),
+            n_features=model.n_features_in_,
+            classes=np.asarray(model.classes_) if is_classifier else None
+        )
+    
+    @property
+    def is_classifier(self):
+        return self.classes_ is not None
+    
+    @property
+    def n_trees(self):
+        return len(self.roots)
+    
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+    
+    @property
+    def nbytes(self):
+        """Memory footprint of the node arrays"""
+        return int(sum(getattr(self, name).nbytes for name in self.ARRAY_FIELDS))
+    
+    def apply(self, X):
+        """Leaf index reached in every tree, shape (n_samples, n_trees)"""
+        X = self._validate(X)
+        rows = np.arange(X.shape[0])[:, np.newaxis]
+        nodes = np.repeat(self.roots[np.newaxis, :], X.shape[0], axis=0)
+        
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[nodes]]
+            go_left = x <= self.threshold[nodes]
+            go_left |= np.isnan(x) & self.missing_left[nodes]
+            next_nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+            if np.array_equal(next_nodes, nodes):
+                break
+            nodes = next_nodes
+        
+        return nodes
+    
+    def predict_proba(self, X):
+        """Class probabilities averaged over trees"""
+        if not self.is_classifier:
+            raise ValueError("predict_proba is only available for classifiers")
+        return self._average(self.value[self.apply(X)])
+    
+    def predict(self, X):
+        """Predicted class labels or regression values"""
+        return self.evaluate(X)[0]
+    
+    def evaluate(self, X):
+        """Predictions plus class probabilities (None for regressors) from one traversal"""
+        leaf_values = self.value[self.apply(X)]
+        
+        if self.is_classifier:
+            proba = self._average(leaf_values)
+            return self.classes_.take(np.argmax(proba, axis=1), axis=0), proba
+        
+        return self._average(leaf_values), None
+    
+    def _average(self, leaf_values):
+        """Mean over the tree axis, summed tree by tree in estimator order like sklearn"""
+        leaf_values = leaf_values.astype(np.float64, copy=False)
+        total = np.cumsum(leaf_values, axis=1)[:, -1]
+        return total / self.n_trees
+    
+    def _validate(self, X):
+        # sklearn tree ensembles evaluate splits on float32 inputs
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+        return X
+    
+    def to_arrays(self):
+        """Plain dict of arrays and metadata, e.g. for ``np.savez``"""
+        arrays = {name: getattr(self, name) for name in self.ARRAY_FIELDS}
+        arrays['max_depth'] = np.asarray(self.max_depth)
+        arrays['n_features'] = np.asarray(self.n_features)
+        if self.is_classifier:
+            # Object labels are stored as unicode so the file loads without pickle
+            arrays['classes'] = self.classes_.astype(str) if self.classes_.dtype == object else self.classes_
+        return arrays
+    
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Rebuild a runtime from ``to_arrays`` output"""
+        return cls(
+            **{name: np.asarray(arrays[name]) for name in cls.ARRAY_FIELDS},
+            max_depth=int(arrays['max_depth']),
+            n_features=int(arrays['n_features']),
+            classes=np.asarray(arrays['classes']) if 'classes' in arrays else None
+        )
+    
+    def save(self, path):
+        """Save node arrays to an uncompressed ``.npz`` file"""
+        with open(path, 'wb') as f:
+            np.savez(f, **self.to_arrays())
+    
+    @classmethod
+    def load(cls, path):
+        """Load a runtime saved with ``save``"""
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls.from_arrays(dict(arrays))
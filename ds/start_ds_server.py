@@ -33,8 +33,11 @@ def install_dependencies():
 
 def check_backend_server():
     """Check if the main website backend is running"""
+    # Imported after install_dependencies(): the client needs aiohttp
+    from utils.http_client import get_client
+    
     try:
-        response = requests.get("http://localhost:4000/api/health", timeout=5)
+        response = get_client("http://localhost:4000").get("/api/health", endpoint="health")
         if response.status_code == 200:
             print("✅ Website backend server is running")
             return True
@@ -47,8 +50,10 @@ def check_backend_server():
 
 def check_frontend_server():
     """Check if the frontend is running"""
+    from utils.http_client import get_client
+    
     try:
-        response = requests.get("http://localhost:3000", timeout=5)
+        response = get_client("http://localhost:3000").get("/", endpoint="health")
         if response.status_code == 200:
             print("✅ Website frontend server is running")
             return True
@@ -58,8 +63,27 @@ def check_frontend_server():
     print("⚠️ Website frontend server not detected at localhost:3000")
     return False
 
-def start_server():
+def start_production_server():
+    """Replace this process with a gunicorn master serving ``wsgi:app``"""
+    print("🚀 Starting Swaggo Data Science Server (production, gunicorn)...")
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        print("❌ gunicorn is not installed (pip install -r requirements.txt; not available on Windows)")
+        return False
+    
+    server_dir = os.path.dirname(os.path.abspath(__file__))
+    os.chdir(server_dir)
+    os.environ.setdefault('DS_CONFIG', 'production')
+    os.execv(sys.executable, [sys.executable, "-m", "gunicorn", "--config", "gunicorn.conf.py", "wsgi:app"])
+
+def start_server(production=False):
     """Start the data science server"""
+    from config.settings import get_config, ProductionConfig
+    
+    if production or get_config() is ProductionConfig:
+        return start_production_server()
+    
     print("🚀 Starting Swaggo Data Science Server...")
     
     # Set environment variables
@@ -68,8 +92,8 @@ def start_server():
     
     # Start the Flask app
     try:
-        from app import app
-        app.run(debug=True, host='0.0.0.0', port=5000)
+        from app import app, app_config
+        app.run(debug=app_config.DEBUG, host=app_config.HOST, port=app_config.PORT)
     except ImportError as e:
         print(f"❌ Failed to import app: {e}")
         print("Make sure all dependencies are installed")
@@ -111,7 +135,7 @@ def main():
     # Start server
     print("\\n" + "=" * 50)
     try:
-        start_server()
+        start_server(production='--production' in sys.argv)
     except KeyboardInterrupt:
         print("\\n\\n⏹️ Server stopped by user")
         print("👋 Thanks for using Swaggo Data Science Server!")
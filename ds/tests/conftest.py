@@ -0,0 +1,64 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Modules import each other as top-level packages (``from utils.x import Y``)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run in an empty directory: models/, data/ and uploads/ are relative paths"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+@pytest.fixture
+def labeled_frame():
+    """Small classification data set with a numeric, an integer and a categorical feature"""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'a': rng.normal(size=300),
+        'b': rng.integers(0, 5, 300),
+        'cat': rng.choice(['x', 'y', 'z'], 300)
+    })
+    df['label'] = np.where(df['a'] + (df['cat'] == 'x') > 0.5, 'yes', 'no')
+    return df
+
+@pytest.fixture
+def app_module(workdir):
+    """The Flask app module (imported once; its services are module-level singletons)"""
+    import app
+    
+    app.app.config['TESTING'] = True
+    return app
+
+@pytest.fixture
+def stub_options():
+    """Behaviour of the ``stubs`` servers; tests may change it while they run"""
+    from benchmarks.stub_services import StubOptions
+    
+    return StubOptions()
+
+@pytest.fixture
+def stubs(stub_options):
+    """Stand-in website backend and frontend from benchmarks.stub_services; yields their base URLs"""
+    from benchmarks.stub_services import start_stubs
+    
+    servers = start_stubs(options=stub_options)
+    yield tuple(f"http://127.0.0.1:{server.server_port}" for server in servers)
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+@pytest.fixture
+def forest_data():
+    """Fitted random forest classifier with validation rows (NaNs included)"""
+    from sklearn.datasets import make_classification
+    from sklearn.ensemble import RandomForestClassifier
+    
+    X, y = make_classification(n_samples=1200, n_features=8, n_informative=5, random_state=0)
+    X[::37, 2] = np.nan
+    model = RandomForestClassifier(n_estimators=40, max_depth=10, random_state=0).fit(X[:800], y[:800])
+    return model, X[800:], y[800:]
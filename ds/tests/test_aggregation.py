@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.aggregation import GroupByAggregator
+
+@pytest.fixture
+def sales(workdir):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'region': rng.choice(['north', 'south', 'east'], 1000),
+        'store': rng.integers(0, 4, 1000),
+        'amount': rng.normal(100, 25, 1000).round(2),
+        'day': pd.date_range('2024-01-01', periods=1000, freq='h')
+    })
+    df.loc[::17, 'amount'] = np.nan
+    (workdir / 'data').mkdir()
+    df.to_csv(workdir / 'data' / 'sales.csv', index=False)
+    return df
+
+def test_chunked_file_aggregation_matches_pandas(sales):
+    aggregator = GroupByAggregator(chunk_size=128)
+    result = aggregator.aggregate({
+        'path': 'sales.csv',
+        'group_by': ['region', 'store'],
+        'metrics': {'amount': ['count', 'sum', 'mean', 'min', 'max', 'std']}
+    })
+    
+    expected = sales.groupby(['region', 'store'])['amount'].agg(['count', 'sum', 'mean', 'min', 'max', 'std'])
+    groups = pd.DataFrame(result['groups']).set_index(['region', 'store'])
+    
+    assert result['rows_scanned'] == len(sales) and result['group_count'] == len(expected)
+    for agg in expected.columns:
+        np.testing.assert_allclose(groups[f'amount_{agg}'].astype(float), expected[agg], rtol=1e-9)
+    assert groups['rows'].sum() == len(sales)
+
+def test_chunks_are_merged_into_a_running_result(sales, monkeypatch):
+    aggregator = GroupByAggregator(chunk_size=100)
+    merged = []
+    combine = aggregator._combine
+    monkeypatch.setattr(aggregator, '_combine', lambda partials, *args: merged.append(len(partials)) or combine(partials, *args))
+    
+    aggregator.aggregate({'path': 'sales.csv', 'group_by': 'region', 'metrics': {'amount': 'var'}})
+    
+    assert merged == [2] * 9
+
+def test_datetime_keys_are_bucketed_by_frequency(sales):
+    result = GroupByAggregator().aggregate({
+        'data': sales.assign(day=sales['day'].astype(str)).to_dict('records'),
+        'group_by': [{'column': 'day', 'freq': 'D'}],
+        'metrics': {'amount': 'count'}
+    })
+    
+    assert result['group_count'] == sales['day'].dt.floor('D').nunique()
+    assert sum(group['rows'] for group in result['groups']) == len(sales)
+
+def test_repeated_queries_are_cached_until_the_file_changes(sales, workdir):
+    aggregator = GroupByAggregator()
+    query = {'path': 'sales.csv', 'group_by': 'region', 'metrics': {'amount': 'sum'}, 'sort': '-amount_sum'}
+    
+    assert aggregator.aggregate(query)['cached'] is False
+    assert aggregator.aggregate(query)['cached'] is True
+    
+    sales.head(10).to_csv(workdir / 'data' / 'sales.csv', index=False)
+    changed = aggregator.aggregate(query)
+    assert changed['cached'] is False and changed['rows_scanned'] == 10
+
+@pytest.mark.parametrize('query', [
+    {'data': [{'a': 1}], 'group_by': [], 'metrics': {}},
+    {'data': [{'a': 1}], 'group_by': 'a', 'metrics': {'a': 'median'}},
+    {'data': [{'a': 1}], 'group_by': 'b', 'metrics': {}},
+    {'path': '../etc/passwd', 'group_by': 'a', 'metrics': {}}
+])
+def test_invalid_queries_return_an_error(workdir, query):
+    assert 'error' in GroupByAggregator().aggregate(query)
@@ -0,0 +1,74 @@
+import io
+
+import pandas as pd
+import pytest
+
+from services.batch_scoring import BatchScorer
+from services.ml_models import MLPredictor
+
+@pytest.fixture
+def scorer(workdir, labeled_frame):
+    predictor = MLPredictor()
+    result = predictor.train_model(labeled_frame, 'label', 'random_forest', compact=False)
+    assert result.get('success'), result
+    return BatchScorer(predictor, chunk_size=50)
+
+def features_csv(df, **columns):
+    df = df.drop(columns=['label']).assign(**columns)
+    return io.BytesIO(df.to_csv(index=False).encode('utf-8'))
+
+def score(scorer, source, input_format='csv', output_format='csv', passthrough=None):
+    _, state = scorer.ml_predictor.get_model_state()
+    return b''.join(scorer.score(source, input_format, state, output_format=output_format, passthrough=passthrough))
+
+def test_predictions_use_original_labels(scorer, labeled_frame):
+    output = pd.read_csv(io.BytesIO(score(scorer, features_csv(labeled_frame))))
+    
+    assert len(output) == len(labeled_frame)
+    assert set(output['prediction']) <= {'no', 'yes'}
+    assert {'probability_no', 'probability_yes'} <= set(output.columns)
+    # The predicted label is the one with the highest probability
+    assert (output['prediction'] == output[['probability_no', 'probability_yes']].idxmax(axis=1).str[len('probability_'):]).all()
+
+def test_bad_input_is_rejected_before_streaming(scorer, labeled_frame):
+    _, state = scorer.ml_predictor.get_model_state()
+    
+    with pytest.raises(ValueError, match='passthrough'):
+        scorer.score(features_csv(labeled_frame), 'csv', state, passthrough=['no_such_column'])
+    with pytest.raises(ValueError, match='output format'):
+        scorer.score(features_csv(labeled_frame), 'csv', state, output_format='xml')
+    with pytest.raises(ValueError, match='input format'):
+        scorer.score(features_csv(labeled_frame), 'xlsx', state)
+
+def test_scoring_error_ends_stream_with_error_record(scorer, labeled_frame):
+    # The second chunk lacks the passthrough column
+    rows = labeled_frame.drop(columns=['label']).assign(id=range(len(labeled_frame)))
+    source = io.BytesIO((rows.head(50).to_json(orient='records', lines=True) + '\n' + rows.iloc[50:].drop(columns=['id']).to_json(orient='records', lines=True)).encode('utf-8'))
+    
+    lines = score(scorer, source, input_format='ndjson', output_format='ndjson', passthrough=['id']).decode('utf-8').splitlines()
+    
+    assert len(lines) == 51
+    assert '"error"' in lines[-1] and 'id' in lines[-1]
+
+def test_parquet_schema_is_pinned_across_chunks(scorer, labeled_frame):
+    pq = pytest.importorskip('pyarrow.parquet')
+    
+    # All null in the first chunk, strings afterwards
+    reference = [None] * 50 + [f'r{i}' for i in range(len(labeled_frame) - 50)]
+    body = score(scorer, features_csv(labeled_frame, reference=reference), output_format='parquet', passthrough=['reference'])
+    
+    table = pq.read_table(io.BytesIO(body))
+    assert table.num_rows == len(labeled_frame)
+    assert table.column('reference').to_pylist() == reference
+    assert b'error' not in (table.schema.metadata or {})
+
+def test_endpoint_answers_400_for_unknown_passthrough(app_module, labeled_frame):
+    assert app_module.ml_predictor.train_model(labeled_frame, 'label', 'random_forest', compact=False).get('success')
+    client = app_module.app.test_client()
+    
+    response = client.post('/api/predict/batch?passthrough=no_such_column', data={
+        'file': (features_csv(labeled_frame), 'rows.csv')
+    })
+    
+    assert response.status_code == 400
+    assert 'no_such_column' in response.get_json()['error']
@@ -0,0 +1,186 @@
+import threading
+import time
+
+import pytest
+
+from utils import cache as cache_module
+from utils.cache import SingleFlight, StaleWhileRevalidateCache, TTLCache
+from services.ml_models import MLPredictor
+
+class Clock:
+    """Stand-in for time.monotonic that only moves when told to"""
+    
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, 'monotonic', clock)
+    cache = TTLCache(max_entries=10, ttl=5)
+    cache.set('a', 1)
+    cache.set('b', 2, ttl=60)
+    
+    clock.now += 4
+    assert cache.get('a') == 1
+    clock.now += 2
+    assert cache.get('a') is None
+    assert cache.get('b') == 2
+    assert cache.stats()['expirations'] == 1
+
+def test_least_recently_used_entry_is_evicted_first():
+    cache = TTLCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+def test_repeated_rows_are_served_from_the_prediction_cache_per_version(workdir, labeled_frame):
+    predictor = MLPredictor()
+    model_name = predictor.partial_train(labeled_frame.iloc[:200], 'label')['model_name']
+    rows = labeled_frame.drop(columns='label').iloc[:5].to_dict('records')
+    
+    first = predictor.predict(rows, model_name)
+    assert predictor.prediction_cache.stats()['misses'] == 5
+    second = predictor.predict(rows, model_name)
+    assert second['predictions'] == first['predictions']
+    assert predictor.prediction_cache.stats()['hits'] == 5
+    
+    # A new version of the model must not serve the old version's rows
+    predictor.partial_train(labeled_frame.iloc[200:], 'label', model_name=model_name)
+    third = predictor.predict(rows, model_name)
+    assert third['model_version'] != first['model_version']
+    assert predictor.prediction_cache.stats()['hits'] == 5
+
+def test_byte_budget_evicts_least_recently_used_entries():
+    cache = TTLCache(max_entries=100, max_bytes=10, sizeof=len)
+    cache.set('a', 'xxxx')
+    cache.set('b', 'yyyy')
+    cache.set('c', 'zzzz')
+    cache.set('huge', 'w' * 11)
+    
+    assert cache.get('a') is None and cache.get('huge') is None
+    assert cache.stats()['bytes'] == 8
+
+def test_single_flight_runs_concurrent_calls_for_a_key_once():
+    flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+    
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'result'
+    
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do('key', slow))) for _ in range(5)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    while flight.stats()['shared'] < 4:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    
+    assert results == ['result'] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {'executions': 1, 'shared': 4, 'in_flight': 0}
+
+def test_single_flight_shares_errors_and_does_not_cache_them():
+    flight = SingleFlight()
+    
+    def fail():
+        raise ValueError('boom')
+    
+    with pytest.raises(ValueError):
+        flight.do('key', fail)
+    assert flight.do('key', lambda: 'ok') == 'ok'
+
+class Loader:
+    """``load`` callable for StaleWhileRevalidateCache returning numbered versions"""
+    
+    def __init__(self, ttl=None, delay=0.0):
+        self.ttl = ttl
+        self.delay = delay
+        self.calls = 0
+        self.fail = False
+    
+    def __call__(self, key):
+        time.sleep(self.delay)
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError('backend down')
+        return f"{key}-v{self.calls}", self.ttl
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+def test_stale_entries_are_served_while_refreshing(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, 'monotonic', clock)
+    loader = Loader()
+    cache = StaleWhileRevalidateCache(loader, ttl=10, stale_ttl=30)
+    
+    assert cache.get('user') == 'user-v1'
+    clock.now += 15
+    assert cache.get('user') == 'user-v1'  # stale, returned at once
+    assert wait_for(lambda: cache.peek('user') == ('user-v2', 'fresh'))
+    
+    clock.now += 50  # past ttl + stale_ttl: a plain miss again
+    assert cache.get('user') == 'user-v3'
+
+def test_failed_refresh_keeps_serving_the_stale_value(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, 'monotonic', clock)
+    loader = Loader()
+    cache = StaleWhileRevalidateCache(loader, ttl=10, stale_ttl=30)
+    cache.get('user')
+    
+    loader.fail = True
+    clock.now += 15
+    assert cache.get('user') == 'user-v1'
+    assert wait_for(lambda: cache.stats()['refresh_failures'] == 1)
+    assert cache.peek('user') == ('user-v1', 'stale')
+
+def test_concurrent_misses_share_one_load():
+    loader = Loader(delay=0.1)
+    cache = StaleWhileRevalidateCache(loader, ttl=10, stale_ttl=30)
+    
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get('user'))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    
+    assert results == ['user-v1'] * 8 and loader.calls == 1
+
+def test_loads_with_zero_ttl_are_not_cached():
+    loader = Loader(ttl=0)
+    cache = StaleWhileRevalidateCache(loader, ttl=10, stale_ttl=30)
+    
+    assert cache.get('user') == 'user-v1'
+    assert cache.get('user') == 'user-v2'
+    assert len(cache) == 0
+
+def test_publishing_a_new_version_does_not_scan_the_prediction_cache(workdir, labeled_frame, monkeypatch):
+    predictor = MLPredictor()
+    model_name = predictor.partial_train(labeled_frame.iloc[:100], 'label')['model_name']
+    
+    def scan(predicate=None):
+        raise AssertionError('prediction cache scanned on publish')
+    
+    monkeypatch.setattr(predictor.prediction_cache, 'invalidate', scan)
+    assert predictor.partial_train(labeled_frame.iloc[100:], 'label', model_name=model_name)['success']
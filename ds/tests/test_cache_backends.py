@@ -0,0 +1,70 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from utils.cache_backends import MmapCache, SQLiteCache, create_cache
+
+def open_cache(backend, path, **kwargs):
+    if backend == 'mmap':
+        return MmapCache(str(path / 'shared.mmap'), slots=64, slot_size=4096, **kwargs)
+    return SQLiteCache(str(path / 'shared.sqlite3'), namespace='test', max_entries=64, **kwargs)
+
+@pytest.mark.parametrize('backend', ['mmap', 'sqlite'])
+def test_instances_on_the_same_file_share_entries(backend, tmp_path):
+    writer, reader = open_cache(backend, tmp_path), open_cache(backend, tmp_path)
+    value = {'rows': np.arange(100), 'label': 'x' * 2000}
+    writer.set(('model', 'v1', 'abc'), value)
+    
+    shared = reader.get(('model', 'v1', 'abc'))
+    assert shared['label'] == value['label']
+    assert np.array_equal(shared['rows'], value['rows'])
+    
+    writer.delete(('model', 'v1', 'abc'))
+    assert reader.get(('model', 'v1', 'abc')) is None
+
+@pytest.mark.parametrize('backend', ['mmap', 'sqlite'])
+def test_entries_expire_for_every_instance(backend, tmp_path):
+    writer, reader = open_cache(backend, tmp_path), open_cache(backend, tmp_path)
+    writer.set('gone', 1, ttl=-1)
+    writer.set('kept', 2, ttl=60)
+    
+    assert reader.get('gone') is None
+    assert reader.get('kept') == 2
+
+def _write_from_child(path):
+    MmapCache(path, slots=64, slot_size=4096).set('from-child', [1, 2, 3])
+
+def test_mmap_entries_written_by_another_process_are_visible(tmp_path):
+    path = str(tmp_path / 'shared.mmap')
+    cache = MmapCache(path, slots=64, slot_size=4096)
+    child = multiprocessing.get_context('fork').Process(target=_write_from_child, args=(path,))
+    child.start()
+    child.join(10)
+    
+    assert child.exitcode == 0
+    assert cache.get('from-child') == [1, 2, 3]
+
+def test_mmap_skips_values_larger_than_a_slot(tmp_path):
+    cache = open_cache('mmap', tmp_path)
+    cache.set('big', np.random.default_rng(0).bytes(10000))  # incompressible
+    assert cache.get('big') is None
+
+def test_sqlite_namespaces_are_isolated_and_bounded(tmp_path):
+    path = str(tmp_path / 'shared.sqlite3')
+    first = SQLiteCache(path, namespace='first', max_entries=10)
+    second = SQLiteCache(path, namespace='second', max_entries=10)
+    second.set(0, 'other')
+    # Pruning runs every PRUNE_EVERY writes and keeps the newest entries
+    for i in range(SQLiteCache.PRUNE_EVERY):
+        first.set(i, i)
+    
+    assert len(first) == 10 and first.get(SQLiteCache.PRUNE_EVERY - 1) == SQLiteCache.PRUNE_EVERY - 1
+    assert first.get(0) is None
+    assert second.get(0) == 'other'
+    assert first.invalidate(lambda key: key % 2 == 0) == 5
+    assert len(second) == 1
+
+def test_create_cache_rejects_unknown_backends():
+    with pytest.raises(ValueError):
+        create_cache('x', backend='redis')
@@ -0,0 +1,85 @@
+import io
+
+import msgpack
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from werkzeug.datastructures import MIMEAccept
+
+from utils import columnar_io, json_utils
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        'id': np.arange(5, dtype=np.int64),
+        'score': [0.1, np.nan, 0.3, 0.4, 0.5],
+        'label': ['a', 'b', None, 'd', 'e'],
+        'when': pd.date_range('2024-01-01', periods=5, freq='D')
+    })
+
+@pytest.mark.parametrize('fmt', ['arrow', 'parquet', 'msgpack'])
+def test_frames_round_trip(frame, fmt):
+    decoded = columnar_io.decode_frame(columnar_io.encode_frame(frame, fmt), fmt)
+    
+    pd.testing.assert_frame_equal(decoded, frame, check_dtype=False)
+    assert decoded['id'].dtype == np.int64 and decoded['score'].dtype == np.float64
+
+@pytest.mark.parametrize('fmt', ['arrow', 'parquet'])
+def test_metadata_travels_in_the_schema(frame, fmt):
+    body = columnar_io.encode_frame(frame, fmt, metadata={'model_used': 'm1'})
+    if fmt == 'arrow':
+        schema = pa.ipc.open_stream(body).schema
+    else:
+        schema = pq.read_schema(io.BytesIO(body))
+    
+    assert json_utils.loads(schema.metadata[b'ds']) == {'model_used': 'm1'}
+
+def test_arrow_file_format_and_msgpack_row_lists_are_accepted(frame):
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    pd.testing.assert_frame_equal(columnar_io.decode_frame(sink.getvalue().to_pybytes(), 'arrow'), frame)
+    
+    rows = msgpack.packb([{'a': 1, 'b': 'x'}, {'a': 2, 'b': 'y'}])
+    assert columnar_io.decode_frame(rows, 'msgpack').to_dict('records') == [{'a': 1, 'b': 'x'}, {'a': 2, 'b': 'y'}]
+
+@pytest.mark.parametrize('accept, tabular, expected', [
+    ('*/*', True, 'json'),
+    ('application/vnd.apache.arrow.stream', True, 'arrow'),
+    ('application/vnd.apache.parquet, application/json;q=0.5', True, 'parquet'),
+    ('application/vnd.apache.arrow.stream', False, 'json'),
+    ('application/msgpack', False, 'msgpack')
+])
+def test_response_format_follows_the_accept_header(accept, tabular, expected):
+    accept_mimetypes = MIMEAccept([(value.split(';')[0].strip(), 0.5 if 'q=0.5' in value else 1)
+                                   for value in accept.split(',')])
+    assert columnar_io.response_format(accept_mimetypes, tabular=tabular) == expected
+
+def test_process_endpoint_accepts_arrow_and_answers_parquet(app_module, frame):
+    client = app_module.app.test_client()
+    body = columnar_io.encode_frame(frame[['id', 'score']], 'arrow')
+    
+    response = client.post('/api/process', data=body, headers={
+        'Content-Type': columnar_io.MEDIA_TYPES['arrow'],
+        'Accept': columnar_io.MEDIA_TYPES['parquet']
+    })
+    
+    assert response.status_code == 200
+    assert response.mimetype == columnar_io.MEDIA_TYPES['parquet']
+    table = pq.read_table(io.BytesIO(response.get_data()))
+    assert table.num_rows == len(frame)
+    assert 'processing_summary' in json_utils.loads(table.schema.metadata[b'ds'])
+
+def test_msgpack_clients_get_msgpack_documents(app_module, frame):
+    response = app_module.app.test_client().post(
+        '/api/analyze',
+        data=columnar_io.encode_frame(frame[['id', 'score']], 'msgpack'),
+        headers={'Content-Type': 'application/msgpack', 'Accept': 'application/msgpack'}
+    )
+    
+    assert response.status_code == 200
+    assert response.mimetype == 'application/msgpack'
+    assert msgpack.unpackb(response.get_data())['success'] is True
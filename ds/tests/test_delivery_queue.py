@@ -0,0 +1,85 @@
+import os
+import threading
+
+import pytest
+
+from utils import delivery_queue as delivery_queue_module
+from utils.delivery_queue import DeliveryQueue, DeliveryQueueFull
+
+class Receiver:
+    """send_batch callable that can be switched off"""
+    
+    def __init__(self, up=True):
+        self.up = up
+        self.batches = []
+        self.lock = threading.Lock()
+    
+    def __call__(self, items):
+        with self.lock:
+            if self.up:
+                self.batches.append(items)
+            return self.up
+    
+    @property
+    def items(self):
+        return [item for batch in self.batches for item in batch]
+
+def make_queue(receiver, spool_dir, **kwargs):
+    kwargs.setdefault('flush_interval', 0.01)
+    return DeliveryQueue(receiver, str(spool_dir), retry_interval=0.05, **kwargs)
+
+def test_items_are_coalesced_into_batches(tmp_path):
+    receiver = Receiver()
+    delivery = make_queue(receiver, tmp_path, max_batch=10, flush_interval=0.2)
+    
+    for i in range(25):
+        delivery.put({'i': i})
+    assert delivery.flush(timeout=5)
+    delivery.close()
+    
+    assert [item['i'] for item in receiver.items] == list(range(25))
+    assert len(receiver.batches) == 3
+
+def test_spooled_batches_survive_a_restart_and_are_retried(tmp_path):
+    down = Receiver(up=False)
+    first = make_queue(down, tmp_path)
+    first.put({'id': 1})
+    first.put({'id': 2})
+    assert first.flush(timeout=5)
+    first.close()
+    assert len(os.listdir(tmp_path)) >= 1 and down.items == []
+    
+    # A new process (new queue object) delivers what the previous one spooled
+    up = Receiver()
+    second = make_queue(up, tmp_path)
+    second.start()
+    for _ in range(200):
+        if len(up.items) == 2:
+            break
+        threading.Event().wait(0.02)
+    second.close()
+    
+    assert sorted(item['id'] for item in up.items) == [1, 2]
+    assert os.listdir(tmp_path) == []
+
+def test_full_queue_applies_backpressure(tmp_path):
+    blocked = threading.Event()
+    delivery = make_queue(lambda items: blocked.wait(5), tmp_path, max_pending=1, max_batch=1, put_timeout=0.05)
+    
+    delivery.put('a')  # taken by the flusher, which then blocks in send
+    with pytest.raises(DeliveryQueueFull):
+        for item in 'bcd':
+            delivery.put(item)
+    blocked.set()
+    delivery.close()
+
+def test_exit_handler_is_registered_once(tmp_path, monkeypatch):
+    registered = []
+    monkeypatch.setattr(delivery_queue_module.atexit, 'register', registered.append)
+    delivery = make_queue(Receiver(), tmp_path)
+    
+    for _ in range(3):
+        delivery.start()
+        delivery.close()
+    
+    assert registered == [delivery.close]
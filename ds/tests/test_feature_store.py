@@ -0,0 +1,55 @@
+from services.feature_store import FeatureStore, FeatureTable
+
+def test_upserts_merge_into_existing_vectors(tmp_path):
+    store = FeatureStore(snapshot_dir=str(tmp_path))
+    store.upsert('user_id', [{'user_id': 1, 'spend': 3.5, 'tier': 'gold'}, {'user_id': 2, 'spend': 1.0}])
+    
+    # Missing or null features keep their stored values
+    store.upsert('user_id', [{'user_id': 1, 'spend': None, 'visits': 4}])
+    
+    assert store.get('user_id', '1') == {'spend': 3.5, 'tier': 'gold', 'visits': 4.0}
+    assert store.get('user_id', 2) == {'spend': 1.0, 'tier': None, 'visits': None}
+    assert store.get('user_id', 3) is None
+
+def test_expired_entities_read_as_missing_and_free_their_rows(tmp_path):
+    table = FeatureTable('user_id', capacity=2)
+    table.upsert([{'user_id': 'old', 'x': 1}], ttl=-1)
+    table.upsert([{'user_id': 'new', 'x': 2}], ttl=60)
+    
+    assert table.get('old') is None
+    assert table.purge_expired() == 0 and len(table) == 1
+    table.upsert([{'user_id': f'u{i}', 'x': i} for i in range(5)])
+    assert len(table) == 6 and table.get('u4') == {'x': 4.0}
+
+def test_entities_assemble_into_prediction_rows(tmp_path):
+    store = FeatureStore(snapshot_dir=str(tmp_path))
+    store.upsert('user_id', [{'user_id': 'u1', 'age': 30, 'shared': 1}])
+    store.upsert('item_id', [{'item_id': 'i1', 'price': 9.5, 'shared': 2}])
+    
+    rows, missing = store.assemble_rows(
+        [{'user_id': 'u1', 'item_id': 'i1'}, {'user_id': 'u2'}],
+        overrides=[{'price': 8.0}, None]
+    )
+    
+    assert rows == [{'age': 30.0, 'shared': 2.0, 'price': 8.0}, {}]
+    assert missing == ['user_id:u2']
+
+def test_snapshots_are_reloaded_on_start(tmp_path):
+    store = FeatureStore(snapshot_dir=str(tmp_path))
+    store.upsert('user_id', [{'user_id': 'u1', 'tier': 'gold', 'spend': 2.5}, {'user_id': 'u2', 'tier': 'silver'}])
+    assert store.snapshot()['tables'] == {'user_id': 2}
+    
+    restored = FeatureStore(snapshot_dir=str(tmp_path))
+    
+    assert restored.get('user_id', 'u1') == {'tier': 'gold', 'spend': 2.5}
+    assert restored.get('user_id', 'u2') == {'tier': 'silver', 'spend': None}
+
+def test_predict_endpoint_accepts_entity_ids(app_module, labeled_frame):
+    client = app_module.app.test_client()
+    assert app_module.ml_predictor.train_model(labeled_frame, 'label', 'random_forest', compact=False)['success']
+    client.post('/api/features/user_id', json={'records': [{'user_id': 'u1', 'a': 0.3, 'b': 2, 'cat': 'x'}]})
+    
+    response = client.post('/api/predict', json={'entities': {'user_id': 'u1'}})
+    
+    prediction = response.get_json()['prediction']
+    assert prediction['success'] and prediction['missing_features'] == []
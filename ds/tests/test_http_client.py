@@ -0,0 +1,117 @@
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+import requests
+
+from utils.http_client import AsyncHTTPClient, CircuitBreaker, CircuitOpenError, HTTPClient
+
+def test_asyncio_run_per_call_closes_its_session(stubs):
+    backend, _ = stubs
+    client = AsyncHTTPClient()
+    sessions = []
+    
+    async def call():
+        response = await client.request('GET', backend, '/api/health')
+        sessions.append(client.session())
+        return response.status
+    
+    assert [asyncio.run(call()) for _ in range(3)] == [200, 200, 200]
+    
+    assert len(sessions) == 3 and all(session.closed for session in sessions)
+    assert client.stats()['open'] == 0
+
+def test_session_is_reused_within_a_loop(stubs):
+    backend, _ = stubs
+    client = AsyncHTTPClient()
+    
+    async def calls():
+        for _ in range(3):
+            await client.request('GET', backend, '/api/health')
+        return client.session()
+    
+    session = asyncio.run(calls())
+    assert client.stats()['sessions'] == 1
+    assert session.closed
+
+def test_threads_with_own_loops_keep_their_sessions(stubs):
+    backend, _ = stubs
+    client = AsyncHTTPClient()
+    barrier = threading.Barrier(2)
+    seen = {}
+    
+    async def calls(name):
+        first = client.session()
+        await asyncio.get_running_loop().run_in_executor(None, barrier.wait)
+        await client.request('GET', backend, '/api/health')
+        seen[name] = first is client.session()
+    
+    threads = [threading.Thread(target=asyncio.run, args=(calls(name),)) for name in ('a', 'b')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert seen == {'a': True, 'b': True}
+    assert client.stats()['sessions'] == 2 and client.stats()['open'] == 0
+
+def make_client(base_url, **kwargs):
+    kwargs.setdefault('max_retries', 2)
+    kwargs.setdefault('breaker', CircuitBreaker(failure_threshold=100))
+    return HTTPClient(base_url, backoff_base=0.001, backoff_max=0.001, **kwargs)
+
+def stub_requests(base_url):
+    return requests.get(f"{base_url}/__stats").json()['requests']
+
+def test_idempotent_requests_are_retried_on_unavailable_status(stubs, stub_options):
+    backend, _ = stubs
+    stub_options.error_rate = 1.0
+    client = make_client(backend)
+    
+    assert client.get('/api/health').status_code == 503
+    assert stub_requests(backend) == 3
+    
+    # A POST that reached the server is never sent twice
+    assert client.post('/graphql', json={'query': '{}'}).status_code == 503
+    assert stub_requests(backend) == 4
+
+def test_requests_that_never_connected_are_retried_for_any_method():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        closed_port = sock.getsockname()[1]
+    client = make_client(f"http://127.0.0.1:{closed_port}")
+    
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.post('/graphql', json={})
+    assert client.stats()['retries'] == 2
+
+def test_circuit_opens_after_consecutive_failures_and_recovers(stubs, stub_options):
+    backend, _ = stubs
+    stub_options.error_rate = 1.0
+    client = make_client(backend, max_retries=0, breaker=CircuitBreaker(failure_threshold=3, reset_timeout=0.2))
+    
+    for _ in range(3):
+        assert client.get('/api/health').status_code == 503
+    with pytest.raises(CircuitOpenError):
+        client.get('/api/health')
+    assert stub_requests(backend) == 3
+    
+    # After the reset timeout one trial call closes the circuit again
+    stub_options.error_rate = 0.0
+    time.sleep(0.25)
+    assert client.breaker.state == 'half_open'
+    assert client.get('/api/health').status_code == 200
+    assert client.breaker.state == 'closed'
+
+def test_failed_trial_call_reopens_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+    
+    time.sleep(0.06)
+    assert breaker.allow() and not breaker.allow()  # one trial at a time
+    breaker.record_failure()
+    
+    assert breaker.state == 'open' and breaker.stats()['opened'] == 2
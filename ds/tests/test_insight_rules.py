@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.insight_rules import InsightRuleEngine, _pairwise_corr
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(500, 8)), columns=[f'x{i}' for i in range(8)])
+    df['trend'] = np.arange(500) + rng.normal(scale=5, size=500)
+    df['revenue'] = rng.lognormal(sigma=1.5, size=500)
+    df['user_id'] = np.arange(500)
+    df.loc[::9, ['x1', 'trend', 'revenue']] = np.nan
+    return df
+
+def test_column_stats_match_pandas(frame):
+    stats = InsightRuleEngine.column_stats(frame)
+    
+    np.testing.assert_allclose(stats['median'], frame.median(), rtol=1e-12)
+    np.testing.assert_allclose(stats['skewness'], frame.skew(), rtol=1e-9)
+    np.testing.assert_allclose(stats['mean'], frame.mean(), rtol=1e-12)
+    positions = {col: pd.Series(np.arange(frame[col].count())) for col in frame}
+    expected_trend = [np.corrcoef(frame[col].dropna(), positions[col])[0, 1] for col in frame]
+    np.testing.assert_allclose(stats['trend_corr'], expected_trend, rtol=1e-9)
+
+def test_pairwise_correlation_matches_dataframe_corr(frame):
+    corr = _pairwise_corr(frame.to_numpy(dtype=float))
+    
+    np.testing.assert_allclose(corr, frame.corr().to_numpy(), atol=1e-9)
+
+def test_rules_cover_every_column_and_rank_by_severity(frame):
+    frame = frame.drop(columns='trend')
+    for i in range(10):
+        frame[f'late_trend_{i}'] = np.arange(len(frame)) * (i + 1.0)
+    
+    insights = InsightRuleEngine().evaluate(frame)
+    
+    trends = {insight['column'] for insight in insights if insight['rule'] == 'strong_trend'}
+    assert {f'late_trend_{i}' for i in range(10)} <= trends
+    assert {'revenue', 'user_id'} <= {insight['column'] for insight in insights if insight['category'] == 'business'}
+    severities = [insight['severity'] for insight in insights]
+    assert severities == sorted(severities, key=['high', 'medium', 'low'].index)
+
+def test_categories_filter_rules_and_empty_frames_yield_nothing(frame):
+    engine = InsightRuleEngine()
+    
+    assert {insight['category'] for insight in engine.evaluate(frame, categories={'trend'})} == {'trend'}
+    assert engine.evaluate(pd.DataFrame({'name': ['a', 'b']})) == []
+
+def test_strong_correlations_are_reported_strongest_first(frame):
+    frame = frame.assign(trend_copy=frame['trend'] * 2, anti=-frame['x0'] + frame['x2'] * 0.01)
+    
+    messages = [insight['message'] for insight in InsightRuleEngine().correlation_insights(frame)]
+    
+    assert "'trend' and 'trend_copy'" in messages[0]
+    assert any("negative" in message and "'x0' and 'anti'" in message for message in messages)
@@ -0,0 +1,52 @@
+import json
+
+import numpy as np
+import pytest
+
+@pytest.fixture
+def records():
+    rng = np.random.default_rng()  # fresh data per test: the app's insight cache is shared
+    return [
+        {'revenue': float(value), 'visits': int(visits), 'region': region}
+        for value, visits, region in zip(rng.lognormal(sigma=2, size=200), rng.integers(0, 50, 200),
+                                         rng.choice(['n', 's', None], 200))
+    ]
+
+def parse_sse(body):
+    events = []
+    for block in body.strip().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+def test_sse_stream_sends_summary_insights_then_done(app_module, records):
+    client = app_module.app.test_client()
+    
+    response = client.post('/api/ai-insights/stream', json=records)
+    
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    events = parse_sse(response.get_data(as_text=True))
+    assert events[0][0] == 'summary' and events[-1][0] == 'done'
+    insights = [payload for event, payload in events if event == 'insight']
+    assert insights and events[-1][1] == {'count': len(insights), 'cached': False}
+    
+    # The completed stream filled the cache used by the non-streaming endpoint
+    full = client.post('/api/ai-insights', json=records).get_json()['insights']
+    assert full['cached'] is True
+    assert sorted(map(json.dumps, full['insights'])) == sorted(map(json.dumps, insights))
+
+def test_ndjson_stream_is_chosen_by_accept_header_and_replays_cached_results(app_module, records):
+    client = app_module.app.test_client()
+    client.post('/api/ai-insights', json=records)
+    
+    response = client.post('/api/ai-insights/stream', json=records, headers={'Accept': 'application/x-ndjson'})
+    
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines[-1] == {'event': 'done', 'data': {'count': len(lines) - 2, 'cached': True}}
+
+def test_unknown_stream_format_is_rejected(app_module, records):
+    response = app_module.app.test_client().post('/api/ai-insights/stream?format=xml', json=records)
+    
+    assert response.status_code == 400
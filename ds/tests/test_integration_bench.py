@@ -0,0 +1,40 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from config.settings import Config
+
+SERVER_DIR = Path(__file__).resolve().parents[1]
+
+def run_bench(tmp_path, *args):
+    out = tmp_path / 'results.json'
+    result = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.integration_bench', '--mode', 'sync', '--requests', '20',
+         '--warmup', '2', '--concurrency', '4', '--json', str(out), *args],
+        cwd=SERVER_DIR, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+    return {result['scenario']: result for result in json.loads(out.read_text())}
+
+def test_benchmark_reports_calls_latency_and_pooled_connections(tmp_path):
+    results = run_bench(tmp_path, '--scenario', 'graphql', '--scenario', 'user_context', '--users', '5')
+    
+    graphql = results['graphql']
+    assert graphql['calls'] == 20 and graphql['errors'] == 0
+    assert graphql['stub']['backend']['requests'] == 20
+    # Keep-alive pool: at most one connection per client thread (plus the stats probe)
+    assert graphql['stub']['backend']['connections'] <= 4 + 1
+    assert graphql['latency_ms']['p50'] <= graphql['latency_ms']['p99'] <= graphql['latency_ms']['max']
+    
+    # Five distinct users were fetched during warm-up and are cached afterwards
+    assert results['user_context']['stub']['backend']['requests'] <= 5
+
+def test_failing_stub_is_counted_and_cut_off_by_the_circuit_breaker(tmp_path):
+    results = run_bench(tmp_path, '--scenario', 'frontend', '--error-rate', '1.0')
+    
+    frontend = results['frontend']
+    assert frontend['errors'] == frontend['calls'] == 20
+    # Once the breaker opens, calls fail fast without reaching the stub
+    injected = frontend['stub']['frontend']['errors_injected']
+    assert 0 < injected <= Config.HTTP_BREAKER_FAILURES + 4
@@ -0,0 +1,55 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import json_utils
+
+DOCUMENT = {
+    'count': np.int64(3),
+    'score': np.float32(0.5),
+    'missing': float('nan'),
+    'values': np.array([1.5, 2.5]),
+    'when': pd.Timestamp('2024-05-01 12:30'),
+    'tags': {'b', 'a'},
+    np.int64(7): 'numpy key'
+}
+
+EXPECTED = {
+    'count': 3, 'score': 0.5, 'missing': None, 'values': [1.5, 2.5],
+    'when': '2024-05-01T12:30:00', 'tags': ['a', 'b'], '7': 'numpy key'
+}
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def encoder(request, monkeypatch):
+    if request.param == 'stdlib':
+        monkeypatch.setattr(json_utils, 'orjson', None)
+    elif json_utils.orjson is None:
+        pytest.skip('orjson is not installed')
+    return request.param
+
+def test_numpy_and_pandas_values_encode_as_plain_json(encoder):
+    decoded = json.loads(json_utils.dumps(DOCUMENT))
+    decoded['tags'] = sorted(decoded['tags'])
+    
+    assert decoded == EXPECTED
+
+def test_dataframes_are_encoded_as_records(encoder):
+    df = pd.DataFrame({'a': [1.0, np.nan], 'when': pd.to_datetime(['2024-01-01', None])})
+    
+    assert json.loads(json_utils.dumps({'rows': df})) == {
+        'rows': [{'a': 1.0, 'when': '2024-01-01T00:00:00.000'}, {'a': None, 'when': None}]
+    }
+
+def test_jsonify_goes_through_the_fast_provider(app_module):
+    with app_module.app.test_request_context():
+        response = app_module.jsonify({'value': np.float64(2.0), 'rows': np.arange(3)})
+    
+    assert response.mimetype == 'application/json'
+    assert json.loads(response.get_data()) == {'value': 2.0, 'rows': [0, 1, 2]}
+
+def test_numpy_nan_and_big_integers_encode_as_valid_json(encoder):
+    document = {'score': np.float32('nan'), 'values': np.array([1.0, np.nan, np.inf]), 'id': 2 ** 70}
+    
+    assert json.loads(json_utils.dumps(document)) == {'score': None, 'values': [1.0, None, None], 'id': 2 ** 70}
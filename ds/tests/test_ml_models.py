@@ -0,0 +1,159 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from services.ml_models import MLPredictor
+
+def test_load_saved_models_skips_full_estimator_backups(workdir, labeled_frame):
+    predictor = MLPredictor()
+    model_name = predictor.train_model(labeled_frame, 'label', 'random_forest', compact=False)['model_name']
+    assert predictor.compact_model(model_name).get('success')
+    assert (workdir / 'models' / f'{model_name}.full.pkl').exists()
+    
+    fresh = MLPredictor()
+    
+    assert fresh.load_saved_models() == [model_name]
+    assert fresh.list_models()['compacted_models'] == [model_name]
+
+def test_workers_build_on_each_others_incremental_updates(workdir, labeled_frame, monkeypatch):
+    monkeypatch.setattr('config.settings.Config.MODEL_SYNC_INTERVAL', 0.0)
+    # Two predictors sharing models/ stand in for two server workers
+    first, second = MLPredictor(), MLPredictor()
+    batches = [labeled_frame.iloc[i:i + 100] for i in range(0, 300, 100)]
+    
+    model_name = first.partial_train(batches[0], 'label')['model_name']
+    assert second.partial_train(batches[1], 'label')['samples_seen'] == 200
+    assert first.partial_train(batches[2], 'label', model_name=model_name)['samples_seen'] == 300
+    
+    # A worker serving an older copy reloads the replaced file
+    monkeypatch.setattr('config.settings.Config.MODEL_SYNC_INTERVAL', 1e-9)
+    _, state = second.get_model_state(model_name)
+    assert state.info['samples_seen'] == 300
+
+def test_feature_writes_are_refused_with_several_workers(app_module, monkeypatch):
+    client = app_module.app.test_client()
+    body = {'records': [{'id': 'u1', 'spend': 3.5}], 'id_field': 'id'}
+    
+    monkeypatch.setenv('DS_SERVING_WORKERS', '4')
+    assert client.post('/api/features/user', json=body).status_code == 409
+    
+    monkeypatch.setenv('DS_SERVING_WORKERS', '1')
+    assert client.post('/api/features/user', json=body).status_code == 200
+
+def test_incremental_model_learns_batch_by_batch(workdir, labeled_frame):
+    predictor = MLPredictor()
+    batches = [labeled_frame.iloc[i:i + 50] for i in range(0, 300, 50)]
+    
+    results = [predictor.partial_train(batch, 'label') for batch in batches]
+    
+    assert len({result['model_name'] for result in results}) == 1
+    assert results[-1]['samples_seen'] == 300 and results[-1]['batches_seen'] == 6
+    # Test-then-train: later batches are scored before the model sees them
+    assert results[0]['batch_metrics'] == {}
+    # SGD is unseeded; well above the 57% majority class on every run
+    assert np.mean([result['batch_metrics']['accuracy'] for result in results[3:]]) >= 0.65
+    
+    rows = labeled_frame.drop(columns='label').iloc[:3].to_dict('records')
+    prediction = predictor.predict(rows, results[0]['model_name'])
+    assert prediction['success'] and set(prediction['predictions']) <= {0, 1}
+
+def test_incremental_updates_reject_unseen_class_labels(workdir, labeled_frame):
+    predictor = MLPredictor()
+    model_name = predictor.partial_train(labeled_frame.iloc[:50], 'label')['model_name']
+    
+    unexpected = labeled_frame.iloc[50:60].assign(label='maybe')
+    
+    assert 'error' in predictor.partial_train(unexpected, 'label', model_name=model_name)
+    assert predictor.partial_train(labeled_frame.iloc[60:70], 'label', model_name=model_name)['samples_seen'] == 60
+
+def test_gradient_boosting_handles_missing_values_and_categoricals_natively(workdir, labeled_frame):
+    predictor = MLPredictor()
+    frame = labeled_frame.copy()
+    frame.loc[::7, 'a'] = np.nan
+    
+    result = predictor.train_model(frame, 'label', 'hist_gradient_boosting')
+    
+    assert result['engine'] == 'HistGradientBoostingClassifier'
+    _, state = predictor.get_model_state(result['model_name'])
+    assert state.info['native_preprocessing'] is True
+    assert state.info['categorical_features'] == [False, False, True]
+    assert predictor.predict({'a': None, 'b': 2, 'cat': 'x'}, result['model_name'])['success']
+
+def test_auto_model_type_switches_to_gradient_boosting_for_large_data(workdir, labeled_frame, monkeypatch):
+    predictor = MLPredictor()
+    
+    assert predictor.train_model(labeled_frame, 'label')['engine'] == 'RandomForestClassifier'
+    monkeypatch.setattr('config.settings.Config.HGB_AUTO_MIN_ROWS', 100)
+    assert predictor.train_model(labeled_frame, 'label')['engine'] == 'HistGradientBoostingClassifier'
+
+def test_predictions_stay_consistent_while_a_model_is_updated(workdir, labeled_frame):
+    predictor = MLPredictor()
+    model_name = predictor.partial_train(labeled_frame.iloc[:50], 'label')['model_name']
+    rows = labeled_frame.drop(columns='label').iloc[:20].to_dict('records')
+    results, stop = [], threading.Event()
+    
+    def serve():
+        while not stop.is_set():
+            results.append(predictor.predict(rows, model_name))
+    
+    readers = [threading.Thread(target=serve) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for start in range(50, 300, 50):
+        assert predictor.partial_train(labeled_frame.iloc[start:start + 50], 'label', model_name=model_name)['success']
+    stop.set()
+    for reader in readers:
+        reader.join(10)
+    
+    assert results and all(result.get('success') for result in results)
+    assert all(len(result['predictions']) == len(rows) for result in results)
+
+def test_float_targets_in_small_first_batches_train_regression(workdir):
+    predictor = MLPredictor()
+    rng = np.random.default_rng(0)
+    batches = [
+        pd.DataFrame({'x': x, 'y': 3.0 * x + rng.normal(scale=0.1, size=8)})
+        for x in rng.normal(size=(3, 8))
+    ]
+    
+    results = [predictor.partial_train(batch, 'y') for batch in batches]
+    
+    assert all(result.get('success') for result in results)
+    assert results[0]['problem_type'] == 'regression' and results[-1]['samples_seen'] == 24
+
+def test_incremental_batches_accept_columnar_dicts_and_single_rows(workdir):
+    predictor = MLPredictor()
+    
+    columns = predictor.partial_train({'x': [0.1, 0.9, 0.2, 0.8], 'label': ['a', 'b', 'a', 'b']}, 'label')
+    row = predictor.partial_train({'x': 0.7, 'label': 'b'}, 'label', model_name=columns['model_name'])
+    
+    assert columns['success'] and columns['batch_size'] == 4
+    assert row['success'] and row['samples_seen'] == 5
+
+def test_workers_reload_a_tree_runtime_saved_by_another_worker(workdir, labeled_frame, monkeypatch):
+    monkeypatch.setattr('config.settings.Config.ENABLE_TREE_RUNTIME', False)
+    first, second = MLPredictor(), MLPredictor()
+    model_name = first.train_model(labeled_frame, 'label', 'random_forest', compact=False)['model_name']
+    assert second.get_model_state(model_name)[1].runtime is None
+    
+    monkeypatch.setattr('config.settings.Config.ENABLE_TREE_RUNTIME', True)
+    assert first.export_tree_runtime(model_name)['success']
+    
+    # Only the runtime file changed; it is part of the disk signature
+    state = second._get_state(model_name, sync=True)
+    assert state.runtime is not None
+    assert state.runtime.n_nodes == first.get_model_state(model_name)[1].runtime.n_nodes
+    assert not [name for name in os.listdir(workdir / 'models') if name.endswith('.tmp')]
+
+def test_random_forests_use_one_core_per_worker_under_gunicorn(workdir, monkeypatch):
+    monkeypatch.setattr('config.settings.Config.MODEL_N_JOBS', None)
+    monkeypatch.setenv('DS_SERVING_WORKERS', '4')
+    assert MLPredictor().regression_models['random_forest'][1]['n_jobs'] == 1
+    
+    monkeypatch.setenv('DS_SERVING_WORKERS', '1')
+    assert MLPredictor().classification_models['random_forest'][1]['n_jobs'] == -1
+    
+    monkeypatch.setattr('config.settings.Config.MODEL_N_JOBS', 2)
+    assert MLPredictor().classification_models['random_forest'][1]['n_jobs'] == 2
@@ -0,0 +1,43 @@
+import numpy as np
+
+from services.model_compaction import ModelCompactor
+from services.tree_runtime import FlatTreeEnsemble
+
+def test_float32_compaction_keeps_predictions(forest_data):
+    model, X_val, _ = forest_data
+    runtime = FlatTreeEnsemble.from_estimator(model)
+    
+    compacted, report = ModelCompactor().compact(runtime, float32=True)
+    
+    assert report['compacted']['bytes'] < report['original']['bytes']
+    np.testing.assert_array_equal(compacted.predict(X_val), model.predict(X_val))
+
+def test_pruning_reports_score_change_on_held_out_rows(forest_data):
+    model, X_val, y_val = forest_data
+    runtime = FlatTreeEnsemble.from_estimator(model)
+    compactor = ModelCompactor(tolerance=0.02, holdout=0.5, random_state=0)
+    
+    compacted, report = compactor.compact(runtime, X_val, y_val, prune_trees=True, prune_depth=True)
+    validation = report['validation']
+    
+    assert validation['rows'] + validation['selection_rows'] == len(y_val)
+    assert compacted.n_trees <= runtime.n_trees
+    
+    # The reported scores are those of the held-out half, which pruning never saw
+    _, _, X_holdout, y_holdout = compactor.split_validation(X_val, y_val)
+    assert validation['rows'] == len(y_holdout)
+    assert validation['original'] == ModelCompactor.score(runtime, X_holdout, y_holdout)
+    assert validation['compacted'] == ModelCompactor.score(compacted, X_holdout, y_holdout)
+    assert np.isclose(validation['delta'], validation['compacted'] - validation['original'])
+
+def test_split_validation_is_disjoint_and_seeded(forest_data):
+    _, X_val, y_val = forest_data
+    compactor = ModelCompactor(holdout=0.25, random_state=3)
+    
+    first = compactor.split_validation(X_val, y_val)
+    second = compactor.split_validation(X_val, y_val)
+    
+    assert len(first[3]) == round(len(y_val) * 0.25)
+    assert len(first[1]) + len(first[3]) == len(y_val)
+    for a, b in zip(first, second):
+        np.testing.assert_array_equal(a, b)
@@ -0,0 +1,20 @@
+import gzip
+
+from utils import json_utils
+from utils.payload_shaping import encode_body
+
+PAYLOAD = {"rows": [{"id": i, "value": i / 7} for i in range(500)]}
+
+def test_bodies_are_uncompressed_by_default():
+    body, headers = encode_body(PAYLOAD)
+    
+    assert 'Content-Encoding' not in headers
+    assert json_utils.loads(body) == json_utils.loads(json_utils.dumps(PAYLOAD))
+
+def test_gzip_is_opt_in_and_skips_small_bodies():
+    body, headers = encode_body(PAYLOAD, compression='gzip')
+    assert headers['Content-Encoding'] == 'gzip'
+    assert json_utils.loads(gzip.decompress(body))['rows'][3]['id'] == 3
+    
+    _, headers = encode_body({"ok": True}, compression='gzip')
+    assert 'Content-Encoding' not in headers
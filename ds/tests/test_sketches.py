@@ -0,0 +1,87 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.categorical_profile import CategoricalProfiler, _hash
+from utils.sketches import CountMinSketch, HyperLogLog, SpaceSavingSketch
+
+@pytest.fixture
+def zipf_stream():
+    """200k skewed draws over ~thousands of distinct string values"""
+    values = np.random.default_rng(0).zipf(1.3, size=200_000)
+    return np.array([f"v{value}" for value in values], dtype=object)
+
+def chunks(stream, size=20_000):
+    for start in range(0, len(stream), size):
+        values, counts = np.unique(stream[start:start + size], return_counts=True)
+        yield values.astype(object), counts
+
+def test_space_saving_counts_bracket_the_true_frequency(zipf_stream):
+    truth = Counter(zipf_stream)
+    sketch = SpaceSavingSketch(capacity=64)
+    for values, counts in chunks(zipf_stream):
+        sketch.update(values, counts)
+    
+    for value, count, error in sketch.top(64):
+        assert count - error <= truth[value] <= count
+    
+    # The heaviest values are far above N / capacity, so they are reported in order
+    top = [value for value, _, _ in sketch.top(5)]
+    assert top == [value for value, _ in truth.most_common(5)]
+
+def test_merged_space_saving_summaries_keep_their_bounds(zipf_stream):
+    truth = Counter(zipf_stream)
+    halves = [SpaceSavingSketch(capacity=64), SpaceSavingSketch(capacity=64)]
+    for i, (values, counts) in enumerate(chunks(zipf_stream)):
+        halves[i % 2].update(values, counts)
+    halves[0].merge(halves[1])
+    
+    for value, count, error in halves[0].top(20):
+        assert count - error <= truth[value] <= count
+
+def test_count_min_never_underestimates_and_stays_within_its_error_bound(zipf_stream):
+    truth = Counter(zipf_stream)
+    sketch = CountMinSketch(width=2048, depth=4)
+    for values, counts in chunks(zipf_stream):
+        sketch.update(_hash(values), counts)
+    
+    keys = np.array(list(truth), dtype=object)
+    exact = np.array([truth[key] for key in keys])
+    estimates = sketch.estimate(_hash(keys))
+    
+    assert (estimates >= exact).all()
+    # Overestimate <= e / width * N with probability 1 - e^-depth per key
+    within = estimates - exact <= np.e / sketch.width * len(zipf_stream)
+    assert within.mean() >= 1 - np.exp(-sketch.depth)
+
+@pytest.mark.parametrize('distinct', [50, 3000, 200_000])
+def test_hyperloglog_error_is_within_three_standard_errors(distinct):
+    hll = HyperLogLog(precision=12)
+    hll.update(_hash(np.array([f"user-{i}" for i in range(distinct)], dtype=object)))
+    
+    standard_error = 1.04 / np.sqrt(len(hll.registers))
+    assert abs(hll.estimate() - distinct) / distinct < 3 * standard_error
+
+def test_merged_hyperloglogs_estimate_the_union():
+    left, right, union = HyperLogLog(12), HyperLogLog(12), HyperLogLog(12)
+    first = _hash(np.array([f"a{i}" for i in range(20_000)], dtype=object))
+    second = _hash(np.array([f"a{i}" for i in range(10_000, 30_000)], dtype=object))
+    left.update(first)
+    right.update(second)
+    union.update(np.concatenate([first, second]))
+    
+    left.merge(right)
+    
+    assert left.estimate() == union.estimate()
+
+def test_profiler_reports_exact_counts_for_small_columns():
+    series = pd.Series(['b', 'a', 'b', None, 'c', 'b', 'a'] * 10)
+    profile = CategoricalProfiler(top_k=2, chunk_rows=8).profile_column(series)
+    
+    assert profile['count'] == 60 and profile['missing'] == 10
+    assert profile['approx_unique'] == 3
+    assert [(top['value'], top['count'], top['max_error']) for top in profile['top_values']] == [
+        ('b', 30, 0), ('a', 20, 0)
+    ]
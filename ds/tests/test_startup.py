@@ -0,0 +1,34 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from utils import startup
+
+SERVER_DIR = Path(__file__).resolve().parents[1]
+
+def test_importing_the_app_defers_heavy_packages():
+    code = (
+        "import json, sys, app; "
+        "print(json.dumps(sorted({name.split('.')[0] for name in sys.modules} "
+        "& {'sklearn', 'scipy', 'matplotlib', 'seaborn'})))"
+    )
+    result = subprocess.run([sys.executable, '-c', code], cwd=SERVER_DIR, capture_output=True, text=True)
+    
+    assert result.returncode == 0, result.stderr
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
+
+def test_warm_up_imports_modules_and_load_attribute_caches_them():
+    timings = startup.warm_up(('sklearn.naive_bayes',))
+    
+    assert list(timings) == ['sklearn.naive_bayes'] and 'sklearn.naive_bayes' in sys.modules
+    first = startup.load_attribute('sklearn.naive_bayes:GaussianNB')
+    assert first is startup.load_attribute('sklearn.naive_bayes:GaussianNB')
+    assert first.__name__ == 'GaussianNB'
+
+def test_import_report_summarizes_import_time():
+    report = startup.import_report('utils.json_utils', top=5)
+    
+    assert report['modules_imported'] > 0 and report['total_seconds'] > 0
+    assert len(report['slowest']) <= 5
+    assert 'pandas' in report['packages'] or 'numpy' in report['packages']
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.time_series import TimeSeriesAnalyzer
+
+@pytest.fixture
+def daily():
+    rng = np.random.default_rng(0)
+    days = pd.date_range('2024-01-01', periods=140, freq='D')
+    t = np.arange(len(days))
+    return pd.DataFrame({
+        'date': days.strftime('%Y-%m-%d'),  # text dates are detected too
+        'trend': 2.0 * t + rng.normal(scale=3, size=len(t)),
+        'weekly': 10 * np.sin(2 * np.pi * t / 7) + rng.normal(scale=0.5, size=len(t)),
+        'step': np.where(t < 60, 5.0, 20.0) + rng.normal(scale=1, size=len(t)),
+        'noise': rng.normal(size=len(t))
+    })
+
+def test_resampling_matches_pandas_with_empty_periods():
+    rng = np.random.default_rng(1)
+    ts = pd.Timestamp('2024-03-01') + pd.to_timedelta(np.sort(rng.uniform(0, 10 * 86400, 200)), unit='s')
+    ts = ts[(ts < pd.Timestamp('2024-03-04')) | (ts >= pd.Timestamp('2024-03-06'))]
+    values = rng.normal(size=len(ts))
+    
+    periods, Y, counts = TimeSeriesAnalyzer().resample(ts.to_numpy().astype(np.int64), values[:, np.newaxis], 'D')
+    
+    expected = pd.Series(values, index=ts).resample('D').mean()
+    np.testing.assert_array_equal(periods, expected.index.to_numpy().astype('datetime64[D]'))
+    np.testing.assert_allclose(Y[:, 0], expected.to_numpy(), rtol=1e-12)
+    assert (counts == 0).sum() == expected.isna().sum() == 2
+
+def test_analysis_reports_trend_seasonality_and_level_shift(daily):
+    analysis = TimeSeriesAnalyzer().analyze(daily)
+    columns = analysis['columns']
+    
+    assert analysis['time_column'] == 'date' and analysis['frequency'] == 'D'
+    assert analysis['periods'] == 140 and analysis['empty_periods'] == 0
+    assert columns['trend']['trend']['slope_per_day'] == pytest.approx(2.0, abs=0.05)
+    assert columns['weekly']['seasonality']['strength'] > 0.9
+    assert columns['noise']['seasonality']['strength'] < 0.3
+    
+    shift = columns['step']['change_point']
+    assert shift['significant'] and shift['timestamp'].startswith('2024-03-01')
+    assert shift['before_mean'] == pytest.approx(5, abs=0.5) and shift['after_mean'] == pytest.approx(20, abs=0.5)
+    # A steady trend is not a level shift
+    assert not columns['trend']['change_point']['significant']
+    assert not columns['noise']['change_point']['significant']
+
+def test_frequency_is_coarsened_to_stay_within_max_points():
+    hourly = pd.DataFrame({
+        'when': pd.date_range('2024-01-01', periods=2000, freq='h'),
+        'value': np.arange(2000.0)
+    })
+    
+    assert TimeSeriesAnalyzer().analyze(hourly)['frequency'] == 'h'
+    assert TimeSeriesAnalyzer(max_points=500).analyze(hourly)['frequency'] == 'D'
+
+def test_frames_without_timestamps_are_not_analyzed():
+    assert TimeSeriesAnalyzer().analyze(pd.DataFrame({'a': [1, 2, 3], 'name': ['x', 'y', 'z']})) is None
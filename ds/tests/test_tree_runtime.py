@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from services.tree_runtime import FlatTreeEnsemble
+
+def test_classifier_matches_sklearn_including_missing_values(forest_data):
+    model, X_val, _ = forest_data
+    runtime = FlatTreeEnsemble.from_estimator(model)
+    
+    assert np.isnan(X_val).any()
+    np.testing.assert_array_equal(runtime.predict(X_val), model.predict(X_val))
+    np.testing.assert_allclose(runtime.predict_proba(X_val), model.predict_proba(X_val), rtol=0, atol=1e-12)
+
+def test_string_labels_are_returned_as_labels(forest_data):
+    from sklearn.ensemble import ExtraTreesClassifier
+    
+    _, X, y = forest_data
+    labels = np.where(y == 1, 'yes', 'no').astype(object)
+    model = ExtraTreesClassifier(n_estimators=10, random_state=0).fit(np.nan_to_num(X), labels)
+    
+    runtime = FlatTreeEnsemble.from_estimator(model)
+    
+    assert list(runtime.predict(np.nan_to_num(X))) == list(model.predict(np.nan_to_num(X)))
+
+def test_regressor_matches_sklearn(forest_data):
+    from sklearn.ensemble import RandomForestRegressor
+    
+    _, X, y = forest_data
+    X = np.nan_to_num(X)
+    target = X[:, 0] * 3.0 + y
+    model = RandomForestRegressor(n_estimators=20, max_depth=8, random_state=0).fit(X, target)
+    
+    runtime = FlatTreeEnsemble.from_estimator(model)
+    predictions, probabilities = runtime.evaluate(X)
+    
+    assert probabilities is None
+    np.testing.assert_allclose(predictions, model.predict(X), rtol=0, atol=1e-12)
+
+def test_saved_runtime_loads_without_pickle_and_predicts_the_same(forest_data, tmp_path):
+    model, X_val, _ = forest_data
+    runtime = FlatTreeEnsemble.from_estimator(model)
+    
+    runtime.save(tmp_path / 'runtime.npz')
+    loaded = FlatTreeEnsemble.load(tmp_path / 'runtime.npz')
+    
+    assert loaded.n_trees == runtime.n_trees and loaded.nbytes == runtime.nbytes
+    np.testing.assert_array_equal(loaded.predict_proba(X_val), runtime.predict_proba(X_val))
+
+def test_unsupported_estimators_and_wrong_widths_are_rejected(forest_data):
+    from sklearn.linear_model import LogisticRegression
+    
+    model, X_val, y_val = forest_data
+    assert not FlatTreeEnsemble.supports(LogisticRegression())
+    with pytest.raises(ValueError):
+        FlatTreeEnsemble.from_estimator(LogisticRegression().fit(np.nan_to_num(X_val), y_val))
+    with pytest.raises(ValueError):
+        FlatTreeEnsemble.from_estimator(model).predict(X_val[:, :3])
+
+def test_served_predictions_match_with_and_without_the_runtime(workdir, labeled_frame, monkeypatch):
+    from services.ml_models import MLPredictor
+    
+    predictor = MLPredictor()
+    model_name = predictor.train_model(labeled_frame, 'label', 'random_forest', compact=False)['model_name']
+    _, state = predictor.get_model_state(model_name)
+    X = labeled_frame.drop(columns='label').iloc[:100]
+    assert state.runtime is not None
+    
+    flat = predictor._predict_arrays(state, X)
+    monkeypatch.setattr('config.settings.Config.TREE_RUNTIME_MAX_ROWS', 0)
+    sklearn = predictor._predict_arrays(state, X)
+    
+    np.testing.assert_array_equal(flat[0], sklearn[0])
+    np.testing.assert_allclose(flat[1], sklearn[1], rtol=0, atol=1e-12)
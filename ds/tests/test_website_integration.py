@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from website_integration import WebsiteAIIntegration
+
+@pytest.fixture
+def integration(workdir, stubs):
+    backend, frontend = stubs
+    integration = WebsiteAIIntegration(backend_url=backend, frontend_url=frontend)
+    yield integration
+    integration.close()
+
+@pytest.mark.parametrize('max_age, cached', [(60, True), (0, False)])
+def test_sync_and_async_context_follow_cache_control(integration, stub_options, max_age, cached):
+    stub_options.context_max_age = max_age  # 0: Cache-Control: no-store
+    
+    integration.get_user_context('u1')
+    asyncio.run(integration.aget_user_context('u2'))
+    
+    states = [integration.user_context_cache.peek(user_id)[1] for user_id in ('u1', 'u2')]
+    assert states == (['fresh', 'fresh'] if cached else ['miss', 'miss'])
+
+def test_compression_is_opt_in_per_receiver(workdir, stubs):
+    backend, frontend = stubs
+    integration = WebsiteAIIntegration(backend_url=backend, frontend_url=frontend, frontend_compression='gzip')
+    payload = {"insights": ["x" * 2000]}
+    
+    assert 'Content-Encoding' not in integration._body(payload, backend)['headers']
+    assert integration._body(payload, frontend)['headers']['Content-Encoding'] == 'gzip'
+    assert integration.send_insights_to_frontend(payload["insights"])
+    integration.close()
+
+def test_queue_insights_reports_each_queue(integration, monkeypatch):
+    from utils.delivery_queue import DeliveryQueueFull
+    
+    def full(item, timeout=None):
+        raise DeliveryQueueFull("Delivery queue full")
+    monkeypatch.setattr(integration.frontend_queue, 'put', full)
+    
+    result = integration.queue_insights({"summary": "ok"})
+    
+    assert result["queued"] is False
+    assert result["queues"] == {"backend": True, "frontend": False}
+    
+    # Retrying only the target that failed does not queue the backend copy again
+    monkeypatch.undo()
+    assert integration.queue_insights({"summary": "ok"}, targets=("frontend",)) == {"queued": True, "queues": {"frontend": True}}
+    assert integration.backend_queue.stats()['enqueued'] == 1
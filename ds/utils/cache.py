@@ -0,0 +1,268 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+def content_hash(df):
+    """Content hash of a DataFrame (values, column names and dtypes)"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps([[str(col), str(dtype)] for col, dtype in df.dtypes.items()]).encode('utf-8'))
+    try:
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    except TypeError:
+        # Unhashable cells (lists, dicts): fall back to a canonical JSON dump
+        digest.update(df.to_json(orient='split', index=False, default_handler=str).encode('utf-8'))
+    return digest.hexdigest()
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry time-to-live and hit/miss metrics
+    
+    With ``max_bytes`` set, ``sizeof(value)`` is recorded for every entry and
+    least recently used entries are evicted until the total fits.
+    """
+    
+    def __init__(self, max_entries=1000, ttl=None, max_bytes=None, sizeof=None):
+        self.max_entries = max_entries
+        self.ttl = ttl.total_seconds() if hasattr(ttl, 'total_seconds') else ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._entries = OrderedDict()  # key -> (expires_at, value, size), oldest first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+    
+    def get(self, key, default=None):
+        """Return the cached value and mark it most recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return default
+            
+            expires_at, value, _ = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return default
+            
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+    
+    def set(self, key, value, ttl=None):
+        """Store a value, evicting least recently used entries beyond ``max_entries``"""
+        if self.max_entries <= 0:
+            return
+        
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        size = self.sizeof(value) if self.sizeof is not None else 0
+        
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, value, size)
+            self._bytes += size
+            
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+    
+    def delete(self, key):
+        with self._lock:
+            return self._remove(key)
+    
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= entry[2]
+        return True
+    
+    def invalidate(self, predicate=None):
+        """Drop every entry, or only those whose key matches ``predicate``"""
+        with self._lock:
+            if predicate is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                self._bytes = 0
+            else:
+                stale = [key for key in self._entries if predicate(key)]
+                for key in stale:
+                    self._remove(key)
+                removed = len(stale)
+            
+            self._stats['invalidations'] += removed
+            return removed
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def stats(self):
+        """Hit-rate and size metrics"""
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses']
+            return {
+                **self._stats,
+                'hit_rate': self._stats['hits'] / lookups if lookups else 0.0,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl
+            }
+
+class SingleFlight:
+    """Collapses concurrent calls for the same key into one execution
+    
+    The first caller for a key runs the function; callers arriving while it
+    runs wait and receive the same result (or exception).
+    """
+    
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+    
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {'executions': 0, 'shared': 0}
+    
+    def do(self, key, fn):
+        """Return ``fn()``, sharing one in-flight execution per key"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+                self._stats['executions'] += 1
+            else:
+                self._stats['shared'] += 1
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+    
+    def stats(self):
+        with self._lock:
+            return {**self._stats, 'in_flight': len(self._calls)}
+
+class StaleWhileRevalidateCache:
+    """Read-through cache that serves stale entries while refreshing them
+    
+    ``load(key)`` returns ``(value, ttl)`` (``ttl`` None for the default). An
+    entry is fresh for its TTL, then stale for ``stale_ttl`` more seconds:
+    a stale hit returns the old value at once and starts one background
+    refresh. Concurrent misses for the same key share a single load, and
+    failed loads are not cached (a failed refresh keeps serving the stale
+    value until it expires).
+    """
+    
+    def __init__(self, load, max_entries=1000, ttl=60, stale_ttl=300):
+        self.load = load
+        self.ttl = ttl.total_seconds() if hasattr(ttl, 'total_seconds') else ttl
+        self.stale_ttl = stale_ttl.total_seconds() if hasattr(stale_ttl, 'total_seconds') else stale_ttl
+        self._entries = TTLCache(max_entries=max_entries)  # key -> (fresh_until, value)
+        self._inflight = SingleFlight()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._stats = {'fresh_hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0, 'refresh_failures': 0}
+    
+    def peek(self, key):
+        """``(value, state)`` without loading; state is ``fresh``, ``stale`` or ``miss``"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, 'miss'
+        fresh_until, value = entry
+        return value, 'fresh' if time.monotonic() < fresh_until else 'stale'
+    
+    def get(self, key):
+        """Cached value for ``key``, loading it on a miss (exceptions propagate)"""
+        value, state = self.peek(key)
+        if state == 'fresh':
+            self._stats['fresh_hits'] += 1
+            return value
+        if state == 'stale':
+            self._stats['stale_hits'] += 1
+            self.refresh(key)
+            return value
+        
+        self._stats['misses'] += 1
+        return self._inflight.do(key, lambda: self._load(key))
+    
+    def set(self, key, value, ttl=None):
+        """Store a value that is fresh for ``ttl`` seconds; ``ttl <= 0`` is not cached"""
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            self._entries.delete(key)
+            return
+        self._entries.set(key, (time.monotonic() + ttl, value), ttl=ttl + self.stale_ttl)
+    
+    def refresh(self, key):
+        """Reload ``key`` in a background thread (at most one refresh per key)"""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        
+        def run():
+            try:
+                self._inflight.do(key, lambda: self._load(key))
+                self._stats['refreshes'] += 1
+            except Exception:
+                self._stats['refresh_failures'] += 1
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+        
+        threading.Thread(target=run, name='cache-refresh', daemon=True).start()
+    
+    def _load(self, key):
+        value, ttl = self.load(key)
+        self.set(key, value, ttl)
+        return value
+    
+    def delete(self, key):
+        return self._entries.delete(key)
+    
+    def invalidate(self, predicate=None):
+        return self._entries.invalidate(predicate)
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def stats(self):
+        lookups = self._stats['fresh_hits'] + self._stats['stale_hits'] + self._stats['misses']
+        return {
+            **self._stats,
+            'hit_rate': (self._stats['fresh_hits'] + self._stats['stale_hits']) / lookups if lookups else 0.0,
+            'size': len(self._entries),
+            'max_entries': self._entries.max_entries,
+            'ttl_seconds': self.ttl,
+            'stale_ttl_seconds': self.stale_ttl,
+            'loads': self._inflight.stats()
+        }
@@ -0,0 +1,360 @@
+import hashlib
+import mmap
+from contextlib import contextmanager
+import os
+import pickle
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows: cross-process locking is not available
+    fcntl = None
+
+from config.settings import Config
+from utils.cache import TTLCache
+
+COMPRESS_MIN_BYTES = 1024
+
+def dumps(value):
+    """Compact binary encoding: pickle, zlib-compressed above 1 KB"""
+    data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(data) >= COMPRESS_MIN_BYTES:
+        return b'z' + zlib.compress(data, 1)
+    return b'p' + data
+
+def loads(data):
+    data = bytes(data)
+    if data[:1] == b'z':
+        return pickle.loads(zlib.decompress(data[1:]))
+    return pickle.loads(data[1:])
+
+def key_bytes(key):
+    """Stable byte encoding of a cache key (tuples of str/int/NumPy scalars)"""
+    return pickle.dumps(key, protocol=pickle.HIGHEST_PROTOCOL)
+
+class SharedCache:
+    """Common interface and hit/miss metrics of the cross-process cache backends
+    
+    Mirrors ``TTLCache`` (get/set/delete/invalidate/stats) so services can
+    switch backends without code changes. Expiry uses wall-clock time, since
+    entries are shared between processes.
+    """
+    
+    backend = None
+    
+    def __init__(self, ttl=None):
+        self.ttl = ttl.total_seconds() if hasattr(ttl, 'total_seconds') else ttl
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+        self._stats_lock = threading.Lock()
+    
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+    
+    def _expires_at(self, ttl):
+        ttl = self.ttl if ttl is None else (ttl.total_seconds() if hasattr(ttl, 'total_seconds') else ttl)
+        return time.time() + ttl if ttl else 0.0
+    
+    def get(self, key, default=None):
+        value = self._get(key)
+        if value is None:
+            self._count('misses')
+            return default
+        self._count('hits')
+        return loads(value)
+    
+    def set(self, key, value, ttl=None):
+        self._set(key, dumps(value), self._expires_at(ttl))
+    
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        return {
+            **stats,
+            'hit_rate': stats['hits'] / lookups if lookups else 0.0,
+            'backend': self.backend,
+            'ttl_seconds': self.ttl,
+            **self._backend_stats()
+        }
+
+class MmapCache(SharedCache):
+    """Fixed-size slot table in a memory-mapped file, shared by all workers on a host
+    
+    Each key hashes to a set of ``ways`` neighbouring slots. Writers take a
+    thread lock plus an ``fcntl`` file lock; readers take no lock and use the
+    slot's sequence counter (odd while a write is in progress) to detect and
+    retry torn reads. Values larger than a slot are not cached.
+    """
+    
+    backend = 'mmap'
+    HEADER = struct.Struct('<Q16sdI')  # sequence, key digest, expires_at, length
+    SLOT_HEADER_SIZE = 40
+    
+    def __init__(self, path, slots=4096, slot_size=65536, ttl=None, ways=4):
+        super().__init__(ttl)
+        self.path = path
+        self.slots = int(slots)
+        self.slot_size = int(slot_size)
+        self.ways = min(int(ways), self.slots)
+        self._local_lock = threading.Lock()
+        
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._lock_file = open(f"{path}.lock", 'a+b')
+        size = self.slots * self.slot_size
+        
+        with self._write_locked():
+            with open(path, 'a+b') as f:
+                if os.path.getsize(path) < size:
+                    f.truncate(size)
+            self._file = open(path, 'r+b')
+            self._map = mmap.mmap(self._file.fileno(), size)
+    
+    @contextmanager
+    def _write_locked(self):
+        # lockf locks belong to the process, so they still exclude forked workers
+        # that inherited the lock file descriptor
+        with self._local_lock:
+            if fcntl is not None:
+                fcntl.lockf(self._lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.lockf(self._lock_file.fileno(), fcntl.LOCK_UN)
+    
+    def _candidates(self, digest):
+        start = int.from_bytes(digest[:8], 'little') % self.slots
+        return [(start + i) % self.slots for i in range(self.ways)]
+    
+    def _read_slot(self, slot, retries=3):
+        """Consistent ``(digest, expires_at, payload)`` snapshot of a slot, or None"""
+        offset = slot * self.slot_size
+        for _ in range(retries):
+            sequence, digest, expires_at, length = self.HEADER.unpack_from(self._map, offset)
+            if sequence % 2:
+                continue
+            if length > self.slot_size - self.SLOT_HEADER_SIZE:
+                return None
+            start = offset + self.SLOT_HEADER_SIZE
+            payload = self._map[start:start + length]
+            if struct.unpack_from('<Q', self._map, offset)[0] == sequence:
+                return digest, expires_at, payload
+        return None
+    
+    def _write_slot(self, slot, digest, expires_at, payload):
+        offset = slot * self.slot_size
+        sequence = struct.unpack_from('<Q', self._map, offset)[0]
+        sequence += 2 if sequence % 2 == 0 else 1
+        
+        struct.pack_into('<Q', self._map, offset, sequence - 1)  # odd: write in progress
+        self.HEADER.pack_into(self._map, offset, sequence - 1, digest, expires_at, len(payload))
+        start = offset + self.SLOT_HEADER_SIZE
+        self._map[start:start + len(payload)] = payload
+        struct.pack_into('<Q', self._map, offset, sequence)
+    
+    def _get(self, key):
+        digest = hashlib.blake2b(key_bytes(key), digest_size=16).digest()
+        for slot in self._candidates(digest):
+            entry = self._read_slot(slot)
+            if entry is None or entry[0] != digest:
+                continue
+            if entry[1] and entry[1] <= time.time():
+                self._count('expirations')
+                return None
+            return entry[2]
+        return None
+    
+    def _set(self, key, payload, expires_at):
+        if len(payload) > self.slot_size - self.SLOT_HEADER_SIZE:
+            return
+        digest = hashlib.blake2b(key_bytes(key), digest_size=16).digest()
+        now = time.time()
+        
+        with self._write_locked():
+            target = None
+            for slot in self._candidates(digest):
+                slot_digest, slot_expires, length = self.HEADER.unpack_from(self._map, slot * self.slot_size)[1:]
+                if slot_digest == digest:
+                    target = slot
+                    break
+                if target is None and (length == 0 or (slot_expires and slot_expires <= now)):
+                    target = slot
+            
+            if target is None:
+                # Full set: replace a pseudo-random way
+                target = self._candidates(digest)[digest[8] % self.ways]
+                self._count('evictions')
+            
+            self._write_slot(target, digest, expires_at, payload)
+    
+    def delete(self, key):
+        digest = hashlib.blake2b(key_bytes(key), digest_size=16).digest()
+        with self._write_locked():
+            for slot in self._candidates(digest):
+                if self.HEADER.unpack_from(self._map, slot * self.slot_size)[1] == digest:
+                    self._write_slot(slot, b'\0' * 16, 0.0, b'')
+                    return True
+        return False
+    
+    def invalidate(self, predicate=None):
+        """Clear every slot; keys are stored hashed, so a predicate cannot be applied"""
+        if predicate is not None:
+            return 0
+        
+        removed = 0
+        with self._write_locked():
+            for slot in range(self.slots):
+                if self.HEADER.unpack_from(self._map, slot * self.slot_size)[3]:
+                    self._write_slot(slot, b'\0' * 16, 0.0, b'')
+                    removed += 1
+        self._count('invalidations', removed)
+        return removed
+    
+    def __len__(self):
+        return sum(
+            1 for slot in range(self.slots)
+            if self.HEADER.unpack_from(self._map, slot * self.slot_size)[3]
+        )
+    
+    def _backend_stats(self):
+        return {'size': len(self), 'slots': self.slots, 'slot_size': self.slot_size, 'path': self.path}
+
+class SQLiteCache(SharedCache):
+    """On-disk cache in a SQLite database (WAL mode), shared by all workers on a host
+    
+    One table holds every namespace; values are stored as compressed pickles.
+    Once a namespace grows beyond ``max_entries`` the oldest writes are pruned.
+    """
+    
+    backend = 'sqlite'
+    PRUNE_EVERY = 64
+    
+    def __init__(self, path, namespace='default', max_entries=1000, ttl=None):
+        super().__init__(ttl)
+        self.path = path
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._writes = 0
+        
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " namespace TEXT NOT NULL, key BLOB NOT NULL, value BLOB NOT NULL,"
+            " expires_at REAL NOT NULL, written_at REAL NOT NULL,"
+            " PRIMARY KEY (namespace, key))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_written ON cache (namespace, written_at)")
+    
+    def _connection(self):
+        """One connection per thread and process (connections must not cross a fork)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+    
+    def _get(self, key):
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?",
+            (self.namespace, key_bytes(key))
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] and row[1] <= time.time():
+            self.delete(key)
+            self._count('expirations')
+            return None
+        return row[0]
+    
+    def _set(self, key, payload, expires_at):
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at, written_at) VALUES (?, ?, ?, ?, ?)",
+            (self.namespace, key_bytes(key), payload, expires_at, time.time())
+        )
+        
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self._prune(conn)
+    
+    def _prune(self, conn):
+        """Drop expired entries, then the oldest ones beyond ``max_entries``"""
+        conn.execute(
+            "DELETE FROM cache WHERE namespace = ? AND expires_at > 0 AND expires_at <= ?",
+            (self.namespace, time.time())
+        )
+        excess = len(self) - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM cache WHERE rowid IN (SELECT rowid FROM cache WHERE namespace = ?"
+                " ORDER BY written_at LIMIT ?)",
+                (self.namespace, excess)
+            )
+            self._count('evictions', excess)
+    
+    def delete(self, key):
+        cursor = self._connection().execute(
+            "DELETE FROM cache WHERE namespace = ? AND key = ?", (self.namespace, key_bytes(key))
+        )
+        return cursor.rowcount > 0
+    
+    def invalidate(self, predicate=None):
+        """Drop every entry of the namespace, or only those whose key matches ``predicate``"""
+        conn = self._connection()
+        if predicate is None:
+            removed = conn.execute("DELETE FROM cache WHERE namespace = ?", (self.namespace,)).rowcount
+        else:
+            stale = [
+                (self.namespace, raw_key)
+                for (raw_key,) in conn.execute("SELECT key FROM cache WHERE namespace = ?", (self.namespace,))
+                if predicate(pickle.loads(raw_key))
+            ]
+            conn.executemany("DELETE FROM cache WHERE namespace = ? AND key = ?", stale)
+            removed = len(stale)
+        
+        self._count('invalidations', removed)
+        return removed
+    
+    def __len__(self):
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM cache WHERE namespace = ?", (self.namespace,)
+        ).fetchone()[0]
+    
+    def _backend_stats(self):
+        return {'size': len(self), 'max_entries': self.max_entries, 'path': self.path}
+
+def create_cache(namespace, max_entries=1000, ttl=None, max_bytes=None, sizeof=None,
+                 slot_size=65536, backend=None):
+    """Cache for one namespace on the configured backend
+    
+    ``backend`` (default ``Config.CACHE_BACKEND``, env ``DS_CACHE_BACKEND``) is one of
+    ``memory`` (per-process LRU), ``mmap`` (shared-memory slot table) or
+    ``sqlite`` (on-disk, WAL). ``max_bytes``/``sizeof`` apply to ``memory`` only,
+    ``slot_size`` (largest cacheable value) to ``mmap`` only.
+    """
+    backend = backend or Config.CACHE_BACKEND
+    
+    if backend == 'memory':
+        return TTLCache(max_entries=max_entries, ttl=ttl, max_bytes=max_bytes, sizeof=sizeof)
+    if backend == 'mmap':
+        return MmapCache(
+            os.path.join(Config.CACHE_DIR, f"{namespace}.mmap"),
+            slots=max_entries, slot_size=slot_size, ttl=ttl
+        )
+    if backend == 'sqlite':
+        return SQLiteCache(
+            os.path.join(Config.CACHE_DIR, 'cache.sqlite3'),
+            namespace=namespace, max_entries=max_entries, ttl=ttl
+        )
+    
+    raise ValueError(f"Unknown cache backend: {backend}")
@@ -0,0 +1,148 @@
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+# Wire formats besides JSON; pyarrow and msgpack are imported on first use
+MEDIA_TYPES = {
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'parquet': 'application/vnd.apache.parquet',
+    'msgpack': 'application/msgpack'
+}
+
+# Request Content-Types (including common aliases) -> format
+REQUEST_TYPES = {
+    'application/vnd.apache.arrow.stream': 'arrow',
+    'application/vnd.apache.arrow.file': 'arrow',
+    'application/x-apache-arrow-stream': 'arrow',
+    'application/vnd.apache.parquet': 'parquet',
+    'application/x-parquet': 'parquet',
+    'application/msgpack': 'msgpack',
+    'application/x-msgpack': 'msgpack',
+    'application/vnd.msgpack': 'msgpack'
+}
+
+ARROW_FILE_MAGIC = b'ARROW1'
+
+def request_format(mimetype):
+    """Format of a request body by its Content-Type: ``arrow``, ``parquet``, ``msgpack`` or ``json``"""
+    return REQUEST_TYPES.get((mimetype or '').lower(), 'json')
+
+def response_format(accept_mimetypes, tabular=True):
+    """Best response format for an ``Accept`` header; JSON unless another one is preferred
+    
+    Arrow and Parquet are offered only for ``tabular`` responses; MessagePack
+    encodes any response document.
+    """
+    candidates = ['application/json', MEDIA_TYPES['msgpack']]
+    if tabular:
+        candidates += [MEDIA_TYPES['arrow'], MEDIA_TYPES['parquet']]
+    best = accept_mimetypes.best_match(candidates, default='application/json')
+    return next((fmt for fmt, media_type in MEDIA_TYPES.items() if media_type == best), 'json')
+
+def decode_frame(body, fmt):
+    """DataFrame from an Arrow IPC, Parquet or columnar MessagePack body
+    
+    Arrow and Parquet are converted column by column without consolidating
+    blocks, so numeric columns without nulls are views of the Arrow buffers.
+    """
+    if fmt == 'arrow':
+        import pyarrow as pa
+        
+        buffer = pa.py_buffer(body)
+        reader = pa.ipc.open_file(buffer) if bytes(body[:6]) == ARROW_FILE_MAGIC else pa.ipc.open_stream(buffer)
+        return reader.read_all().to_pandas(split_blocks=True, self_destruct=True)
+    
+    if fmt == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        return pq.read_table(pa.BufferReader(body)).to_pandas(split_blocks=True, self_destruct=True)
+    
+    if fmt == 'msgpack':
+        import msgpack
+        
+        return _frame_from_msgpack(msgpack.unpackb(body, raw=False, strict_map_key=False))
+    
+    raise ValueError(f"Unsupported columnar format: {fmt}")
+
+def _frame_from_msgpack(obj):
+    """``{"columns": {name: column}}``, a bare ``{name: column}`` map, or a list of row maps
+    
+    A column is a list of values or ``{"dtype": "<f8", "data": <bin>}``: raw
+    little-endian values read with ``np.frombuffer`` (no per-value objects).
+    """
+    if isinstance(obj, list):
+        return pd.DataFrame(obj)
+    if not isinstance(obj, dict):
+        raise ValueError("MessagePack body must be a map of columns or a list of rows")
+    
+    columns = obj.get('columns', obj)
+    return pd.DataFrame({
+        name: np.frombuffer(column['data'], dtype=np.dtype(column['dtype']))
+        if isinstance(column, dict) and 'data' in column else column
+        for name, column in columns.items()
+    })
+
+def encode_frame(df, fmt, metadata=None):
+    """DataFrame as an Arrow IPC stream, Parquet file or columnar MessagePack body
+    
+    ``metadata`` (a JSON-serializable dict) travels with the data: in the
+    Arrow/Parquet schema metadata under ``ds`` and as ``"metadata"`` in
+    MessagePack.
+    """
+    if fmt in ('arrow', 'parquet'):
+        import pyarrow as pa
+        from utils import json_utils
+        
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if metadata:
+            table = table.replace_schema_metadata({**(table.schema.metadata or {}), b'ds': json_utils.dumps(metadata)})
+        
+        sink = pa.BufferOutputStream()
+        if fmt == 'arrow':
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+        else:
+            import pyarrow.parquet as pq
+            pq.write_table(table, sink)
+        return sink.getvalue().to_pybytes()
+    
+    if fmt == 'msgpack':
+        payload = {'columns': {str(name): _msgpack_column(df[name]) for name in df.columns}}
+        if metadata:
+            payload['metadata'] = metadata
+        return encode_document(payload)
+    
+    raise ValueError(f"Unsupported columnar format: {fmt}")
+
+def _msgpack_column(series):
+    """Fixed-width columns as raw little-endian bytes, everything else as a list"""
+    values = series.to_numpy()
+    if values.dtype.kind in 'biufcmM':
+        values = np.ascontiguousarray(values, dtype=values.dtype.newbyteorder('<'))
+        return {'dtype': values.dtype.str, 'data': values.tobytes()}
+    return series.astype(object).where(series.notna(), None).tolist()
+
+def encode_document(obj):
+    """Any response document as MessagePack (NumPy/pandas values converted natively)"""
+    import msgpack
+    
+    return msgpack.packb(obj, default=_msgpack_default, use_bin_type=True, datetime=False)
+
+def _msgpack_default(obj):
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, pd.DataFrame):
+        return {'columns': {str(name): _msgpack_column(obj[name]) for name in obj.columns}}
+    if isinstance(obj, pd.Series):
+        return obj.astype(object).where(obj.notna(), None).tolist()
+    if isinstance(obj, (pd.Timestamp, datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    return str(obj)
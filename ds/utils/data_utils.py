@@ -60,8 +60,12 @@ class DataProcessor:
         except Exception as e:
             return {"error": f"Data cleaning failed: {str(e)}"}
     
-    def process(self, data):
-        """Process data with comprehensive transformations"""
+    def process(self, data, as_frame=False):
+        """Process data with comprehensive transformations
+        
+        With ``as_frame=True`` ``processed_data`` is the DataFrame itself instead
+        of a list of row dicts.
+        """
         try:
             # First clean the data
             cleaned_result = self.clean_data(data)
@@ -84,7 +88,7 @@ class DataProcessor:
             processed_df = self._create_features(processed_df)
             
             return {
-                'processed_data': processed_df.to_dict('records'),
+                'processed_data': processed_df if as_frame else processed_df.to_dict('records'),
                 'processing_summary': {
                     'cleaning_summary': cleaned_result['cleaning_summary'],
                     'features_created': len(processed_df.columns) - len(df.columns),
@@ -0,0 +1,212 @@
+import atexit
+import os
+import queue
+import threading
+import time
+
+from config.settings import Config
+from utils import json_utils
+
+class DeliveryQueueFull(Exception):
+    """Raised when the queue stays full for the whole put timeout (backpressure)"""
+
+class DeliveryQueue:
+    """Bounded outbound queue drained by a background flusher in batches
+    
+    Items are coalesced into batches of up to ``max_batch`` and handed to
+    ``send_batch(items)`` (which returns True on success) at most
+    ``flush_interval`` seconds after the first item of the batch arrived.
+    Batches that fail are spooled as JSON files in ``spool_dir`` and retried
+    oldest first, including spool files left by earlier runs or other worker
+    processes. A file is claimed by renaming it before sending, so two
+    processes never deliver the same spooled batch.
+    """
+    
+    CLAIM_TIMEOUT = 300  # seconds after which a claimed spool file is considered abandoned
+    
+    def __init__(self, send_batch, spool_dir, max_batch=None, flush_interval=None, max_pending=None,
+                 put_timeout=None, retry_interval=None, max_spooled=None):
+        self.send_batch = send_batch
+        self.spool_dir = spool_dir
+        self.max_batch = max_batch or Config.DELIVERY_BATCH_SIZE
+        self.flush_interval = Config.DELIVERY_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.put_timeout = Config.DELIVERY_PUT_TIMEOUT if put_timeout is None else put_timeout
+        self.retry_interval = retry_interval or Config.DELIVERY_RETRY_INTERVAL
+        self.max_spooled = max_spooled or Config.DELIVERY_SPOOL_MAX_BATCHES
+        self._queue = queue.Queue(maxsize=max_pending or Config.DELIVERY_QUEUE_SIZE)
+        self._stopping = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._next_retry = 0.0
+        self._sequence = 0
+        self._stats = {
+            'enqueued': 0, 'rejected': 0, 'batches_sent': 0, 'items_sent': 0,
+            'send_failures': 0, 'spooled_batches': 0, 'spool_dropped': 0, 'respooled_sent': 0
+        }
+        # Spool whatever is still queued at interpreter exit
+        atexit.register(self.close)
+    
+    def start(self):
+        """Start the flusher thread (idempotent; ``put`` starts it on first use)"""
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                os.makedirs(self.spool_dir, exist_ok=True)
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name='delivery-queue', daemon=True)
+                self._thread.start()
+    
+    def put(self, item, timeout=None):
+        """Enqueue an item, waiting up to ``timeout`` for space; raises ``DeliveryQueueFull``"""
+        self.start()
+        try:
+            self._queue.put(item, timeout=self.put_timeout if timeout is None else timeout)
+        except queue.Full:
+            self._stats['rejected'] += 1
+            raise DeliveryQueueFull(f"Delivery queue full ({self._queue.maxsize} pending items)")
+        self._stats['enqueued'] += 1
+    
+    def flush(self, timeout=None):
+        """Wait until every queued item was sent or spooled; returns False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+    
+    def close(self, timeout=5.0):
+        """Stop the flusher after draining; anything still queued is spooled"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        
+        leftover = []
+        while True:
+            try:
+                leftover.append(self._queue.get_nowait())
+                self._queue.task_done()
+            except queue.Empty:
+                break
+        if leftover:
+            self._spool(leftover)
+    
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if batch:
+                self._deliver(batch)
+            elif time.monotonic() >= self._next_retry:
+                self._retry_spool()
+    
+    def _collect(self):
+        """Up to ``max_batch`` items, waiting at most ``flush_interval`` after the first"""
+        try:
+            batch = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0 or self._stopping.is_set():
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+    
+    def _send(self, items):
+        try:
+            return bool(self.send_batch(items))
+        except Exception:
+            return False
+    
+    def _deliver(self, batch):
+        try:
+            if self._send(batch):
+                self._stats['batches_sent'] += 1
+                self._stats['items_sent'] += len(batch)
+                # The receiver is reachable again: work off the spool
+                self._retry_spool()
+            else:
+                self._stats['send_failures'] += 1
+                self._spool(batch)
+                self._next_retry = time.monotonic() + self.retry_interval
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+    
+    def _spool(self, items):
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self._sequence += 1
+        name = f"{time.time_ns():020d}-{os.getpid()}-{self._sequence}.json"
+        tmp_path = os.path.join(self.spool_dir, f".{name}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(json_utils.dumps(items))
+        os.replace(tmp_path, os.path.join(self.spool_dir, name))
+        self._stats['spooled_batches'] += 1
+        
+        # Bound the spool: drop the oldest batches beyond max_spooled
+        spooled = self._spooled_files()
+        for path in spooled[:max(0, len(spooled) - self.max_spooled)]:
+            try:
+                os.remove(path)
+                self._stats['spool_dropped'] += 1
+            except FileNotFoundError:
+                pass
+    
+    def _spooled_files(self):
+        try:
+            names = os.listdir(self.spool_dir)
+        except FileNotFoundError:
+            return []
+        
+        now = time.time()
+        paths = []
+        for name in names:
+            path = os.path.join(self.spool_dir, name)
+            if name.endswith('.json') and not name.startswith('.'):
+                paths.append(path)
+            elif name.endswith('.sending'):
+                try:
+                    if now - os.path.getmtime(path) > self.CLAIM_TIMEOUT:
+                        paths.append(path)
+                except FileNotFoundError:
+                    pass
+        return sorted(paths, key=os.path.basename)
+    
+    def _retry_spool(self, max_batches=10):
+        """Resend up to ``max_batches`` spooled batches, oldest first, until one fails"""
+        for path in self._spooled_files()[:max_batches]:
+            original = path[:path.index('.json') + len('.json')]
+            claimed = f"{original}.{os.getpid()}.sending"
+            try:
+                os.replace(path, claimed)
+                os.utime(claimed)
+                with open(claimed, 'rb') as f:
+                    items = json_utils.loads(f.read())
+            except FileNotFoundError:
+                continue  # claimed by another process
+            except ValueError:
+                os.replace(claimed, f"{original}.bad")
+                continue
+            
+            if not self._send(items):
+                os.replace(claimed, original)
+                self._next_retry = time.monotonic() + self.retry_interval
+                return
+            os.remove(claimed)
+            self._stats['respooled_sent'] += 1
+        
+        self._next_retry = time.monotonic() + self.retry_interval
+    
+    def stats(self):
+        return {
+            **self._stats,
+            'pending': self._queue.qsize(),
+            'max_pending': self._queue.maxsize,
+            'spooled_pending': len(self._spooled_files()),
+            'running': self._thread is not None and self._thread.is_alive()
+        }
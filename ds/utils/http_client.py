@@ -0,0 +1,326 @@
+import asyncio
+from collections import namedtuple
+import random
+import threading
+import time
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from config.settings import Config
+
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+RETRY_STATUSES = {429, 502, 503, 504}
+
+# Result of AsyncHTTPClient.request: JSON bodies decoded, headers case-insensitive
+AsyncResponse = namedtuple('AsyncResponse', ['status', 'body', 'headers'])
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of calling a host whose circuit breaker is open"""
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker
+    
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    calls fail immediately for ``reset_timeout`` seconds. Then one trial call
+    is let through (half-open): success closes the circuit, failure re-opens it.
+    """
+    
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self._stats = {'successes': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+    
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+    
+    def _state(self):
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+    
+    def allow(self):
+        """Whether a call may proceed now (claims the trial slot when half-open)"""
+        with self._lock:
+            state = self._state()
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self._stats['rejected'] += 1
+            return False
+    
+    def record_success(self):
+        with self._lock:
+            self._stats['successes'] += 1
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+    
+    def record_failure(self):
+        with self._lock:
+            self._stats['failures'] += 1
+            self._failures += 1
+            if self._trial_in_flight or (self._opened_at is None and self._failures >= self.failure_threshold):
+                self._stats['opened'] += 1
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+    
+    def stats(self):
+        with self._lock:
+            return {**self._stats, 'state': self._state(), 'consecutive_failures': self._failures}
+
+class HTTPClient:
+    """Pooled keep-alive HTTP client for one host with timeouts, retries and a circuit breaker
+    
+    ``endpoint`` names map to ``(connect, read)`` timeouts in ``timeouts``.
+    Failed calls are retried up to ``max_retries`` times with full-jitter
+    exponential backoff: connection errors, timeouts and 429/502/503/504 for
+    idempotent methods, and only connections that were never established for
+    the others (so a POST is never sent twice). Timeouts, connection errors
+    and 5xx responses count against the circuit breaker.
+    """
+    
+    def __init__(self, base_url, pool_connections=None, pool_maxsize=None, max_retries=None,
+                 backoff_base=None, backoff_max=None, timeouts=None, breaker=None):
+        self.base_url = base_url.rstrip('/')
+        self.max_retries = Config.HTTP_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = backoff_base or Config.HTTP_BACKOFF_BASE
+        self.backoff_max = backoff_max or Config.HTTP_BACKOFF_MAX
+        self.timeouts = {**Config.HTTP_TIMEOUTS, **(timeouts or {})}
+        self.breaker = breaker or CircuitBreaker(Config.HTTP_BREAKER_FAILURES, Config.HTTP_BREAKER_RESET)
+        
+        # Retries are handled here (with jitter and breaker accounting), not by urllib3
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections or Config.HTTP_POOL_CONNECTIONS,
+            pool_maxsize=pool_maxsize or Config.HTTP_POOL_MAXSIZE,
+            max_retries=0
+        )
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({'Connection': 'keep-alive'})
+        self._stats = {'requests': 0, 'retries': 0}
+    
+    def request(self, method, path, endpoint=None, timeout=None, retry=None, **kwargs):
+        """Send a request to ``base_url + path``; raises ``requests`` exceptions like ``Session.request``"""
+        method = method.upper()
+        url = path if path.startswith(('http://', 'https://')) else f"{self.base_url}/{path.lstrip('/')}"
+        timeout = timeout or self.timeouts.get(endpoint, self.timeouts['default'])
+        idempotent = method in IDEMPOTENT_METHODS if retry is None else retry
+        
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise CircuitOpenError(f"Circuit open for {self.base_url}; not calling {url}")
+            
+            self._stats['requests'] += 1
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self.breaker.record_failure()
+                if attempt >= self.max_retries or not (idempotent or _not_sent(e)):
+                    raise
+                self._backoff(attempt)
+                attempt += 1
+                continue
+            
+            if response.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            
+            if response.status_code in RETRY_STATUSES and idempotent and attempt < self.max_retries:
+                self._backoff(attempt, response.headers.get('Retry-After'))
+                response.close()
+                attempt += 1
+                continue
+            return response
+    
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+    
+    def post(self, path, **kwargs):
+        return self.request('POST', path, **kwargs)
+    
+    def _backoff(self, attempt, retry_after=None):
+        self._stats['retries'] += 1
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), self.backoff_max))
+        time.sleep(delay)
+    
+    def stats(self):
+        return {**self._stats, 'base_url': self.base_url, 'breaker': self.breaker.stats()}
+    
+    def close(self):
+        """Drop pooled connections (the client stays usable and reconnects on demand)"""
+        self.session.close()
+
+class AsyncHTTPClient:
+    """Long-lived aiohttp sessions, one bounded connector for all hosts per event loop
+    
+    A session is created lazily for each running event loop and reused for
+    every call on it, so connections stay pooled and kept alive; threads with
+    their own loops do not replace each other's sessions. A loop's session is
+    closed when the loop shuts down its async generators (``asyncio.run`` does
+    so on exit) or by ``close()``. Timeouts, jittered retries and the per-host
+    circuit breaker follow ``HTTPClient``; the breaker is shared with the
+    host's synchronous client from ``get_client``.
+    """
+    
+    def __init__(self, limit=None, limit_per_host=None, keepalive_timeout=None, max_retries=None,
+                 backoff_base=None, backoff_max=None, timeouts=None):
+        self.limit = limit or Config.ASYNC_HTTP_LIMIT
+        self.limit_per_host = limit_per_host or Config.ASYNC_HTTP_LIMIT_PER_HOST
+        self.keepalive_timeout = keepalive_timeout or Config.ASYNC_HTTP_KEEPALIVE
+        self.max_retries = Config.HTTP_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = backoff_base or Config.HTTP_BACKOFF_BASE
+        self.backoff_max = backoff_max or Config.HTTP_BACKOFF_MAX
+        self.timeouts = {**Config.HTTP_TIMEOUTS, **(timeouts or {})}
+        # Event loop -> (session, closer). A session references its loop, so
+        # entries are removed explicitly rather than through weak references
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+        self._stats = {'requests': 0, 'retries': 0, 'sessions': 0}
+    
+    def session(self):
+        """The running event loop's session, created if missing or closed"""
+        loop = asyncio.get_running_loop()
+        entry = self._sessions.get(loop)
+        if entry is not None and not entry[0].closed:
+            return entry[0]
+        
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=300
+        )
+        session = aiohttp.ClientSession(connector=connector)
+        closer = self._close_at_shutdown(loop, session)
+        _start_async_generator(closer)
+        
+        with self._sessions_lock:
+            # Loops closed without shutting down their async generators
+            for stale_loop in [other for other in self._sessions if other.is_closed()]:
+                del self._sessions[stale_loop]
+            self._sessions[loop] = (session, closer)
+            self._stats['sessions'] += 1
+        return session
+    
+    async def _close_at_shutdown(self, loop, session):
+        """Async generator the loop finalizes in ``shutdown_asyncgens()``: closes its session"""
+        try:
+            yield
+        finally:
+            with self._sessions_lock:
+                if self._sessions.get(loop, (None,))[0] is session:
+                    del self._sessions[loop]
+            await session.close()
+    
+    async def request(self, method, base_url, path, endpoint=None, retry=None, **kwargs):
+        """Send a request and return an ``AsyncResponse``; JSON bodies are decoded"""
+        method = method.upper()
+        breaker = get_client(base_url).breaker
+        url = f"{base_url.rstrip('/')}/{path.lstrip('/')}"
+        connect, read = self.timeouts.get(endpoint, self.timeouts['default'])
+        timeout = aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+        idempotent = method in IDEMPOTENT_METHODS if retry is None else retry
+        
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuit open for {base_url}; not calling {url}")
+            
+            self._stats['requests'] += 1
+            try:
+                async with self.session().request(method, url, timeout=timeout, **kwargs) as response:
+                    if response.content_type == 'application/json':
+                        body = await response.json()
+                    else:
+                        body = await response.text()
+                    status = response.status
+                    headers = response.headers
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                breaker.record_failure()
+                not_sent = isinstance(e, aiohttp.ClientConnectorError)
+                if attempt >= self.max_retries or not (idempotent or not_sent):
+                    raise
+                await self._backoff(attempt)
+                attempt += 1
+                continue
+            
+            if status >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            
+            if status in RETRY_STATUSES and idempotent and attempt < self.max_retries:
+                await self._backoff(attempt)
+                attempt += 1
+                continue
+            return AsyncResponse(status, body, headers)
+    
+    async def _backoff(self, attempt):
+        self._stats['retries'] += 1
+        await asyncio.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+    
+    def stats(self):
+        with self._sessions_lock:
+            open_sessions = sum(1 for session, _ in self._sessions.values() if not session.closed)
+        return {**self._stats, 'open': open_sessions}
+    
+    async def close(self):
+        """Close the running event loop's session"""
+        with self._sessions_lock:
+            entry = self._sessions.pop(asyncio.get_running_loop(), None)
+        if entry is not None:
+            session, closer = entry
+            await session.close()
+            await closer.aclose()
+
+def _start_async_generator(agen):
+    """Run an async generator to its first ``yield`` without awaiting
+    
+    Its first iteration registers it with the running loop, which then
+    finalizes it when the loop shuts down.
+    """
+    try:
+        agen.asend(None).send(None)
+    except StopIteration:
+        pass
+
+def _not_sent(error):
+    """Whether a failed request never reached the server (safe to retry any method)"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_client(base_url):
+    """Shared client (one connection pool and circuit breaker) per base URL"""
+    base_url = base_url.rstrip('/')
+    with _clients_lock:
+        client = _clients.get(base_url)
+        if client is None:
+            client = _clients[base_url] = HTTPClient(base_url)
+        return client
+
+def client_stats():
+    with _clients_lock:
+        return {base_url: client.stats() for base_url, client in _clients.items()}
@@ -0,0 +1,25 @@
+from flask.json.provider import JSONProvider
+
+from utils import json_utils
+
+class FastJSONProvider(JSONProvider):
+    """Flask JSON provider on ``utils.json_utils`` (orjson when installed)
+    
+    ``jsonify`` and ``request.get_json`` go through it. NumPy scalars and
+    arrays, pandas Timestamps and NaN (as null) are encoded natively, and a
+    DataFrame anywhere in a response is written by pandas' column-wise
+    encoder instead of being converted to a list of dicts first. Output is
+    compact and keeps key order.
+    """
+    
+    mimetype = 'application/json'
+    
+    def dumps(self, obj, **kwargs):
+        return json_utils.dumps(obj).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return json_utils.loads(s)
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(json_utils.dumps(obj), mimetype=self.mimetype)
@@ -0,0 +1,88 @@
+import json
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the standard library encoder
+    orjson = None
+
+# orjson >= 3.9 embeds pre-encoded JSON (DataFrames encoded by pandas) without re-parsing it
+Fragment = getattr(orjson, 'Fragment', None)
+
+def frame_to_json(df, orient='records'):
+    """DataFrame as UTF-8 JSON bytes, written column-wise by pandas' C encoder
+    
+    No per-row Python dicts are built (several times faster than
+    ``to_dict('records')`` plus any encoder). NaN/NaT become null, timestamps
+    ISO 8601; floats keep 15 decimal places.
+    """
+    return df.to_json(orient=orient, date_format='iso', double_precision=15, default_handler=str).encode('utf-8')
+
+def _default(obj):
+    """Encode the NumPy / pandas values orjson (or json) does not handle natively"""
+    if obj is pd.NaT or obj is pd.NA:
+        return None
+    if isinstance(obj, pd.DataFrame):
+        # Older orjson: parsing pandas' output back is still faster than to_dict('records')
+        return Fragment(frame_to_json(obj)) if Fragment is not None else loads(frame_to_json(obj))
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (pd.Timestamp, datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, pd.Series):
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode('utf-8', errors='replace')
+    return str(obj)
+
+def _default_finite(obj):
+    # json does not pass converted values back through _replace_nan
+    return _replace_nan(_default(obj))
+
+def dumps(obj):
+    """Serialize to UTF-8 JSON bytes; NumPy arrays and scalars are encoded natively, NaN as null"""
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        try:
+            return orjson.dumps(obj, default=_default, option=option)
+        except TypeError:
+            try:
+                # NumPy scalars or other objects as dict keys
+                return orjson.dumps(_normalize_keys(obj), default=_default, option=option)
+            except TypeError:
+                pass  # integers beyond 64 bits, which only the standard library encodes
+    return json.dumps(_replace_nan(_normalize_keys(obj)), default=_default_finite, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _normalize_keys(obj):
+    if isinstance(obj, dict):
+        return {_key(key): _normalize_keys(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_normalize_keys(value) for value in obj]
+    return obj
+
+def _key(key):
+    if isinstance(key, np.generic):
+        key = key.item()
+    return key if isinstance(key, (str, int, float, bool)) or key is None else str(key)
+
+def _replace_nan(obj):
+    # The standard library writes NaN/Infinity, which is not valid JSON
+    if isinstance(obj, float) and not np.isfinite(obj):
+        return None
+    if isinstance(obj, dict):
+        return {key: _replace_nan(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_replace_nan(value) for value in obj]
+    return obj
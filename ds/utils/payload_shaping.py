@@ -0,0 +1,142 @@
+import base64
+import gzip
+import hashlib
+import os
+import time
+
+from config.settings import Config
+from utils import json_utils
+
+try:
+    import zstandard
+except ImportError:  # optional: 'zstd' compression falls back to gzip
+    zstandard = None
+
+# Base64 prefixes of the image formats we render (PNG, JPEG, GIF, WebP)
+IMAGE_PREFIXES = {
+    'iVBORw0KGgo': ('image/png', 'png'),
+    '/9j/': ('image/jpeg', 'jpg'),
+    'R0lGOD': ('image/gif', 'gif'),
+    'UklGR': ('image/webp', 'webp')
+}
+
+class ArtifactStore:
+    """Content-addressed blob store on disk for images sent by reference
+    
+    Blobs are named by their BLAKE2b digest, so storing the same image twice
+    is free and a reference never changes meaning. Files older than
+    ``max_age`` are pruned every ``prune_every`` writes.
+    """
+    
+    def __init__(self, directory=None, max_age=None, prune_every=100):
+        self.directory = directory or Config.ARTIFACT_DIR
+        self.max_age = (max_age or Config.ARTIFACT_MAX_AGE).total_seconds()
+        self.prune_every = prune_every
+        self._writes = 0
+    
+    def put(self, data, extension):
+        """Store ``data`` and return its file name (``<digest>.<extension>``)"""
+        name = f"{hashlib.blake2b(data, digest_size=16).hexdigest()}.{extension}"
+        path = os.path.join(self.directory, name)
+        if os.path.exists(path):
+            os.utime(path)  # keep referenced artifacts from being pruned
+            return name
+        
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            self.prune()
+        return name
+    
+    def path(self, name):
+        """Absolute path of a stored artifact, or None (names are plain digests only)"""
+        if os.path.basename(name) != name or name.startswith('.'):
+            return None
+        path = os.path.join(os.path.realpath(self.directory), name)
+        return path if os.path.isfile(path) else None
+    
+    def prune(self):
+        cutoff = time.time() - self.max_age
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return 0
+        
+        removed = 0
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+def externalize_images(payload, store, base_url=None, min_size=None):
+    """Copy of ``payload`` with inline base64 images replaced by references
+    
+    Any string of at least ``min_size`` characters that is a base64 image (or
+    an ``data:image/...;base64,`` URL) is stored in ``store`` and replaced with
+    ``{"$ref": url, "content_type": ..., "bytes": n}``.
+    """
+    base_url = (base_url or Config.DS_PUBLIC_URL).rstrip('/')
+    min_size = Config.INLINE_IMAGE_MAX_CHARS if min_size is None else min_size
+    
+    def shape(value):
+        if isinstance(value, dict):
+            return {key: shape(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [shape(item) for item in value]
+        if isinstance(value, str) and len(value) >= min_size:
+            return _image_reference(value, store, base_url) or value
+        return value
+    
+    return shape(payload)
+
+def _image_reference(value, store, base_url):
+    encoded = value
+    if value.startswith('data:image/'):
+        header, _, encoded = value.partition(',')
+        if ';base64' not in header:
+            return None
+    
+    kind = next((kind for prefix, kind in IMAGE_PREFIXES.items() if encoded.startswith(prefix)), None)
+    if kind is None:
+        return None
+    try:
+        data = base64.b64decode(encoded, validate=True)
+    except ValueError:
+        return None
+    
+    content_type, extension = kind
+    name = store.put(data, extension)
+    return {"$ref": f"{base_url}/api/artifacts/{name}", "content_type": content_type, "bytes": len(data)}
+
+def encode_body(payload, compression=None, min_size=None):
+    """JSON-encode ``payload`` and optionally compress it
+    
+    Returns ``(body, headers)``. ``compression`` is ``'none'`` (default),
+    ``'gzip'`` or ``'zstd'`` (gzip when the zstandard package is missing);
+    bodies smaller than ``min_size`` bytes are sent uncompressed.
+    """
+    compression = (compression or 'none').lower()
+    min_size = Config.COMPRESSION_MIN_BYTES if min_size is None else min_size
+    
+    body = json_utils.dumps(payload)
+    headers = {"Content-Type": "application/json"}
+    if compression == 'none' or len(body) < min_size:
+        return body, headers
+    
+    if compression == 'zstd' and zstandard is not None:
+        body = zstandard.ZstdCompressor(level=3).compress(body)
+        headers["Content-Encoding"] = "zstd"
+    else:
+        body = gzip.compress(body, compresslevel=6)
+        headers["Content-Encoding"] = "gzip"
+    return body, headers
@@ -0,0 +1,126 @@
+import numpy as np
+
+# Odd 64-bit multipliers for multiply-shift hashing of the count-min rows
+_ROW_MULTIPLIERS = np.array([
+    0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93,
+    0xFF51AFD7ED558CCD, 0xC4CEB9FE1A85EC53, 0x94D049BB133111EB, 0xBF58476D1CE4E5B9
+], dtype=np.uint64)
+
+class SpaceSavingSketch:
+    """Space-saving top-k summary with at most ``capacity`` counters
+    
+    Counts are upper bounds: ``count - error`` is a lower bound of the true
+    frequency. Updates take pre-aggregated ``(values, counts)`` batches and are
+    merged with the standard mergeable-summaries rule, so every batch costs
+    O(capacity) Python work whatever its size.
+    """
+    
+    def __init__(self, capacity=64):
+        self.capacity = capacity
+        self.counters = {}  # value -> [count, error]
+    
+    def _floor(self):
+        """Count any value absent from a full summary may have had"""
+        if len(self.counters) < self.capacity:
+            return 0
+        return min(count for count, _ in self.counters.values())
+    
+    def update(self, values, counts):
+        """Add a batch of distinct ``values`` with their exact ``counts``"""
+        order = np.argsort(-np.asarray(counts), kind='stable')
+        batch_floor = int(counts[order[self.capacity]]) if len(order) > self.capacity else 0
+        batch = {values[i]: int(counts[i]) for i in order[:self.capacity]}
+        self._merge(batch, {}, batch_floor)
+    
+    def merge(self, other):
+        """Fold another summary of the same capacity into this one"""
+        self._merge(
+            {value: count for value, (count, _) in other.counters.items()},
+            {value: error for value, (_, error) in other.counters.items()},
+            other._floor()
+        )
+    
+    def _merge(self, counts, errors, other_floor):
+        floor = self._floor()
+        merged = {}
+        for value in set(self.counters) | set(counts):
+            count, error = self.counters.get(value, (floor, floor))
+            merged[value] = [
+                count + counts.get(value, other_floor),
+                error + errors.get(value, other_floor if value not in counts else 0)
+            ]
+        
+        if len(merged) > self.capacity:
+            merged = dict(sorted(merged.items(), key=lambda item: -item[1][0])[:self.capacity])
+        self.counters = merged
+    
+    def top(self, k):
+        """``(value, count, error)`` of the ``k`` largest counters"""
+        ranked = sorted(self.counters.items(), key=lambda item: (-item[1][0], item[1][1]))
+        return [(value, count, error) for value, (count, error) in ranked[:k]]
+
+class CountMinSketch:
+    """Count-min frequency sketch over 64-bit hashes (``depth`` rows of ``width`` counters)"""
+    
+    def __init__(self, width=2048, depth=4):
+        if width & (width - 1) or not 1 <= depth <= len(_ROW_MULTIPLIERS):
+            raise ValueError("width must be a power of two and depth at most 8")
+        self.width = width
+        self.depth = depth
+        self.shift = np.uint64(64 - int(width).bit_length() + 1)
+        self.table = np.zeros((depth, width), dtype=np.int64)
+    
+    def _indices(self, hashes):
+        # Multiply-shift: the top bits of h * a are a universal hash into width
+        with np.errstate(over='ignore'):
+            return (hashes[np.newaxis, :] * _ROW_MULTIPLIERS[:self.depth, np.newaxis]) >> self.shift
+    
+    def update(self, hashes, counts):
+        for row, indices in enumerate(self._indices(hashes)):
+            self.table[row] += np.bincount(indices.astype(np.intp), weights=counts, minlength=self.width).astype(np.int64)
+    
+    def estimate(self, hashes):
+        """Upper-bound frequency estimate for each hash"""
+        indices = self._indices(np.asarray(hashes, dtype=np.uint64)).astype(np.intp)
+        return self.table[np.arange(self.depth)[:, np.newaxis], indices].min(axis=0)
+    
+    def merge(self, other):
+        self.table += other.table
+
+class HyperLogLog:
+    """HyperLogLog distinct-count estimator with ``2 ** precision`` registers"""
+    
+    def __init__(self, precision=12):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+    
+    def update(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        p = self.precision
+        index = (hashes >> np.uint64(64 - p)).astype(np.intp)
+        rest = hashes & np.uint64((1 << (64 - p)) - 1)
+        
+        # Position of the leftmost 1-bit in the remaining 64 - p bits (exact
+        # via frexp on the two 32-bit halves, which float64 holds exactly)
+        high = np.frexp((rest >> np.uint64(32)).astype(np.float64))[1]
+        low = np.frexp((rest & np.uint64(0xFFFFFFFF)).astype(np.float64))[1]
+        bit_length = np.where(high > 0, high + 32, low)
+        rank = (64 - p - bit_length + 1).astype(np.uint8)
+        
+        np.maximum.at(self.registers, index, rank)
+    
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        
+        zeros = int((self.registers == 0).sum())
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            return m * np.log(m / zeros)
+        return raw
+    
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
@@ -0,0 +1,145 @@
+"""
+Deferred imports, warm-up and import-time reporting
+
+The heavy scientific packages (matplotlib, seaborn, scipy, sklearn
+estimators) are imported where they are first used, so importing the app
+and spawning workers stays fast. ``warm_up()`` imports them ahead of the
+first request, e.g. in the gunicorn master before forking.
+    
+    python -m utils.startup --report          # where does ``import app`` spend its time?
+    python -m utils.startup --report --module services.ml_models --top 30
+"""
+
+import argparse
+import importlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+# Modules loaded on first use by the services, in warm-up order
+HEAVY_MODULES = (
+    'scipy.stats',
+    'sklearn.preprocessing',
+    'sklearn.model_selection',
+    'sklearn.metrics',
+    'sklearn.linear_model',
+    'sklearn.ensemble',
+    'sklearn.svm',
+    'sklearn.naive_bayes',
+    'matplotlib.pyplot',
+    'seaborn'
+)
+
+_attributes = {}
+
+def load_attribute(path):
+    """Object named by ``'package.module:attribute'``, importing the module on first use"""
+    value = _attributes.get(path)
+    if value is None:
+        module_name, _, attribute = path.partition(':')
+        value = _attributes[path] = getattr(importlib.import_module(module_name), attribute)
+    return value
+
+def pyplot():
+    """``matplotlib.pyplot`` on the non-interactive Agg backend (charts are rendered to PNG)"""
+    if 'matplotlib.pyplot' not in sys.modules:
+        import matplotlib
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+def warm_up(modules=HEAVY_MODULES):
+    """Import ``modules`` now instead of on first use; returns seconds per module
+    
+    Also draws and discards a figure, which builds matplotlib's font cache
+    (seconds on a fresh machine) outside of a request.
+    """
+    timings = {}
+    for name in modules:
+        start = time.perf_counter()
+        if name == 'matplotlib.pyplot':
+            plt = pyplot()
+            plt.close(plt.figure())
+        else:
+            importlib.import_module(name)
+        timings[name] = round(time.perf_counter() - start, 4)
+    return timings
+
+def import_report(module='app', top=20):
+    """Import ``module`` in a fresh interpreter under ``-X importtime`` and summarize
+    
+    Returns the total import time, the slowest modules by cumulative time
+    and the self time aggregated per top-level package (all in seconds).
+    """
+    server_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=server_dir, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip()[-2000:]}")
+    
+    entries = []
+    for line in result.stderr.splitlines():
+        match = re.match(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)', line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, int(self_us) / 1e6, int(cumulative_us) / 1e6, len(indent) // 2))
+    
+    packages = {}
+    for name, self_time, _, _ in entries:
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0.0) + self_time
+    
+    total = sum(self_time for _, self_time, _, _ in entries)
+    slowest = sorted(entries, key=lambda entry: entry[2], reverse=True)[:top]
+    return {
+        'module': module,
+        'total_seconds': round(total, 4),
+        'modules_imported': len(entries),
+        'slowest': [
+            {'module': name, 'cumulative_seconds': round(cumulative, 4), 'self_seconds': round(self_time, 4), 'depth': depth}
+            for name, self_time, cumulative, depth in slowest
+        ],
+        'packages': {
+            package: round(seconds, 4)
+            for package, seconds in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        }
+    }
+
+def print_report(report):
+    print(f"import {report['module']}: {report['total_seconds'] * 1000:.0f} ms, {report['modules_imported']} modules")
+    print(f"\n{'cumulative ms':>14}{'self ms':>10}  module")
+    for entry in report['slowest']:
+        indent = '  ' * entry['depth']
+        print(f"{entry['cumulative_seconds'] * 1000:>14.1f}{entry['self_seconds'] * 1000:>10.1f}  {indent}{entry['module']}")
+    print(f"\n{'self ms':>14}  package")
+    for package, seconds in report['packages'].items():
+        print(f"{seconds * 1000:>14.1f}  {package}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Startup import-time report and warm-up')
+    parser.add_argument('--report', action='store_true', help='report where importing --module spends time')
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--warm-up', action='store_true', help='time warm_up() of the deferred modules')
+    parser.add_argument('--json', action='store_true', help='print JSON instead of a table')
+    args = parser.parse_args()
+    
+    if args.warm_up:
+        timings = warm_up()
+        print(json.dumps(timings, indent=2) if args.json else '\n'.join(
+            f"{seconds * 1000:>10.1f} ms  {name}" for name, seconds in timings.items()
+        ))
+    if args.report or not args.warm_up:
+        report = import_report(args.module, args.top)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            print_report(report)
+
+if __name__ == "__main__":
+    main()
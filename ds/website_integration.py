@@ -2,49 +2,172 @@ import requests
 import json
 from datetime import datetime
 import asyncio
-import aiohttp
 from typing import Dict, List, Any, Optional
 
+import os
+import re
+
+from config.settings import Config
+from utils.cache import StaleWhileRevalidateCache
+from utils.http_client import get_client, AsyncHTTPClient
+from utils.delivery_queue import DeliveryQueue, DeliveryQueueFull
+from utils.payload_shaping import ArtifactStore, externalize_images, encode_body
+
 class WebsiteAIIntegration:
     """Integration service to connect data science server with existing website AI functionality"""
     
-    def __init__(self, backend_url="http://localhost:4000", frontend_url="http://localhost:3000"):
+    def __init__(self, backend_url="http://localhost:4000", frontend_url="http://localhost:3000",
+                 backend_compression=None, frontend_compression=None):
         self.backend_url = backend_url
         self.frontend_url = frontend_url
-        self.session = requests.Session()
+        # Request bodies are compressed only for receivers configured to decode them
+        self.compression = {
+            backend_url: backend_compression or Config.BACKEND_COMPRESSION,
+            frontend_url: frontend_compression or Config.FRONTEND_COMPRESSION
+        }
+        self.backend = get_client(backend_url)
+        self.frontend = get_client(frontend_url)
+        self.async_client = AsyncHTTPClient()
+        self.artifacts = ArtifactStore()
+        
+        # Per-user context: short TTL, stale entries served while refreshing,
+        # concurrent misses for the same user share one backend call
+        self.user_context_cache = StaleWhileRevalidateCache(
+            self._fetch_user_context,
+            max_entries=Config.USER_CONTEXT_CACHE_SIZE,
+            ttl=Config.USER_CONTEXT_TTL,
+            stale_ttl=Config.USER_CONTEXT_STALE_TTL
+        )
+        self._context_tasks = {}  # (loop, user_id) -> in-flight async fetch
+        
+        # Background delivery: insights from many requests are coalesced into
+        # batched pushes, failed batches are spooled to disk and retried
+        self.backend_queue = DeliveryQueue(
+            self._send_ai_handler_batch,
+            spool_dir=os.path.join(Config.DELIVERY_SPOOL_DIR, 'backend')
+        )
+        self.frontend_queue = DeliveryQueue(
+            self._send_frontend_batch,
+            spool_dir=os.path.join(Config.DELIVERY_SPOOL_DIR, 'frontend')
+        )
+    
+    def _body(self, payload, base_url):
+        """Request body and headers: images by reference, fast JSON, compression if ``base_url`` accepts it"""
+        body, headers = encode_body(externalize_images(payload, self.artifacts), compression=self.compression.get(base_url))
+        return {"data": body, "headers": headers}
+    
+    def _ai_payload(self, data_insights):
+        """Data insights formatted for AI processing"""
+        return {
+            "type": "data_science_insights",
+            "data": data_insights,
+            "timestamp": datetime.now().isoformat(),
+            "source": "ds_server"
+        }
+    
+    def _ai_handler_query(self, data_insights):
+        """GraphQL mutation carrying data insights to the website's AI handler"""
+        ai_payload = self._ai_payload(data_insights)
+        
+        return {
+            "query": """
+                mutation ProcessDataInsights($input: DataInsightsInput!) {
+                    processDataInsights(input: $input) {
+                        success
+                        insights
+                        recommendations
+                    }
+                }
+            """,
+            "variables": {
+                "input": ai_payload
+            }
+        }
+    
+    def _frontend_payload(self, insights):
+        """Insights formatted for frontend consumption"""
+        return {
+            "type": "ai_insights",
+            "insights": insights,
+            "timestamp": datetime.now().isoformat(),
+            "metadata": {
+                "source": "data_science_server",
+                "version": "1.0.0"
+            }
+        }
+    
+    @staticmethod
+    def _ai_handler_batch_query(ai_payloads):
+        """One GraphQL document with an aliased ``processDataInsights`` mutation per payload"""
+        definitions = ", ".join(f"$input{i}: DataInsightsInput!" for i in range(len(ai_payloads)))
+        mutations = "\n".join(
+            f"m{i}: processDataInsights(input: $input{i}) {{ success insights recommendations }}"
+            for i in range(len(ai_payloads))
+        )
+        return {
+            "query": f"mutation ProcessDataInsightsBatch({definitions}) {{\n{mutations}\n}}",
+            "variables": {f"input{i}": payload for i, payload in enumerate(ai_payloads)}
+        }
+    
+    def _send_ai_handler_batch(self, ai_payloads):
+        response = self.backend.post(
+            "/graphql",
+            endpoint="graphql",
+            **self._body(self._ai_handler_batch_query(ai_payloads), self.backend_url)
+        )
+        return response.status_code == 200 and "errors" not in response.json()
+    
+    def _send_frontend_batch(self, insight_lists):
+        insights = []
+        for item in insight_lists:
+            insights.extend(item if isinstance(item, list) else [item])
+        
+        response = self.frontend.post(
+            "/api/ai-insights",
+            endpoint="frontend_insights",
+            **self._body(self._frontend_payload(insights), self.frontend_url)
+        )
+        return response.status_code == 200
+    
+    def queue_insights(self, data_insights, insights=None, targets=('backend', 'frontend')):
+        """Queue insights for batched background delivery to the AI handler and frontend
         
+        Returns immediately; raises no network errors. When a queue stays full
+        for ``Config.DELIVERY_PUT_TIMEOUT`` the call reports it instead of
+        blocking the request (backpressure). ``queues`` tells which targets
+        accepted the insights; retry with ``targets`` set to the others so
+        nothing is delivered twice.
+        """
+        # Externalize images before queueing so batches and the spool stay small
+        items = {
+            'backend': (self.backend_queue, lambda: self._ai_payload(data_insights)),
+            'frontend': (self.frontend_queue, lambda: data_insights if insights is None else insights)
+        }
+        
+        result = {"queued": True, "queues": {}}
+        for target in targets:
+            delivery_queue, payload = items[target]
+            try:
+                delivery_queue.put(externalize_images(payload(), self.artifacts))
+                result["queues"][target] = True
+            except DeliveryQueueFull as e:
+                result["queues"][target] = False
+                result["queued"] = False
+                result["error"] = str(e)
+        return result
+    
+    def flush_deliveries(self, timeout=None):
+        """Wait until queued insights were delivered or spooled"""
+        return self.backend_queue.flush(timeout) and self.frontend_queue.flush(timeout)
+    
     def connect_to_ai_handler(self, data_insights):
         """Send data insights to the website's AI handler"""
         try:
-            # Format data for AI processing
-            ai_payload = {
-                "type": "data_science_insights",
-                "data": data_insights,
-                "timestamp": datetime.now().isoformat(),
-                "source": "ds_server"
-            }
-            
             # Send to backend GraphQL endpoint
-            graphql_query = {
-                "query": """
-                    mutation ProcessDataInsights($input: DataInsightsInput!) {
-                        processDataInsights(input: $input) {
-                            success
-                            insights
-                            recommendations
-                        }
-                    }
-                """,
-                "variables": {
-                    "input": ai_payload
-                }
-            }
-            
-            response = self.session.post(
-                f"{self.backend_url}/graphql",
-                json=graphql_query,
-                headers={"Content-Type": "application/json"},
-                timeout=30
+            response = self.backend.post(
+                "/graphql",
+                endpoint="graphql",
+                **self._body(self._ai_handler_query(data_insights), self.backend_url)
             )
             
             if response.status_code == 200:
@@ -58,24 +181,12 @@ class WebsiteAIIntegration:
     def send_insights_to_frontend(self, insights):
         """Send insights to frontend components"""
         try:
-            # Format for frontend consumption
-            frontend_payload = {
-                "type": "ai_insights",
-                "insights": insights,
-                "timestamp": datetime.now().isoformat(),
-                "metadata": {
-                    "source": "data_science_server",
-                    "version": "1.0.0"
-                }
-            }
-            
             # This would typically use WebSocket or SSE for real-time updates
             # For now, we'll use a REST endpoint
-            response = self.session.post(
-                f"{self.frontend_url}/api/ai-insights",
-                json=frontend_payload,
-                headers={"Content-Type": "application/json"},
-                timeout=10
+            response = self.frontend.post(
+                "/api/ai-insights",
+                endpoint="frontend_insights",
+                **self._body(self._frontend_payload(insights), self.frontend_url)
             )
             
             return response.status_code == 200
@@ -85,24 +196,125 @@ class WebsiteAIIntegration:
             return False
     
     def get_user_context(self, user_id=None):
-        """Get user context from the main website"""
+        """Get user context from the main website
+        
+        Served from ``user_context_cache``; errors are returned, never cached.
+        """
         try:
-            params = {"user_id": user_id} if user_id else {}
+            return self.user_context_cache.get(user_id)
             
-            response = self.session.get(
-                f"{self.backend_url}/api/user/context",
-                params=params,
-                timeout=10
+        except requests.HTTPError:
+            return {"error": "Failed to get user context"}
+        except Exception as e:
+            return {"error": f"Context retrieval failed: {str(e)}"}
+    
+    def _fetch_user_context(self, user_id):
+        """``(context, ttl)`` from the backend; honours ``Cache-Control: max-age/no-store``"""
+        params = {"user_id": user_id} if user_id else {}
+        
+        response = self.backend.get(
+            "/api/user/context",
+            endpoint="user_context",
+            params=params
+        )
+        
+        if response.status_code != 200:
+            raise requests.HTTPError(f"User context request failed: {response.status_code}", response=response)
+        return response.json(), self._context_ttl(response.headers.get("Cache-Control", ""))
+    
+    @staticmethod
+    def _context_ttl(cache_control):
+        directives = cache_control.lower()
+        if "no-store" in directives or "no-cache" in directives:
+            return 0
+        match = re.search(r"max-age=(\d+)", directives)
+        return min(int(match.group(1)), Config.USER_CONTEXT_TTL.total_seconds()) if match else None
+    
+    def invalidate_user_context(self, user_id=None):
+        """Drop the cached context of one user, or of every user"""
+        if user_id is None:
+            return self.user_context_cache.invalidate()
+        return int(self.user_context_cache.delete(user_id))
+    
+    async def aconnect_to_ai_handler(self, data_insights):
+        """Async version of ``connect_to_ai_handler`` on the shared aiohttp session"""
+        try:
+            response = await self.async_client.request(
+                "POST", self.backend_url, "/graphql",
+                endpoint="graphql",
+                **self._body(self._ai_handler_query(data_insights), self.backend_url)
             )
             
-            if response.status_code == 200:
-                return response.json()
+            if response.status == 200:
+                return response.body
             else:
-                return {"error": "Failed to get user context"}
+                return {"error": f"Backend connection failed: {response.status}"}
                 
+        except Exception as e:
+            return {"error": f"AI integration failed: {str(e)}"}
+    
+    async def asend_insights_to_frontend(self, insights):
+        """Async version of ``send_insights_to_frontend``"""
+        try:
+            response = await self.async_client.request(
+                "POST", self.frontend_url, "/api/ai-insights",
+                endpoint="frontend_insights",
+                **self._body(self._frontend_payload(insights), self.frontend_url)
+            )
+            return response.status == 200
+        
+        except Exception as e:
+            print(f"Frontend integration error: {e}")
+            return False
+    
+    async def aget_user_context(self, user_id=None):
+        """Async version of ``get_user_context`` sharing the same cache
+        
+        Stale entries are refreshed in the background; concurrent misses for a
+        user on the same event loop await one request.
+        """
+        try:
+            context, state = self.user_context_cache.peek(user_id)
+            if state == 'stale':
+                self.user_context_cache.refresh(user_id)
+            if state != 'miss':
+                return context
+            
+            key = (asyncio.get_running_loop(), user_id)
+            task = self._context_tasks.get(key)
+            if task is None:
+                task = self._context_tasks[key] = asyncio.ensure_future(self._afetch_user_context(user_id))
+                task.add_done_callback(lambda _: self._context_tasks.pop(key, None))
+            return await asyncio.shield(task)
+        
+        except requests.HTTPError:
+            return {"error": "Failed to get user context"}
         except Exception as e:
             return {"error": f"Context retrieval failed: {str(e)}"}
     
+    async def _afetch_user_context(self, user_id):
+        params = {"user_id": user_id} if user_id else {}
+        
+        response = await self.async_client.request(
+            "GET", self.backend_url, "/api/user/context",
+            endpoint="user_context",
+            params=params
+        )
+        
+        if response.status != 200:
+            raise requests.HTTPError(f"User context request failed: {response.status}")
+        # Same caching rules as the synchronous path (no-store is not cached)
+        self.user_context_cache.set(user_id, response.body, ttl=self._context_ttl(response.headers.get("Cache-Control", "")))
+        return response.body
+    
+    async def adeliver_insights(self, data_insights, insights=None):
+        """Send to the AI handler and the frontend concurrently"""
+        backend_result, frontend_result = await asyncio.gather(
+            self.aconnect_to_ai_handler(data_insights),
+            self.asend_insights_to_frontend(data_insights if insights is None else insights)
+        )
+        return {"backend_result": backend_result, "frontend_result": frontend_result}
+    
     def enhance_ai_response(self, original_response, data_context):
         """Enhance AI responses with data science context"""
         try:
@@ -208,34 +420,30 @@ class WebsiteAIIntegration:
     
     async def async_send_insights(self, insights):
         """Async method to send insights to multiple endpoints"""
-        tasks = []
-        
         try:
-            async with aiohttp.ClientSession() as session:
-                # Send to backend
-                tasks.append(self._async_post(session, f"{self.backend_url}/api/insights", insights))
-                
-                # Send to frontend
-                tasks.append(self._async_post(session, f"{self.frontend_url}/api/ai-insights", insights))
-                
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                return {
-                    "backend_result": results[0] if len(results) > 0 else None,
-                    "frontend_result": results[1] if len(results) > 1 else None
-                }
+            # Backend and frontend concurrently, over the shared session
+            results = await asyncio.gather(
+                self._async_post(self.backend_url, "/api/insights", insights),
+                self._async_post(self.frontend_url, "/api/ai-insights", insights, endpoint="frontend_insights"),
+                return_exceptions=True
+            )
+            
+            return {
+                "backend_result": results[0] if len(results) > 0 else None,
+                "frontend_result": results[1] if len(results) > 1 else None
+            }
                 
         except Exception as e:
             return {"error": f"Async integration failed: {str(e)}"}
     
-    async def _async_post(self, session, url, data):
+    async def _async_post(self, base_url, path, data, endpoint=None):
         """Helper method for async POST requests"""
         try:
-            async with session.post(url, json=data) as response:
-                return {
-                    "status": response.status,
-                    "data": await response.json() if response.status == 200 else None
-                }
+            response = await self.async_client.request("POST", base_url, path, endpoint=endpoint, **self._body(data, base_url))
+            return {
+                "status": response.status,
+                "data": response.body if response.status == 200 else None
+            }
         except Exception as e:
             return {"error": str(e)}
     
@@ -435,6 +643,25 @@ class WebsiteAIIntegration:
         """Calculate data quality score"""
         return min(10, max(1, int(self._calculate_confidence_score(data_analysis))))
     
+    def connection_stats(self):
+        """Retry and circuit breaker metrics of the backend and frontend clients"""
+        return {
+            "backend": self.backend.stats(),
+            "frontend": self.frontend.stats(),
+            "async": self.async_client.stats(),
+            "backend_queue": self.backend_queue.stats(),
+            "frontend_queue": self.frontend_queue.stats(),
+            "user_context_cache": self.user_context_cache.stats()
+        }
+    
     def close(self):
-        """Close the integration session"""
-        self.session.close()
+        """Drain the delivery queues and release pooled connections"""
+        self.backend_queue.close()
+        self.frontend_queue.close()
+        self.backend.close()
+        self.frontend.close()
+    
+    async def aclose(self):
+        """Close the shared aiohttp session (and release pooled sync connections)"""
+        await self.async_client.close()
+        self.close()
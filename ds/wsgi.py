@@ -0,0 +1,26 @@
+"""
+WSGI entry point for production servers
+    
+    DS_CONFIG=production gunicorn --config gunicorn.conf.py wsgi:app
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import app, ml_predictor
+from config.settings import get_config
+from utils.startup import warm_up
+
+settings = get_config()
+
+# With preload_app this runs once in the gunicorn master; forked workers
+# share the imported modules and loaded models copy-on-write instead of each
+# paying for them on their first request
+if settings.WARM_UP_IMPORTS:
+    warm_up()
+if settings.PRELOAD_MODELS:
+    ml_predictor.load_saved_models()
+
+application = app